@@ -46,12 +46,7 @@ class AbstractGeoData:
         return self.load(boundless=True).read_from_window(window=window, boundless=boundless)
 
     def footprint(self, crs:Optional[str]=None) -> Polygon:
-        pol = window_utils.window_polygon(rasterio.windows.Window(row_off=0, col_off=0, height=self.shape[-2], width=self.shape[-1]),
-                                          self.transform)
-        if (crs is None) or window_utils.compare_crs(self.crs, crs):
-            return pol
-
-        return window_utils.polygon_to_crs(pol, self.crs, crs)
+        return window_utils.footprint(self.transform, self.shape[-2:], self.crs, crs)
 
     @property
     def values(self) -> np.ndarray:
@@ -0,0 +1,185 @@
+"""
+In-process LRU cache of decoded raster blocks.
+
+GDAL keeps its own block cache (`GDAL_CACHEMAX`) but it is attached to the open dataset and it is lost every time
+the dataset is closed (`RasterioReader.read` opens and closes the files on every call). This cache stores the
+decoded blocks keyed by `(path, overview_level, band, (block_row, block_col))` with a global byte budget, so that
+repeated reads of the same blocks (tile serving, sliding-window passes over the same COG) do not decompress them again.
+
+Examples:
+    >>> from georeader.rasterio_reader import RasterioReader
+    >>> from georeader import block_cache
+    >>> block_cache.get_block_cache().resize(1024**3) # 1GB budget
+    >>> r = RasterioReader("path/to/cog.tif", use_block_cache=True)
+    >>> r.read(window=rasterio.windows.Window(0, 0, 512, 512))
+    >>> block_cache.get_block_cache().stats()
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+import rasterio
+import rasterio.windows
+
+BLOCK_CACHE_SIZE_DEFAULT = 512 * 1024 ** 2
+
+
+class BlockCache:
+    """
+    Thread-safe LRU cache of decoded blocks with a memory budget in bytes.
+
+    Args:
+        max_bytes: maximum number of bytes of the cached blocks.
+    """
+    def __init__(self, max_bytes:int=BLOCK_CACHE_SIZE_DEFAULT):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._blocks: OrderedDict = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key:Hashable) -> Optional[np.ndarray]:
+        with self._lock:
+            block = self._blocks.get(key, None)
+            if block is None:
+                self.misses += 1
+                return None
+            self._blocks.move_to_end(key)
+            self.hits += 1
+            return block
+
+    def put(self, key:Hashable, block:np.ndarray) -> None:
+        if block.nbytes > self.max_bytes:
+            return
+
+        block.setflags(write=False)
+        with self._lock:
+            if key in self._blocks:
+                self.nbytes -= self._blocks.pop(key).nbytes
+            self._blocks[key] = block
+            self.nbytes += block.nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.nbytes > self.max_bytes:
+            _, block = self._blocks.popitem(last=False)
+            self.nbytes -= block.nbytes
+            self.evictions += 1
+
+    def resize(self, max_bytes:int) -> None:
+        """ Changes the memory budget evicting blocks if needed """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """ Removes all the blocks and resets the counters """
+        with self._lock:
+            self._blocks = OrderedDict()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """ Returns the hit, miss and eviction counters, the number of cached blocks and their size in bytes """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "blocks": len(self._blocks), "nbytes": self.nbytes, "max_bytes": self.max_bytes}
+
+
+_BLOCK_CACHE = BlockCache()
+
+
+def get_block_cache() -> BlockCache:
+    """ Returns the process-wide block cache used by `RasterioReader` with `use_block_cache=True` """
+    return _BLOCK_CACHE
+
+
+def _is_integer_window(window:rasterio.windows.Window) -> bool:
+    return all(float(v).is_integer() for v in (window.col_off, window.row_off, window.width, window.height))
+
+
+def read_window_cached(src:rasterio.DatasetReader, key_dataset:Tuple[Any, ...], indexes:List[int],
+                       window:rasterio.windows.Window, out:np.ndarray,
+                       cache:Optional[BlockCache]=None) -> bool:
+    """
+    Fills `out` with the data of `window` using the decoded blocks of the cache. Missing blocks are read from `src`
+    (all the missing bands of a block in one call) and added to the cache.
+
+    If `out` has a spatial shape different than the window, the data is decimated with nearest neighbour as GDAL
+    does. This is only done if `src` has no overviews (otherwise GDAL would read from the overviews); in that case
+    the function returns `False` without reading anything.
+
+    Args:
+        src: open rasterio dataset.
+        key_dataset: tuple identifying the dataset in the cache (e.g. `(path, overview_level, signature)`).
+        indexes: 1-based bands to read.
+        window: window to read. It must be within the bounds of `src` and have integer offsets and shape.
+        out: 3D array `(len(indexes), H, W)` to write the data.
+        cache: block cache. Defaults to `get_block_cache()`.
+
+    Returns:
+        `True` if `out` was filled, `False` if the read can't be served from the cache.
+    """
+    if cache is None:
+        cache = _BLOCK_CACHE
+
+    if not _is_integer_window(window):
+        return False
+
+    block_shapes = {tuple(src.block_shapes[i - 1]) for i in indexes}
+    if len(block_shapes) != 1:
+        return False
+    block_height, block_width = block_shapes.pop()
+
+    row_off, col_off = int(window.row_off), int(window.col_off)
+    height, width = int(window.height), int(window.width)
+    if (height <= 0) or (width <= 0) or (row_off < 0) or (col_off < 0) or \
+            (row_off + height > src.height) or (col_off + width > src.width):
+        return False
+
+    decimate = tuple(out.shape[-2:]) != (height, width)
+    if decimate:
+        if any(len(src.overviews(i)) > 0 for i in indexes):
+            return False
+        # Same sampling as GDAL RasterIO with nearest resampling
+        rows = np.floor(row_off + (np.arange(out.shape[-2]) + 0.5) * height / out.shape[-2] + 1e-10).astype(np.int64)
+        cols = np.floor(col_off + (np.arange(out.shape[-1]) + 0.5) * width / out.shape[-1] + 1e-10).astype(np.int64)
+        row_off, col_off = int(rows[0]), int(cols[0])
+        height, width = int(rows[-1]) - row_off + 1, int(cols[-1]) - col_off + 1
+        data_window = np.empty((len(indexes), height, width), dtype=src.dtypes[indexes[0] - 1])
+    else:
+        data_window = out
+
+    for block_row in range(row_off // block_height, (row_off + height - 1) // block_height + 1):
+        for block_col in range(col_off // block_width, (col_off + width - 1) // block_width + 1):
+            window_block = rasterio.windows.Window(col_off=block_col * block_width, row_off=block_row * block_height,
+                                                   width=min(block_width, src.width - block_col * block_width),
+                                                   height=min(block_height, src.height - block_row * block_height))
+
+            blocks = [cache.get(key_dataset + (i, (block_row, block_col))) for i in indexes]
+            missing = [i for i, b in zip(indexes, blocks) if b is None]
+            if len(missing) > 0:
+                data_missing = src.read(indexes=missing, window=window_block)
+                blocks_missing = dict(zip(missing, data_missing))
+                for i, b in blocks_missing.items():
+                    cache.put(key_dataset + (i, (block_row, block_col)), b)
+                blocks = [blocks_missing[i] if b is None else b for i, b in zip(indexes, blocks)]
+
+            # Copy the intersection of the block and the window
+            r0 = max(row_off, int(window_block.row_off))
+            r1 = min(row_off + height, int(window_block.row_off + window_block.height))
+            c0 = max(col_off, int(window_block.col_off))
+            c1 = min(col_off + width, int(window_block.col_off + window_block.width))
+            for idx_band, b in enumerate(blocks):
+                data_window[idx_band, (r0 - row_off):(r1 - row_off), (c0 - col_off):(c1 - col_off)] = \
+                    b[(r0 - int(window_block.row_off)):(r1 - int(window_block.row_off)),
+                      (c0 - int(window_block.col_off)):(c1 - int(window_block.col_off))]
+
+    if decimate:
+        out[...] = data_window[:, (rows - row_off)[:, np.newaxis], (cols - col_off)[np.newaxis]]
+
+    return True
@@ -1,15 +1,22 @@
 
 import numpy as np
-from typing import Any, Dict, Union, Tuple, Optional, List
+from typing import Any, Dict, Union, Tuple, Optional, List, Iterator
 import rasterio
 import rasterio.windows
 from georeader import window_utils
 from georeader.window_utils import window_bounds
 from numpy.typing import ArrayLike
-from itertools import product
 from shapely.geometry import Polygon, MultiPolygon
 import numbers
+import io
+import json
+import pickle
+import struct
+import sys
+import threading
+from multiprocessing import shared_memory
 from numpy.typing import NDArray
+from numpy.lib.mixins import NDArrayOperatorsMixin
 
 try:
     import torch
@@ -26,13 +33,114 @@ ORDERS = {
     'bicubic': 2,
 }
 
+# Modes of `scipy.ndimage` equivalent to the `mode_pad` of `GeoTensor.resize` (numpy.pad modes)
+NDIMAGE_MODES = {
+    'constant': 'constant',
+    'edge': 'nearest',
+    'symmetric': 'reflect',
+    'reflect': 'mirror',
+    'wrap': 'wrap'
+}
+
+# numpy functions that reorder the pixels: their outputs are returned as arrays (without georreference)
+ARRAY_FUNCTIONS_REORDER = {np.flip, np.fliplr, np.flipud, np.rot90, np.roll, np.transpose, np.swapaxes,
+                           np.moveaxis, np.rollaxis, np.reshape, np.ravel, np.sort, np.argsort, np.partition,
+                           np.argpartition, np.tile, np.repeat}
+
+# Binary format of `GeoTensor.to_bytes`: magic, header length (uint32), JSON header and the values in frames
+# (each frame is the length of its data as uint64 followed by the data) terminated by an empty frame
+SERIALIZATION_MAGIC = b"GEOTNSR1"
+SERIALIZATION_COMPRESSIONS = (None, "zlib", "zstd")
+# Size in bytes of the chunks of values written in each frame (before compression)
+SERIALIZATION_CHUNK_SIZE = 16 * 1024 ** 2
+
+# Approximate size in bytes of the strips of the GeoTIFFs created by `GeoTensor.empty_on_disk`
+ON_DISK_STRIP_SIZE = 4 * 1024 ** 2
+
+# Interpolation methods of `GeoTensor.resize` computed with block reductions for integer downsampling factors
+BLOCK_REDUCTIONS = ('mean', 'mode', 'min', 'max')
+
+
+
+def _clip_resize_output(image:NDArray, output:NDArray, mode:str, cval:Any) -> NDArray:
+    """
+    Clips `output` (in place) to the range of values of `image` extended with `cval` if the padding mode is
+    "constant" and `cval` is used in `output` (same as the `clip` option of `skimage.transform.resize`).
+    """
+    min_func, max_func = (np.nanmin, np.nanmax) if np.isnan(np.min(image)) else (np.min, np.max)
+    min_val, max_val = min_func(image), max_func(image)
+    if (mode == "constant") and not (min_val <= cval <= max_val) and \
+            (min_func(output) <= cval <= max_func(output)):
+        cval = image.dtype.type(cval)
+        min_val, max_val = min(min_val, cval), max(max_val, cval)
+    np.clip(output, np.asarray(min_val), np.asarray(max_val), out=output)
+    return output
+
+
+def _compressor(compression:Optional[str], level:Optional[int]) -> Any:
+    """ Streaming compressor (with `compress` and `flush` methods) of the `GeoTensor.to_file` compression """
+    if compression is None:
+        return None
+    if compression == "zlib":
+        import zlib
+        return zlib.compressobj(-1 if level is None else level)
+    import zstandard
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+
+
+def _decompressor(compression:Optional[str]) -> Any:
+    """ Streaming decompressor (with a `decompress` method) of the `GeoTensor.to_file` compression """
+    if compression is None:
+        return None
+    if compression == "zlib":
+        import zlib
+        return zlib.decompressobj()
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unknown compression {compression} expected one of {SERIALIZATION_COMPRESSIONS}")
+
+
+_SHARED_MEMORY_LOCK = threading.Lock()
+
+
+def _attach_shared_memory(name:str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing shared memory block without registering it in the resource tracker: only the owner
+    destroys the block (otherwise it is unlinked when the attached process ends in python < 3.13).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    from multiprocessing import resource_tracker
+    with _SHARED_MEMORY_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _geotensor_from_buffer(buffer:Any, dtype:np.dtype, shape:Tuple[int, ...], order:str,
+                           transform:rasterio.Affine, crs:Any, fill_value_default:Any) -> 'GeoTensor':
+    """ Rebuilds a GeoTensor pickled with `GeoTensor.__reduce_ex__` (without copying the buffer) """
+    values = np.frombuffer(buffer, dtype=dtype).reshape(shape, order=order)
+    return GeoTensor(values, transform=transform, crs=crs, fill_value_default=fill_value_default)
 
 
-class GeoTensor:
+class GeoTensor(NDArrayOperatorsMixin):
     """
         This class is a wrapper around a numpy or torch tensor with geospatial information.
         It can store 2D, 3D or 4D tensors. The last two dimensions are the spatial dimensions.
 
+        GeoTensors support the numpy ufuncs, arithmetic operators (also reflected and in-place) and numpy
+        functions (e.g. `np.where`) keeping the georreference. Operations between GeoTensors require the same
+        georreference. As with numpy arrays, comparisons (`==`, `<`, ...) are elementwise and the truth value of
+        a GeoTensor is ambiguous (`bool(gt)` raises `ValueError`; use `np.any` or `np.all`). In-place operators
+        follow the numpy casting rules: `gt += 0.5` raises `UFuncTypeError` if `gt` is an integer GeoTensor
+        (use `gt = gt + 0.5`).
+
         Args:
             values (Tensor): numpy or torch tensor (2D, 3D or 4D).
             transform (rasterio.Affine): affine geospatial transform
@@ -104,6 +212,7 @@ class GeoTensor:
         return dims
     
     def to_json(self) -> Dict[str, Any]:
+        """ Dict with the values as nested lists. Use `to_bytes` for a compact binary serialisation. """
         return {
             "values": self.values.tolist(),
             "transform": [self.transform.a,self.transform.b,self.transform.c, 
@@ -119,6 +228,270 @@ class GeoTensor:
                    json["crs"], 
                    json["fill_value_default"])
 
+    def to_file(self, fileobj:Union[str, io.IOBase], compression:Optional[str]=None, level:Optional[int]=None) -> None:
+        """
+        Writes the GeoTensor in binary format (see `to_bytes`) to a path or a binary file object. The values are
+        written in chunks of `SERIALIZATION_CHUNK_SIZE` bytes so the file object does not need to be seekable
+        (e.g. a socket or a pipe) and several GeoTensors can be written one after the other.
+
+        Args:
+            fileobj: path or binary file object opened for writing.
+            compression: None, "zlib" or "zstd" (requires the `zstandard` package).
+            level: compression level. Defaults to the default level of the codec.
+        """
+        if isinstance(fileobj, str):
+            with open(fileobj, "wb") as fh:
+                return self.to_file(fh, compression=compression, level=level)
+
+        assert compression in SERIALIZATION_COMPRESSIONS, f"compression must be one of {SERIALIZATION_COMPRESSIONS} found {compression}"
+        values = np.ascontiguousarray(np.asarray(self.values))
+        fill_value_default = self.fill_value_default
+        if isinstance(fill_value_default, np.generic):
+            fill_value_default = fill_value_default.item()
+        header = json.dumps({
+            "transform": [self.transform.a, self.transform.b, self.transform.c,
+                          self.transform.d, self.transform.e, self.transform.f],
+            "crs": None if self.crs is None else str(self.crs),
+            "fill_value_default": fill_value_default,
+            "dtype": values.dtype.str,
+            "shape": list(values.shape),
+            "compression": compression
+        }).encode("utf-8")
+        fileobj.write(SERIALIZATION_MAGIC + struct.pack("<I", len(header)) + header)
+
+        compressor = _compressor(compression, level)
+        buffer = memoryview(values.reshape(-1)).cast("B")
+
+        def write_frame(data:bytes) -> None:
+            if len(data) > 0:
+                fileobj.write(struct.pack("<Q", len(data)))
+                fileobj.write(data)
+
+        for start in range(0, len(buffer), SERIALIZATION_CHUNK_SIZE):
+            chunk = buffer[start:(start + SERIALIZATION_CHUNK_SIZE)]
+            write_frame(chunk if compressor is None else compressor.compress(chunk))
+        if compressor is not None:
+            write_frame(compressor.flush())
+        fileobj.write(struct.pack("<Q", 0))
+
+    @classmethod
+    def from_file(cls, fileobj:Union[str, io.IOBase]) -> '__class__':
+        """
+        Reads a GeoTensor written with `to_file` (or `to_bytes`) from a path or a binary file object. Uncompressed
+        values are read directly into the output array.
+
+        Args:
+            fileobj: path or binary file object opened for reading.
+
+        Returns:
+            GeoTensor
+        """
+        if isinstance(fileobj, str):
+            with open(fileobj, "rb") as fh:
+                return cls.from_file(fh)
+
+        def read_exact(n:int) -> bytes:
+            data = fileobj.read(n)
+            if len(data) != n:
+                raise ValueError("Unexpected end of the stream reading a GeoTensor")
+            return data
+
+        magic = read_exact(len(SERIALIZATION_MAGIC))
+        if magic != SERIALIZATION_MAGIC:
+            raise ValueError(f"Not a serialised GeoTensor. Unexpected magic {magic}")
+        header_length, = struct.unpack("<I", read_exact(4))
+        header = json.loads(read_exact(header_length).decode("utf-8"))
+
+        values = np.empty(header["shape"], dtype=np.dtype(header["dtype"]))
+        buffer = memoryview(values.reshape(-1)).cast("B")
+        decompressor = _decompressor(header["compression"])
+        offset = 0
+        while True:
+            frame_length, = struct.unpack("<Q", read_exact(8))
+            if frame_length == 0:
+                break
+            if decompressor is None:
+                target = buffer[offset:(offset + frame_length)]
+                if len(target) != frame_length:
+                    raise ValueError("Serialised values larger than the shape of the GeoTensor")
+                read = 0
+                while read < frame_length:
+                    n = fileobj.readinto(target[read:])
+                    if not n:
+                        raise ValueError("Unexpected end of the stream reading a GeoTensor")
+                    read += n
+                offset += frame_length
+            else:
+                data = decompressor.decompress(read_exact(frame_length))
+                buffer[offset:(offset + len(data))] = data
+                offset += len(data)
+
+        if offset != len(buffer):
+            raise ValueError(f"Expected {len(buffer)} bytes of values found {offset}")
+
+        return cls(values, rasterio.Affine(*header["transform"]), header["crs"], header["fill_value_default"])
+
+    def to_bytes(self, compression:Optional[str]=None, level:Optional[int]=None) -> bytes:
+        """
+        Serialises the GeoTensor in a compact binary format: a JSON header with the transform, crs,
+        fill_value_default, dtype and shape followed by the raw (or compressed) values.
+
+        Args:
+            compression: None, "zlib" or "zstd" (requires the `zstandard` package).
+            level: compression level. Defaults to the default level of the codec.
+
+        Returns:
+            bytes. Use `GeoTensor.from_bytes` to deserialise them.
+
+        Examples:
+            >>> gt = GeoTensor(np.random.rand(4, 512, 512).astype(np.float32), transform, crs)
+            >>> data = gt.to_bytes(compression="zlib")
+            >>> gt2 = GeoTensor.from_bytes(data)
+        """
+        fileobj = io.BytesIO()
+        self.to_file(fileobj, compression=compression, level=level)
+        return fileobj.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data:Union[bytes, bytearray, memoryview]) -> '__class__':
+        """ Deserialises a GeoTensor serialised with `to_bytes` """
+        return cls.from_file(io.BytesIO(data))
+
+    def __reduce_ex__(self, protocol:int) -> Any:
+        """
+        Pickles numpy values with protocol 5 as a `pickle.PickleBuffer`: with a `buffer_callback` the values are
+        transferred out-of-band without copies (e.g. `multiprocessing` with shared memory or Ray workers).
+        """
+        values = self.values
+        if (protocol < 5) or not isinstance(values, np.ndarray) or (values.dtype == object):
+            return super().__reduce_ex__(protocol)
+
+        values = np.asarray(values)
+        order = "F" if (values.flags.f_contiguous and not values.flags.c_contiguous) else "C"
+        if not (values.flags.c_contiguous or values.flags.f_contiguous):
+            values = np.ascontiguousarray(values)
+        state = {k: v for k, v in vars(self).items() if k not in ("values", "transform", "crs", "fill_value_default")}
+        return (_geotensor_from_buffer,
+                (pickle.PickleBuffer(values), values.dtype, values.shape, order, self.transform, self.crs,
+                 self.fill_value_default),
+                state or None)
+
+    def to_shared(self) -> 'SharedGeoTensor':
+        """
+        Copies the GeoTensor to a new `multiprocessing.shared_memory` block. Other processes can attach to the
+        same values without copies with `GeoTensor.from_shared(shared.handle)` (or receiving the pickled
+        `SharedGeoTensor`, which only pickles its handle) and write to them (e.g. disjoint windows with
+        `write_from_window`).
+
+        The returned object owns the block: call `close()` and `unlink()` (or use it as a context manager) to
+        release it.
+
+        Returns:
+            SharedGeoTensor backed by the shared memory block.
+
+        Examples:
+            >>> with gt.to_shared() as shared:
+            >>>     with ProcessPoolExecutor() as executor:
+            >>>         list(executor.map(process_window, [shared.handle] * len(windows), windows))
+            >>>     result = shared.copy() # in process memory
+        """
+        values = np.asarray(self.values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        handle = SharedHandle(block.name, values.shape, values.dtype.str, self.transform, self.crs,
+                              self.fill_value_default)
+        shared = SharedGeoTensor(block, handle, owner=True)
+        shared.values[...] = values
+        return shared
+
+    @staticmethod
+    def from_shared(handle:'SharedHandle') -> 'SharedGeoTensor':
+        """
+        Attaches to a GeoTensor in shared memory created with `to_shared` (typically in another process).
+        Call `close()` (or use it as a context manager) to release the mapping; the block is not destroyed.
+
+        Args:
+            handle: `SharedGeoTensor.handle` of the shared GeoTensor.
+
+        Returns:
+            SharedGeoTensor backed by the shared memory block.
+        """
+        return SharedGeoTensor(_attach_shared_memory(handle.name), handle, owner=False)
+
+    @classmethod
+    def empty_on_disk(cls, path:str, shape:Tuple[int, ...], dtype:Any, transform:rasterio.Affine, crs:Any,
+                      fill_value_default:Optional[Union[int, float]]=0) -> '__class__':
+        """
+        Creates a GeoTensor backed by a new local GeoTIFF mapped in memory (`np.memmap`). The GeoTIFF is
+        uncompressed and striped so its pixels are contiguous in the file; it is created filled with
+        `fill_value_default` (its nodata value). Products larger than the memory can be assembled incrementally
+        with `write_from_window` (or as output of `mosaic.spatial_mosaic(..., out=...)`): the OS writes the
+        changes to the file and only the pages in use are resident in memory. `read_from_window` and `isel`
+        return views of the file and `save.save_cog` saves it window by window.
+
+        The file is a valid GeoTIFF: it can be read with `RasterioReader` or reopened with `open_on_disk`.
+
+        Args:
+            path: local path of the GeoTIFF to create.
+            shape: shape of the GeoTensor `(H, W)` or `(C, H, W)`.
+            dtype: data type of the values.
+            transform: affine geospatial transform
+            crs: coordinate reference system
+            fill_value_default: nodata value of the GeoTIFF. The values are initialized with it (0 if None).
+
+        Returns:
+            GeoTensor whose values are a `np.memmap` of the file.
+
+        Examples:
+            >>> out = GeoTensor.empty_on_disk("/scratch/mosaic.tif", (3, 100_000, 100_000), "uint16",
+            >>>                               transform, "EPSG:32630")
+            >>> for window, data in blocks:
+            >>>     out.write_from_window(data, window)
+        """
+        assert len(shape) in (2, 3), f"Expected 2d or 3d shape to store as GeoTIFF found {shape}"
+        dtype = np.dtype(dtype)
+        assert dtype != bool, "Boolean data can't be stored as GeoTIFF"
+        count = shape[0] if len(shape) == 3 else 1
+        height, width = shape[-2:]
+        rows_per_strip = int(min(height, max(1, ON_DISK_STRIP_SIZE // (width * dtype.itemsize))))
+        profile = {"driver": "GTiff", "count": count, "height": height, "width": width, "dtype": dtype.name,
+                   "crs": crs, "transform": transform, "nodata": fill_value_default, "interleave": "band",
+                   "tiled": False, "blockysize": rows_per_strip, "BIGTIFF": "IF_SAFER"}
+
+        # GDAL writes the strips (filled with nodata) when the dataset is closed
+        with rasterio.open(path, "w", **profile):
+            pass
+
+        gt = cls.open_on_disk(path, mode="r+")
+        if len(shape) == 2:
+            gt.values = gt.values[0]
+        return gt
+
+    @classmethod
+    def open_on_disk(cls, path:str, mode:str="r+") -> '__class__':
+        """
+        Opens a local uncompressed GeoTIFF (e.g. created with `empty_on_disk`) as a GeoTensor backed by
+        a `np.memmap` of the file.
+
+        Args:
+            path: local path of the GeoTIFF. Its bands must be stored contiguously in the file.
+            mode: mode of the memory map: "r+" (changes are written to the file), "r" (read only) or "c"
+                (copy-on-write).
+
+        Returns:
+            GeoTensor `(C, H, W)` whose values are a `np.memmap` of the file.
+        """
+        from georeader import tiff_memmap
+        tiff = tiff_memmap.open_tiff_memmap(path)
+        assert tiff is not None, f"File {path} can't be memory mapped (see tiff_memmap.open_tiff_memmap)"
+        strides_contiguous = tuple(np.cumprod((1,) + tiff.shape[:0:-1])[::-1] * tiff.dtype.itemsize)
+        assert (not tiff.tiled) and all((st == st_c) or (n == 1) for n, st, st_c in zip(tiff.shape, tiff.strides,
+                                                                                       strides_contiguous)), \
+            f"Pixels of {path} are not contiguous in the file. Expected an striped GeoTIFF with band interleaving"
+
+        values = np.memmap(path, dtype=tiff.dtype, mode=mode, offset=tiff.offset, shape=tiff.shape)
+        with rasterio.open(path) as src:
+            return cls(values, transform=src.transform, crs=src.crs, fill_value_default=src.nodata)
+
     @property
     def shape(self) -> Tuple:
         return tuple(self.values.shape)
@@ -167,6 +540,11 @@ class GeoTensor:
     def load(self) -> '__class__':
         return self
 
+    def lazy(self) -> Any:
+        """ Returns a `lazy.LazyExpression` to compute band math window by window (see `georeader.lazy`) """
+        from georeader import lazy
+        return lazy.lazy(self)
+
     def __copy__(self) -> '__class__':
         return GeoTensor(self.values.copy(), self.transform, self.crs, self.fill_value_default)
 
@@ -186,114 +564,101 @@ class GeoTensor:
         """
         return self.transform.almost_equals(other.transform, precision=precision) and window_utils.compare_crs(self.crs, other.crs) and (self.shape[-2:] == other.shape[-2:])
     
-    def __add__(self, other:Union[numbers.Number,'__class__']) -> '__class__':
-        """ 
-        Add two GeoTensors. The georeferencing must match.
+    # The comparison operators are elementwise but GeoTensors remain hashable by identity
+    __hash__ = object.__hash__
 
-        Args:
-            other (GeoTensor): GeoTensor to add.
-
-        Raises:
-            ValueError: if the georeferencing does not match.
-            TypeError: if other is not a GeoTensor.
+    def __bool__(self) -> bool:
+        raise ValueError("The truth value of a GeoTensor is ambiguous. Use np.any(gt) or np.all(gt)")
 
-        Returns:
-            GeoTensor: GeoTensor with the result of the addition.
+    def _check_same_extent(self, other:'__class__', operation:str) -> None:
+        if (other is self) or ((other.transform == self.transform) and (other.crs is self.crs) and
+                               (other.shape[-2:] == self.shape[-2:])):
+            return
+        if not self.same_extent(other):
+            raise ValueError(f"GeoTensor georref must match for {operation}. "
+                             "Use `read.read_reproject_like(other, self)` to "
+                             "to reproject `other` to `self` georreferencing.")
+
+    def _unwrap(self, obj:Any, operation:str) -> Any:
+        """ Replaces the GeoTensors in `obj` (possibly nested in lists, tuples or dicts) by their values """
+        if isinstance(obj, GeoTensor):
+            self._check_same_extent(obj, operation)
+            return obj.values
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self._unwrap(o, operation) for o in obj)
+        if isinstance(obj, dict):
+            return {k: self._unwrap(v, operation) for k, v in obj.items()}
+        return obj
+
+    def _wrap(self, result:Any) -> Any:
+        """ Wraps the arrays of `result` with the same spatial shape as `self` in GeoTensors with its georreference """
+        if isinstance(result, tuple):
+            return tuple(self._wrap(r) for r in result)
+        if isinstance(result, list):
+            return [self._wrap(r) for r in result]
+        if (isinstance(result, np.ndarray) or (torch_installed and isinstance(result, torch.Tensor))) and \
+                (2 <= result.ndim <= 4) and (tuple(result.shape[-2:]) == self.shape[-2:]):
+            return GeoTensor(result, transform=self.transform, crs=self.crs,
+                             fill_value_default=self.fill_value_default)
+        return result
+
+    def __array__(self, dtype:Any=None, copy:Optional[bool]=None) -> np.ndarray:
+        if copy:
+            return np.array(self.values, dtype=dtype, copy=True)
+        return np.asarray(self.values, dtype=dtype)
+
+    def __array_ufunc__(self, ufunc:np.ufunc, method:str, *inputs:Any, **kwargs:Any) -> Any:
         """
-        if isinstance(other, GeoTensor):
-            if self.same_extent(other):
-                other =  other.values
-            else:
-                raise ValueError("GeoTensor georref must match for addition. "
-                                 "Use `read.read_reproject_like(other, self)` to "
-                                 "to reproject `other` to `self` georreferencing.")
-        
-        result_values = self.values + other
+        Applies numpy ufuncs (and the arithmetic, comparison, reflected and in-place operators) to the values of the
+        GeoTensors. The georeferencing of all the GeoTensors must match. Results with the spatial shape of the
+        GeoTensor keep its georreference; if `out` is given the result is written in place.
 
-        return GeoTensor(result_values, transform=self.transform, crs=self.crs,
-                         fill_value_default=self.fill_value_default)
-    
-    def __sub__(self, other:Union[numbers.Number,'__class__']) -> '__class__':
+        Examples:
+            >>> ndvi = (b8 - b4) / (b8 + b4) # GeoTensor
+            >>> np.sqrt(ndvi, out=ndvi) # in place
+            >>> ndvi += 1
         """
-        Substract two GeoTensors. The georeferencing must match.
-
-        Args:
-            other (GeoTensor): GeoTensor to add.
+        if any(getattr(i, "is_lazy", False) for i in inputs):
+            return NotImplemented
+
+        operation = ufunc.__name__
+        inputs = self._unwrap(inputs, operation)
+        out = kwargs.get("out", None)
+        if out is not None:
+            kwargs["out"] = self._unwrap(out, operation)
+
+        if torch_installed and (method == "__call__") and any(isinstance(i, torch.Tensor) for i in inputs):
+            torch_func = getattr(torch, operation, None)
+            if torch_func is None:
+                return NotImplemented
+            result = torch_func(*inputs, **kwargs)
+        else:
+            result = getattr(ufunc, method)(*inputs, **kwargs)
 
-        Raises:
-            ValueError: if the georeferencing does not match.
-            TypeError: if other is not a GeoTensor.
-        
-        Returns:
-            GeoTensor: GeoTensor with the result of the substraction.
-            
-        """
-        if isinstance(other, GeoTensor):
-            if self.same_extent(other):
-                other =  other.values
-            else:
-                raise ValueError("GeoTensor georref must match for substraction. "
-                                 "Use `read.read_reproject_like(other, self)` to "
-                                 "to reproject `other` to `self` georreferencing.")
-        
-        result_values = self.values - other
+        if method == "at":
+            return None
 
-        return GeoTensor(result_values, transform=self.transform, crs=self.crs,
-                         fill_value_default=self.fill_value_default)
-    
-    def __mul__(self, other:Union[numbers.Number,'__class__']) -> '__class__':
-        """
-        Multiply two GeoTensors. The georeferencing must match.
+        if out is not None:
+            # Return the objects given in `out` (e.g. the same GeoTensor for in-place operators)
+            return out[0] if len(out) == 1 else out
 
-        Args:
-            other (GeoTensor): GeoTensor to add.
+        return self._wrap(result)
 
-        Raises:
-            ValueError: if the georeferencing does not match.
-            TypeError: if other is not a GeoTensor.
-        
-        Returns:
-            GeoTensor: GeoTensor with the result of the multiplication.
+    def __array_function__(self, func:Any, types:Tuple[type, ...], args:Tuple[Any, ...],
+                           kwargs:Dict[str, Any]) -> Any:
         """
-        if isinstance(other, GeoTensor):
-            if self.same_extent(other):
-                other =  other.values
-            else:
-                raise ValueError("GeoTensor georref must match for multiplication. "
-                                 "Use `read.read_reproject_like(other, self)` to "
-                                 "to reproject `other` to `self` georreferencing.")
-        
-        result_values = self.values * other
-
-        return GeoTensor(result_values, transform=self.transform, crs=self.crs,
-                         fill_value_default=self.fill_value_default)
-    
-    def __truediv__(self, other:Union[ArrayLike,'__class__']) -> '__class__':
+        Applies numpy functions (e.g. `np.where`, `np.mean`, `np.stack`) to the values of the GeoTensors. Results
+        with the spatial shape of the GeoTensor keep its georreference except for functions that reorder the pixels
+        (e.g. `np.flip`, `np.transpose`) which return numpy arrays.
         """
-        Divide two GeoTensors. The georeferencing must match.
+        if any(getattr(t, "is_lazy", False) for t in types):
+            return NotImplemented
 
-        Args:
-            other (GeoTensor): GeoTensor to add.
-
-        Raises:
-            ValueError: if the georeferencing does not match.
-            TypeError: if other is not a GeoTensor.
-        
-        Returns:
-            GeoTensor: GeoTensor with the result of the division.
-        """
-        if isinstance(other, GeoTensor):
-            if self.same_extent(other):
-                other =  other.values
-            else:
-                raise ValueError("GeoTensor georref must match for division. "
-                                 "Use `read.read_reproject_like(other, self)` to "
-                                 "to reproject `other` to `self` georreferencing.")
-        
-        result_values = self.values / other
-
-        return GeoTensor(result_values, transform=self.transform, crs=self.crs,
-                         fill_value_default=self.fill_value_default)
+        operation = func.__name__
+        result = func(*self._unwrap(args, operation), **self._unwrap(kwargs, operation))
+        if func in ARRAY_FUNCTIONS_REORDER:
+            return result
+        return self._wrap(result)
 
     def __setitem__(self, index: np.ndarray, value: Union[np.ndarray, numbers.Number]) -> None:
         """
@@ -401,7 +766,8 @@ class GeoTensor:
         return tuple(slice_list)
 
     def footprint(self, crs:Optional[str]=None) -> Polygon:
-        """Returns the footprint of the GeoTensor as a Polygon.
+        """Returns the footprint of the GeoTensor as a Polygon. Footprints are memoised by extent and crs
+        (see `window_utils.footprint`).
 
         Args:
             crs (Optional[str], optional): Coordinate reference system. Defaults to None.
@@ -413,12 +779,7 @@ class GeoTensor:
             >>> gt = GeoTensor(np.random.rand(3, 100, 100), transform, crs)
             >>> gt.footprint(crs="EPSG:4326") # returns a Polygon in WGS84
         """
-        pol = window_utils.window_polygon(rasterio.windows.Window(row_off=0, col_off=0, height=self.shape[-2], width=self.shape[-1]),
-                                          self.transform)
-        if (crs is None) or window_utils.compare_crs(self.crs, crs):
-            return pol
-
-        return window_utils.polygon_to_crs(pol, self.crs, crs)
+        return window_utils.footprint(self.transform, self.shape[-2:], self.crs, crs)
     
     def valid_footprint(self, crs:Optional[str]=None, method:str="all") -> Union[MultiPolygon, Polygon]:
         """
@@ -529,7 +890,7 @@ class GeoTensor:
     def resize(self, output_shape:Tuple[int,int],
                anti_aliasing:bool=True, anti_aliasing_sigma:Optional[Union[float,np.ndarray]]=None,
                interpolation:Optional[str]="bilinear",
-               mode_pad:str="constant")-> '__class__':
+               mode_pad:str="constant", max_workers:int=1)-> '__class__':
         """
         Resize the geotensor to match a certain size output_shape. This function works with GeoTensors of 2D, 3D and 4D.
         The geoinformation of the output tensor is changed accordingly.
@@ -540,9 +901,17 @@ class GeoTensor:
             anti_aliasing_sigma:  anti_aliasing_sigma : {float}, optional
                 Standard deviation for Gaussian filtering used when anti-aliasing.
                 By default, this value is chosen as (s - 1) / 2 where s is the
-                downsampling factor, where s > 1
-            interpolation: – algorithm used for resizing: 'nearest' | 'bilinear' | ‘bicubic’
+                downsampling factor, where s > 1. It can be an array with one value for each band
+                (and time step if the GeoTensor is 4D).
+            interpolation: – algorithm used for resizing: 'nearest' | 'bilinear' | ‘bicubic’ or one of the block
+                reductions 'mean' | 'mode' | 'min' | 'max'. The block reductions require `output_shape` to
+                be an integer factor of the spatial shape (or a multiple of it when upsampling, then pixels are
+                replicated). They ignore pixels equal to `fill_value_default` and do not apply anti-aliasing.
+                With 'nearest' and integer factors the output is sliced (or replicated) without
+                interpolation if no anti-aliasing is applied.
             mode_pad: mode pad for resize function
+            max_workers: number of threads to apply the anti-aliasing filter (the bands are split in chunks).
+                Defaults to 1.
 
         Returns:
              resized GeoTensor
@@ -566,6 +935,28 @@ class GeoTensor:
         transform_scale = rasterio.Affine.scale(resolution_dst[0]/resolution_or[0], resolution_dst[1]/resolution_or[1])
         transform = self.transform * transform_scale
 
+        # Integer factors: block reductions (downsampling) or replication of the pixels (upsampling)
+        factors_down = [spatial_shape[i] // output_shape[i] if spatial_shape[i] % output_shape[i] == 0 else None
+                        for i in range(2)]
+        factors_up = [output_shape[i] // spatial_shape[i] if output_shape[i] % spatial_shape[i] == 0 else None
+                      for i in range(2)]
+        downsampling = all(f is not None for f in factors_down)
+        upsampling = all(f is not None for f in factors_up)
+        if interpolation in BLOCK_REDUCTIONS:
+            assert downsampling or upsampling, \
+                f"Interpolation {interpolation} requires integer factors between {spatial_shape} and {output_shape}"
+
+        fast_nearest = (interpolation == "nearest") and (upsampling or (downsampling and not anti_aliasing))
+        if ((interpolation in BLOCK_REDUCTIONS) or fast_nearest) and isinstance(self.values, np.ndarray):
+            if downsampling:
+                from georeader.read import _block_reduce
+                output_tensor = _block_reduce(self.values, factors_down, interpolation,
+                                              fill_value=self.fill_value_default)
+            else:
+                output_tensor = self.values.repeat(factors_up[0], axis=-2).repeat(factors_up[1], axis=-1)
+            return GeoTensor(output_tensor, transform=transform, crs=self.crs,
+                             fill_value_default=self.fill_value_default)
+
         resize_kornia = False
         if torch_installed:
             if isinstance(self.values, torch.Tensor):
@@ -577,33 +968,31 @@ class GeoTensor:
             raise NotImplementedError(f"Not implemented for torch Tensors")
         else:
             from skimage.transform import resize
+            from skimage.util import img_as_float
+            from georeader.read import _anti_aliasing_filter
             # https://scikit-image.org/docs/stable/api/skimage.transform.html#skimage.transform.resize
+            order = ORDERS[interpolation]
+            values = self.values
+            if order > 0:
+                values = img_as_float(values)
+            values_input = values
+
+            # Anti-aliasing of all the bands in one call (same filter as skimage.transform.resize)
+            if anti_aliasing:
+                if anti_aliasing_sigma is None:
+                    factors = np.divide(spatial_shape, output_shape)
+                    anti_aliasing_sigma = np.broadcast_to(np.maximum(0, (factors - 1) / 2), input_shape[:-2] + (2,))
+                values = _anti_aliasing_filter(values, anti_aliasing_sigma, mode=NDIMAGE_MODES[mode_pad],
+                                               cval=self.fill_value_default, max_workers=max_workers)
+
             output_tensor = np.ndarray(input_shape[:-2]+output_shape, dtype=self.dtype)
-            if len(input_shape) == 4:
-                for i,j in product(range(0,input_shape[0]), range(0, input_shape[1])):
-                    if (not anti_aliasing) or (anti_aliasing_sigma is None) or isinstance(anti_aliasing_sigma, numbers.Number):
-                        anti_aliasing_sigma_iter = anti_aliasing_sigma
-                    else:
-                        anti_aliasing_sigma_iter = anti_aliasing_sigma[i, j]
-                    output_tensor[i,j] = resize(self.values[i,j], output_shape, order=ORDERS[interpolation],
-                                                anti_aliasing=anti_aliasing, preserve_range=False,
-                                                cval=self.fill_value_default,mode=mode_pad,
-                                                anti_aliasing_sigma=anti_aliasing_sigma_iter)
-            elif len(input_shape) == 3:
-                for i in range(0,input_shape[0]):
-                    if (not anti_aliasing) or (anti_aliasing_sigma is None) or isinstance(anti_aliasing_sigma, numbers.Number):
-                        anti_aliasing_sigma_iter = anti_aliasing_sigma
-                    else:
-                        anti_aliasing_sigma_iter = anti_aliasing_sigma[i]
-                    output_tensor[i] = resize(self.values[i], output_shape, order=ORDERS[interpolation],
-                                              anti_aliasing=anti_aliasing, preserve_range=False,
-                                              cval=self.fill_value_default,mode=mode_pad,
-                                              anti_aliasing_sigma=anti_aliasing_sigma_iter)
-            else:
-                output_tensor[...] = resize(self.values, output_shape, order=ORDERS[interpolation],
-                                            anti_aliasing=anti_aliasing, preserve_range=False,
-                                            cval=self.fill_value_default,mode=mode_pad,
-                                            anti_aliasing_sigma=anti_aliasing_sigma)
+            for idx in np.ndindex(input_shape[:-2]):
+                output_iter = resize(values[idx], output_shape, order=order,
+                                     anti_aliasing=False, preserve_range=False,
+                                     cval=self.fill_value_default, mode=mode_pad, clip=False)
+                # Clip to the range of the input before anti-aliasing (as skimage.transform.resize)
+                output_tensor[idx] = _clip_resize_output(values_input[idx], output_iter, mode_pad,
+                                                         self.fill_value_default)
 
         return GeoTensor(output_tensor, transform=transform, crs=self.crs,
                          fill_value_default=self.fill_value_default)
@@ -614,7 +1003,7 @@ class GeoTensor:
         object it crops the data to fit the object.
 
         Args:
-            data: Tensor to write. Expected: spatial dimensions `window.width`, `window.height`. Rest: same as `self`
+            data: Tensor to write. Expected: spatial dimensions `window.height`, `window.width`. Rest: same as `self`
             window: Window object that specifies the spatial location to write the data
         
         Examples:
@@ -629,7 +1018,7 @@ class GeoTensor:
         if not rasterio.windows.intersect(window, window_data):
             return
 
-        assert data.shape[-2:] == (window.width, window.height), f"window {window} has different shape than data {data.shape}"
+        assert tuple(data.shape[-2:]) == (window.height, window.width), f"window {window} has different shape than data {data.shape}"
         assert data.shape[:-2] == self.shape[:-2], f"Dimension of data in non-spatial channels found {data.shape} expected: {self.shape}"
 
         slice_dict, pad_width = window_utils.get_slice_pad(window_data, window)
@@ -677,6 +1066,94 @@ class GeoTensor:
             return GeoTensor(self.values[slices_], transform_current, self.crs,
                              self.fill_value_default)
 
+    def iter_blocks(self, window_size:Optional[Tuple[int, int]]=None, overlap:Union[int, Tuple[int, int]]=0,
+                    prefetch:int=0, boundless:bool=True) -> Iterator[Tuple[rasterio.windows.Window, '__class__']]:
+        """
+        Iterates over the GeoTensor in windows of `window_size` yielding `(window, GeoTensor)` pairs.
+        See `read.iter_blocks`.
+
+        Args:
+            window_size: `(height, width)` of the windows. Defaults to `(read.SIZE_DEFAULT, read.SIZE_DEFAULT)`.
+            overlap: number of pixels of overlap between consecutive windows (int or `(rows, cols)`).
+            prefetch: number of windows sliced in advance in a background thread pool. Defaults to 0.
+            boundless: if `True` windows that go beyond the GeoTensor are padded with `self.fill_value_default`.
+        """
+        from georeader.read import iter_blocks
+        return iter_blocks(self, window_size=window_size, overlap=overlap, prefetch=prefetch, boundless=boundless)
+
+
+class SharedHandle:
+    """
+    Picklable reference to a GeoTensor in shared memory (see `GeoTensor.to_shared`).
+
+    Args:
+        name: name of the `multiprocessing.shared_memory.SharedMemory` block.
+        shape: shape of the values.
+        dtype: dtype of the values.
+        transform: affine geospatial transform
+        crs: coordinate reference system
+        fill_value_default: fill value of the GeoTensor.
+    """
+    def __init__(self, name:str, shape:Tuple[int, ...], dtype:str, transform:rasterio.Affine, crs:Any,
+                 fill_value_default:Any):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.transform = transform
+        self.crs = crs
+        self.fill_value_default = fill_value_default
+
+    def __repr__(self) -> str:
+        return f"SharedHandle(name={self.name}, shape={self.shape}, dtype={self.dtype})"
+
+
+class SharedGeoTensor(GeoTensor):
+    """
+    GeoTensor whose values live in a `multiprocessing.shared_memory` block. Create it with `GeoTensor.to_shared`
+    (owner of the block) or `GeoTensor.from_shared` (attached to an existing block). Pickling it only pickles the
+    handle: the unpickled object is attached to the same block.
+
+    Args:
+        block: shared memory block with the values.
+        handle: handle of the block.
+        owner: if True `__exit__` also destroys (unlinks) the block.
+    """
+    def __init__(self, block:shared_memory.SharedMemory, handle:SharedHandle, owner:bool):
+        values = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf)
+        super().__init__(values, transform=handle.transform, crs=handle.crs,
+                         fill_value_default=handle.fill_value_default)
+        self.handle = handle
+        self.owner = owner
+        self.closed = False
+        self._block = block
+
+    def close(self) -> None:
+        """
+        Releases the mapping of the block in this process. The values can't be used after closing (and arrays
+        that are views of them must be deleted before).
+        """
+        if self.closed:
+            return
+        self.values = None
+        self._block.close()
+        self.closed = True
+
+    def unlink(self) -> None:
+        """ Destroys the block (only the owner). Processes attached to it keep their mapping until they close it """
+        assert self.owner, "Only the owner (created with to_shared) can unlink the shared memory block"
+        self._block.unlink()
+
+    def __enter__(self) -> 'SharedGeoTensor':
+        return self
+
+    def __exit__(self, *args:Any) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def __reduce_ex__(self, protocol:int) -> Any:
+        return (GeoTensor.from_shared, (self.handle,))
+
 
 def stack(geotensors:List[GeoTensor]) -> GeoTensor:
     """
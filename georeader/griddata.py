@@ -2,7 +2,7 @@ import georeader
 from shapely.geometry import Polygon
 from georeader.abstract_reader import GeoData
 from scipy.interpolate import CloughTocher2DInterpolator
-from georeader.window_utils import polygon_to_crs, transform_to_resolution_dst
+from georeader.window_utils import polygon_to_crs, transform_to_resolution_dst, transform_coords
 from typing import Tuple, Union, Optional, Any
 import rasterio
 import rasterio.transform
@@ -200,9 +200,7 @@ def meshgrid(transform:rasterio.transform.Affine, width:int, height:int,
 
     if dst_crs is not None:
         assert source_crs is not None, "source_crs must be provided if dst_crs is provided"
-        xs, ys = rasterio.warp.transform(source_crs, dst_crs, xs.ravel(),ys.ravel())
-        xs = np.array(xs).reshape(height, width)
-        ys = np.array(ys).reshape(height, width)
+        xs, ys = transform_coords(source_crs, dst_crs, xs.reshape(height, width), ys.reshape(height, width))
 
     return xs, ys
 
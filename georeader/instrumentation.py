@@ -0,0 +1,281 @@
+"""
+Opt-in instrumentation of the reading, reprojection, mosaicking and saving functions.
+
+Within an `instrument()` context the calls to `RasterioReader.read`, `read.read_reproject`, `mosaic.spatial_mosaic`
+and `save._save_cog` record their wall time split by phase (e.g. "open", "read", "warp", "write"), the bytes
+of decoded data read, the number of datasets opened, the size of the output arrays and the number of GDAL HTTP
+requests. Records of all the threads of the process are aggregated in the active collectors, so reads submitted
+to thread pools are also accounted for. Outside an `instrument()` context recording is a no-op.
+
+The calls are aggregated by operation: "RasterioReader.read" (phases "open" and "read"), "read_reproject"
+("read", "cast", "plan" and "warp"), "spatial_mosaic" ("read" and "mosaic") and "save_cog" ("write", "upload" and, without
+the COG driver, "overviews" and "copy").
+
+Calls nest: the time of a `read_reproject` call includes the time of the `RasterioReader.read` calls it makes,
+which are also recorded as separate calls.
+
+HTTP request counts are taken from GDAL's network statistics (`CPL_VSIL_NETWORK_STATS_ENABLED`, enabled while
+there is an active `instrument()` context and restored afterwards) through the GDAL python bindings (`osgeo`).
+The counts are `None` if the bindings are not installed or if they are linked to a different GDAL library than
+rasterio (e.g. rasterio installed from a wheel, which bundles its own GDAL): the statistics of that library do not
+count the requests made by rasterio. These statistics are global to the process: under concurrency the per-call
+counts are approximate, the totals are not.
+
+Examples:
+    >>> from georeader import instrumentation
+    >>> from georeader.rasterio_reader import RasterioReader
+    >>> from georeader import read
+    >>> with instrumentation.instrument(callback=print) as stats:
+    ...     data = read.read_reproject(RasterioReader("path/to/cog.tif"), dst_crs="EPSG:4326",
+    ...                                bounds=bounds, resolution_dst_crs=0.001)
+    >>> stats.to_dict()["operations"]["read_reproject"]["phases"]
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+COUNTERS = ("bytes_read", "datasets_opened", "output_nbytes")
+
+NETWORK_STATS_OPTION = "CPL_VSIL_NETWORK_STATS_ENABLED"
+
+# Whether `osgeo.gdal` uses the same GDAL library as rasterio (None: not checked yet)
+_SAME_GDAL: Optional[bool] = None
+
+
+def _same_gdal(gdal:Any) -> bool:
+    """ Checks that `osgeo.gdal` and rasterio use the same GDAL library: options set by rasterio must be seen by gdal """
+    from rasterio._env import set_gdal_config, del_gdal_config
+    key = "GEOREADER_GDAL_PROBE"
+    value = f"{os.getpid()}-{threading.get_ident()}-{time.perf_counter_ns()}"
+    set_gdal_config(key, value)
+    try:
+        return gdal.GetConfigOption(key) == value
+    finally:
+        del_gdal_config(key)
+
+
+def _network_stats():
+    """
+    Returns the `osgeo.gdal` module if it supports network statistics and uses the same GDAL library as rasterio,
+    None otherwise
+    """
+    global _SAME_GDAL
+    try:
+        from osgeo import gdal
+    except ImportError:
+        return None
+    if not hasattr(gdal, "NetworkStatsGetAsSerializedJSON"):
+        return None
+    if _SAME_GDAL is None:
+        _SAME_GDAL = _same_gdal(gdal)
+    return gdal if _SAME_GDAL else None
+
+
+def _http_counts() -> Optional[Dict[str, int]]:
+    """ Returns the number of HTTP requests and the bytes downloaded by GDAL so far (None if not available) """
+    gdal = _network_stats()
+    if gdal is None:
+        return None
+    stats = json.loads(gdal.NetworkStatsGetAsSerializedJSON() or "{}")
+    methods = stats.get("methods", {})
+    return {"http_requests": sum(m.get("count", 0) for m in methods.values()),
+            "http_bytes": sum(m.get("downloaded_bytes", 0) for m in methods.values())}
+
+
+def nbytes(data:Any) -> int:
+    """ Returns the size in bytes of a numpy array or of the values of a GeoTensor """
+    return int(getattr(data, "values", data).nbytes)
+
+
+class CallRecord:
+    """
+    Record of one call of an instrumented function. Phases and counters can be updated from several threads
+    (the times of the phases of concurrent tasks add up).
+
+    Args:
+        operation: name of the function (e.g. "read_reproject").
+    """
+    def __init__(self, operation:str):
+        self.operation = operation
+        self.thread = threading.get_ident()
+        self.wall_time = 0.
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {c: 0 for c in COUNTERS}
+        self.http: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name:str) -> Iterator[None]:
+        """ Adds the wall time of the block to the phase `name` """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.) + elapsed
+
+    def add(self, **counters:int) -> None:
+        """ Increments the counters (`bytes_read`, `datasets_opened` or `output_nbytes`) """
+        with self._lock:
+            for k, v in counters.items():
+                assert k in self.counters, f"Unknown counter {k} expected one of {COUNTERS}"
+                self.counters[k] += int(v)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"operation": self.operation, "thread": self.thread, "wall_time": self.wall_time,
+               "phases": dict(self.phases)}
+        out.update(self.counters)
+        if self.http is not None:
+            out.update(self.http)
+        return out
+
+
+class _NullRecord:
+    """ Record used when there is no active instrumentation. It does nothing """
+    @contextmanager
+    def phase(self, name:str) -> Iterator[None]:
+        yield
+
+    def add(self, **counters:int) -> None:
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+class Instrumentation:
+    """
+    Thread-safe aggregation of the call records of the instrumented functions. Use `instrument()` to create one and
+    activate it.
+
+    Args:
+        callback: function called with the dict of each call record (see `CallRecord.to_dict`) when the call
+            finishes. It is called from the thread that made the call.
+        keep_records: if True the dicts of the call records are stored in `self.records`.
+    """
+    def __init__(self, callback:Optional[Callable[[Dict[str, Any]], None]]=None, keep_records:bool=False):
+        self.callback = callback
+        self.keep_records = keep_records
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, Any]] = {}
+
+    def _add(self, record:CallRecord) -> None:
+        record_dict = record.to_dict()
+        with self._lock:
+            op = self._operations.setdefault(record.operation, {"calls": 0, "wall_time": 0., "phases": {},
+                                                                **{c: 0 for c in COUNTERS}})
+            op["calls"] += 1
+            op["wall_time"] += record.wall_time
+            for name, t in record.phases.items():
+                op["phases"][name] = op["phases"].get(name, 0.) + t
+            for c in COUNTERS:
+                op[c] += record.counters[c]
+            if record.http is not None:
+                for k, v in record.http.items():
+                    op[k] = op.get(k, 0) + v
+            if self.keep_records:
+                self.records.append(record_dict)
+
+        if self.callback is not None:
+            self.callback(record_dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the aggregated statistics: `{"operations": {operation: {"calls", "wall_time", "phases",
+        "bytes_read", "datasets_opened", "output_nbytes", ["http_requests", "http_bytes"]}}}` and the call records
+        in `"records"` if `keep_records`.
+        """
+        with self._lock:
+            out = {"operations": {op: {**v, "phases": dict(v["phases"])} for op, v in self._operations.items()}}
+            if self.keep_records:
+                out["records"] = list(self.records)
+        return out
+
+    def clear(self) -> None:
+        """ Resets the aggregated statistics and the records """
+        with self._lock:
+            self._operations = {}
+            self.records = []
+
+
+_ACTIVE: List[Instrumentation] = []
+_ACTIVE_LOCK = threading.Lock()
+# Value of `NETWORK_STATS_OPTION` before the first active `instrument()` context (restored after the last one)
+_NETWORK_STATS_PREVIOUS: List[Optional[str]] = []
+
+
+@contextmanager
+def instrument(callback:Optional[Callable[[Dict[str, Any]], None]]=None,
+               keep_records:bool=False) -> Iterator[Instrumentation]:
+    """
+    Activates the instrumentation of the reading functions within the context. The records of all the threads of
+    the process are aggregated in the returned object. Contexts can be nested, each one receives the records of
+    the calls made while it is active.
+
+    Args:
+        callback: function called with the dict of each call record when the call finishes.
+        keep_records: if True the dicts of the call records are stored in the `records` attribute.
+
+    Returns:
+        `Instrumentation` object. Use its `to_dict()` method to export the statistics.
+    """
+    from rasterio._env import set_gdal_config, get_gdal_config, del_gdal_config
+    instrumentation = Instrumentation(callback=callback, keep_records=keep_records)
+    gdal = _network_stats()
+    with _ACTIVE_LOCK:
+        if (len(_ACTIVE) == 0) and (gdal is not None):
+            # Set in the GDAL library of rasterio (the same as the one of gdal, see `_network_stats`)
+            _NETWORK_STATS_PREVIOUS.append(get_gdal_config(NETWORK_STATS_OPTION, normalize=False))
+            set_gdal_config(NETWORK_STATS_OPTION, "YES")
+        _ACTIVE.append(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        with _ACTIVE_LOCK:
+            _ACTIVE.remove(instrumentation)
+            if (len(_ACTIVE) == 0) and (len(_NETWORK_STATS_PREVIOUS) > 0):
+                previous = _NETWORK_STATS_PREVIOUS.pop()
+                if previous is None:
+                    del_gdal_config(NETWORK_STATS_OPTION)
+                else:
+                    set_gdal_config(NETWORK_STATS_OPTION, previous)
+
+
+def is_active() -> bool:
+    """ Returns True if there is an active `instrument()` context """
+    return len(_ACTIVE) > 0
+
+
+@contextmanager
+def record(operation:str) -> Iterator[Any]:
+    """
+    Records the call of an instrumented function. Yields a `CallRecord` (or a no-op object if there is no active
+    instrumentation) to time the phases of the call and increment its counters.
+
+    Args:
+        operation: name of the function.
+    """
+    with _ACTIVE_LOCK:
+        active = list(_ACTIVE)
+
+    if len(active) == 0:
+        yield _NULL_RECORD
+        return
+
+    call_record = CallRecord(operation)
+    http_start = _http_counts()
+    start = time.perf_counter()
+    try:
+        yield call_record
+    finally:
+        call_record.wall_time = time.perf_counter() - start
+        if http_start is not None:
+            http_end = _http_counts()
+            call_record.http = {k: http_end[k] - http_start[k] for k in http_start}
+        for instrumentation in active:
+            instrumentation._add(call_record)
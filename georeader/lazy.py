@@ -0,0 +1,321 @@
+"""
+Lazy evaluation of band math on GeoTensors and readers.
+
+`GeoTensor.lazy()` (or `lazy.lazy(data)` for any GeoData, e.g. `RasterioReader` or `S2Image`) returns a
+`LazyExpression` that records the arithmetic, comparisons, numpy ufuncs and functions (e.g. `np.where`), `clip` and
+`astype` applied to it. Nothing is read or computed until the expression is evaluated with `compute`, `to_tiff` or
+`save_cog`: then the fused expression is evaluated window by window over the spatial domain, reading from the readers
+only the windows being computed. Only the output (and the temporaries of one window per thread) are held in memory.
+
+All the GeoData in an expression must have the same georreference (transform, crs and spatial shape). Operations
+must be computed independently for each pixel or along the non spatial dimensions (e.g. `np.mean(expr, axis=0)`).
+
+Examples:
+    >>> from georeader import lazy
+    >>> r = RasterioReader("path/to/s2.tif")
+    >>> b4, b8 = r.isel({"band": [3]}).lazy(), r.isel({"band": [7]}).lazy()
+    >>> ndvi = ((b8 - b4) / (b8 + b4)).clip(-1, 1).astype(np.float32)
+    >>> ndvi_gt = ndvi.compute(max_workers=4) # GeoTensor
+    >>> ndvi.save_cog("ndvi.tif") # streamed to disk window by window
+"""
+import itertools
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import rasterio
+import rasterio.windows
+from numpy.lib.mixins import NDArrayOperatorsMixin
+from georeader import window_utils
+from georeader.abstract_reader import GeoData
+from georeader.geotensor import GeoTensor
+from georeader.slices import create_windows
+
+WINDOW_SIZE_DEFAULT = (1024, 1024)
+
+
+def _is_geodata(obj:Any) -> bool:
+    return (not isinstance(obj, (np.ndarray, LazyExpression))) and all(hasattr(obj, a) for a in ("transform", "crs", "shape"))
+
+
+def _same_extent(a:GeoData, b:GeoData, precision:float=1e-3) -> bool:
+    return (a is b) or (a.transform.almost_equals(b.transform, precision=precision) and
+                        window_utils.compare_crs(a.crs, b.crs) and (tuple(a.shape[-2:]) == tuple(b.shape[-2:])))
+
+
+def _astype(values:np.ndarray, dtype:Any) -> np.ndarray:
+    return values.astype(dtype)
+
+
+def _clip(values:np.ndarray, a_min:Any, a_max:Any) -> np.ndarray:
+    return np.clip(values, a_min, a_max)
+
+
+class LazyExpression(NDArrayOperatorsMixin):
+    """
+    Node of a lazy expression over GeoData with the same georreference. Leaves hold a GeoData object, the other
+    nodes the function to apply to their (evaluated) arguments.
+
+    Args:
+        func: function of the node. None for leaves.
+        args: arguments of `func` (LazyExpressions, GeoData, arrays or scalars). For leaves a tuple with the GeoData.
+        kwargs: keyword arguments of `func`.
+
+    Raises:
+        ValueError: if the georreference of the GeoData in the expression does not match.
+    """
+    # GeoTensor defers the numpy operations with LazyExpressions to them
+    is_lazy = True
+
+    def __init__(self, func:Optional[Callable], args:Tuple[Any, ...], kwargs:Optional[Dict[str, Any]]=None):
+        self.func = func
+        self.args = tuple(args)
+        self.kwargs = {} if kwargs is None else kwargs
+
+        if func is None:
+            assert (len(self.args) == 1) and _is_geodata(self.args[0]), "Expected one GeoData for a leaf"
+            self.leaves = [self.args[0]]
+        else:
+            leaves = {}
+            for arg in itertools.chain(self.args, self.kwargs.values()):
+                for leaf in (arg.leaves if isinstance(arg, LazyExpression) else [arg] if _is_geodata(arg) else []):
+                    leaves.setdefault(id(leaf), leaf)
+            self.leaves = list(leaves.values())
+            assert len(self.leaves) > 0, "Expected at least one GeoData in the expression"
+
+        reference = self.leaves[0]
+        for leaf in self.leaves[1:]:
+            if not _same_extent(reference, leaf):
+                raise ValueError("GeoData georref must match in lazy expressions. "
+                                 "Use `read.read_reproject_like(other, self)` to "
+                                 "to reproject `other` to `self` georreferencing.")
+
+    @property
+    def transform(self) -> rasterio.Affine:
+        return self.leaves[0].transform
+
+    @property
+    def crs(self) -> Any:
+        return self.leaves[0].crs
+
+    @property
+    def fill_value_default(self) -> Any:
+        return getattr(self.leaves[0], "fill_value_default", None)
+
+    @property
+    def spatial_shape(self) -> Tuple[int, int]:
+        return tuple(self.leaves[0].shape[-2:])
+
+    def __array_ufunc__(self, ufunc:np.ufunc, method:str, *inputs:Any, **kwargs:Any) -> Any:
+        if (method != "__call__") or ("out" in kwargs):
+            return NotImplemented
+        return LazyExpression(ufunc, inputs, kwargs)
+
+    def __array_function__(self, func:Any, types:Tuple[type, ...], args:Tuple[Any, ...],
+                           kwargs:Dict[str, Any]) -> Any:
+        return LazyExpression(func, args, kwargs)
+
+    def clip(self, a_min:Any, a_max:Any) -> 'LazyExpression':
+        return LazyExpression(_clip, (self, a_min, a_max))
+
+    def astype(self, dtype:Any) -> 'LazyExpression':
+        return LazyExpression(_astype, (self, dtype))
+
+    def __repr__(self) -> str:
+        name = "leaf" if self.func is None else getattr(self.func, "__name__", repr(self.func))
+        return f"LazyExpression({name}) over {len(self.leaves)} GeoData with spatial shape {self.spatial_shape}"
+
+    def evaluate_window(self, window:rasterio.windows.Window) -> np.ndarray:
+        """
+        Evaluates the expression in `window` (within the spatial domain). Each GeoData (and each repeated
+        sub-expression) is read (computed) only once.
+
+        Args:
+            window: window with integer offsets and shape relative to the GeoData of the expression.
+
+        Returns:
+            array with the values of the expression in the window.
+        """
+        from georeader import read
+        cache = {}
+
+        def evaluate(obj:Any) -> Any:
+            if isinstance(obj, (list, tuple)):
+                return type(obj)(evaluate(o) for o in obj)
+            if isinstance(obj, np.ndarray):
+                if (obj.ndim >= 2) and (tuple(obj.shape[-2:]) == self.spatial_shape):
+                    return obj[(...,) + window.toslices()]
+                return obj
+            if not (isinstance(obj, LazyExpression) or _is_geodata(obj)):
+                return obj
+
+            key = id(obj)
+            if key in cache:
+                return cache[key]
+
+            if isinstance(obj, LazyExpression):
+                if obj.func is None:
+                    value = evaluate(obj.args[0])
+                else:
+                    args = evaluate(obj.args)
+                    kwargs = {k: evaluate(v) for k, v in obj.kwargs.items()}
+                    value = obj.func(*args, **kwargs)
+            else:
+                value = np.asanyarray(read.read_from_window(obj, window, trigger_load=True, boundless=False).values)
+
+            cache[key] = value
+            return value
+
+        values = np.asanyarray(evaluate(self))
+        expected = (int(window.height), int(window.width))
+        if (values.ndim < 2) or (tuple(values.shape[-2:]) != expected):
+            raise ValueError(f"The expression must keep the spatial dims. Found shape {values.shape} "
+                             f"evaluating a window of shape {expected}")
+        return values
+
+    def _output_shape_dtype(self) -> Tuple[Tuple[int, ...], np.dtype]:
+        """ Shape and dtype of the output computed from the evaluation of the first pixel """
+        values = self.evaluate_window(rasterio.windows.Window(col_off=0, row_off=0, width=1, height=1))
+        return values.shape[:-2] + self.spatial_shape, values.dtype
+
+    def _evaluate_windows(self, write_window:Callable[[rasterio.windows.Window, np.ndarray], None],
+                          window_size:Optional[Tuple[int, int]], max_workers:int) -> None:
+        """ Evaluates the expression by windows calling `write_window` with the results in the main thread """
+        windows = create_windows(self.spatial_shape, window_size=window_size or WINDOW_SIZE_DEFAULT)
+        if max_workers <= 1:
+            for window in windows:
+                write_window(window, self.evaluate_window(window))
+            return
+
+        # At most max_workers windows are in memory at the same time
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = deque()
+            windows_iter = iter(windows)
+            for window in itertools.islice(windows_iter, max_workers):
+                futures.append((window, executor.submit(self.evaluate_window, window)))
+            while len(futures) > 0:
+                window, future = futures.popleft()
+                data = future.result()
+                for window_next in itertools.islice(windows_iter, 1):
+                    futures.append((window_next, executor.submit(self.evaluate_window, window_next)))
+                write_window(window, data)
+                del data
+
+    def compute(self, window_size:Optional[Tuple[int, int]]=None, max_workers:int=1,
+                out:Optional[np.ndarray]=None) -> GeoTensor:
+        """
+        Evaluates the expression window by window into a single output array.
+
+        Args:
+            window_size: `(height, width)` of the windows. Defaults to `WINDOW_SIZE_DEFAULT`.
+            max_workers: number of windows evaluated concurrently in a thread pool.
+            out: optional array (e.g. a `np.memmap`) to write the output. It must have the shape of the output.
+
+        Returns:
+            GeoTensor with the output (backed by `out` if given) and the georreference of the expression.
+        """
+        shape, dtype = self._output_shape_dtype()
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        assert out.shape == shape, f"Unexpected shape of out {out.shape} expected {shape}"
+
+        def write_window(window:rasterio.windows.Window, data:np.ndarray) -> None:
+            out[(...,) + window.toslices()] = data
+
+        self._evaluate_windows(write_window, window_size=window_size, max_workers=max_workers)
+        return GeoTensor(out, transform=self.transform, crs=self.crs, fill_value_default=self.fill_value_default)
+
+    def to_tiff(self, path_tiff_save:str, profile:Optional[Dict[str, Any]]=None,
+                descriptions:Optional[List[str]]=None, tags:Optional[Dict[str, Any]]=None,
+                blocksize:Optional[int]=None, max_workers:int=1) -> None:
+        """
+        Evaluates the expression window by window writing the output in a local tiled GeoTIFF.
+
+        Args:
+            path_tiff_save: local path of the GeoTIFF.
+            profile: profile to update `save.PROFILE_TILED_GEOTIFF_DEFAULT`.
+            descriptions: name of the bands
+            tags: Dict to save as tags of the image
+            blocksize: blocksize of the GeoTIFF. The windows evaluated are aligned with the blocks.
+            max_workers: number of windows evaluated concurrently in a thread pool.
+        """
+        from georeader.save import PROFILE_TILED_GEOTIFF_DEFAULT, BLOCKSIZE_DEFAULT
+        shape, dtype = self._output_shape_dtype()
+        assert len(shape) in (2, 3), f"Expected data with 2 or 3 dimensions to save as GeoTIFF found: {shape}"
+        assert dtype != "bool", "Boolean data can't be saved as GeoTIFF"
+        if descriptions is not None:
+            assert len(descriptions) == (shape[0] if len(shape) == 3 else 1), f"Unexpected band descriptions {len(descriptions)}"
+
+        blocksize = blocksize or BLOCKSIZE_DEFAULT
+        height, width = self.spatial_shape
+        profile_save = PROFILE_TILED_GEOTIFF_DEFAULT.copy()
+        profile_save.update({"blockxsize": blocksize, "blockysize": blocksize, "nodata": self.fill_value_default})
+        if profile is not None:
+            profile_save.update(profile)
+        profile_save.update({"driver": "GTiff", "dtype": str(dtype), "count": shape[0] if len(shape) == 3 else 1,
+                             "height": height, "width": width, "crs": self.crs, "transform": self.transform,
+                             "tiled": True})
+
+        # Windows of about WINDOW_SIZE_DEFAULT pixels aligned with the blocks
+        window_size = tuple(max(1, w // blocksize) * blocksize for w in WINDOW_SIZE_DEFAULT)
+        with rasterio.open(path_tiff_save, "w", **profile_save) as rst_out:
+            if tags is not None:
+                rst_out.update_tags(**tags)
+            if descriptions is not None:
+                for i, d in enumerate(descriptions):
+                    rst_out.set_band_description(i + 1, d)
+
+            def write_window(window:rasterio.windows.Window, data:np.ndarray) -> None:
+                rst_out.write(data if data.ndim == 3 else data[np.newaxis], window=window)
+
+            self._evaluate_windows(write_window, window_size=window_size, max_workers=max_workers)
+
+    def save_cog(self, path_tiff_save:str, profile:Optional[Dict[str, Any]]=None,
+                 descriptions:Optional[List[str]]=None, tags:Optional[Dict[str, Any]]=None,
+                 dir_tmpfiles:str=".", fs:Optional[Any]=None, max_workers:int=1) -> None:
+        """
+        Evaluates the expression window by window and saves it as a cloud optimized GeoTIFF. The output is first
+        written to an uncompressed tiled GeoTIFF in `dir_tmpfiles` and then copied as COG (see `save.save_cog`),
+        so the output does not need to fit in memory.
+
+        Args:
+            path_tiff_save: path to save the COG GeoTIFF
+            profile: profile dict with the creation options of the COG (e.g. compress).
+            descriptions: name of the bands
+            tags: Dict to save as tags of the image
+            dir_tmpfiles: dir to create tempfiles
+            fs: fsspec filesystem to save the file
+            max_workers: number of windows evaluated concurrently in a thread pool.
+        """
+        from georeader import save
+        with tempfile.NamedTemporaryFile(dir=dir_tmpfiles, suffix=".tif", delete=True) as fileobj:
+            name_tiled = fileobj.name
+
+        try:
+            self.to_tiff(name_tiled, profile={"compress": None}, descriptions=descriptions, tags=tags,
+                         max_workers=max_workers)
+            save.copy_to_cog(name_tiled, path_tiff_save, profile=profile, dir_tmpfiles=dir_tmpfiles, fs=fs)
+        finally:
+            if os.path.exists(name_tiled):
+                os.remove(name_tiled)
+
+
+def lazy(data:GeoData) -> LazyExpression:
+    """
+    Returns a lazy expression with `data` as leaf. `data` could be a GeoTensor or a reader (e.g. `RasterioReader`,
+    `S2Image`), readers are read window by window when the expression is evaluated.
+
+    Args:
+        data: GeoData object.
+
+    Returns:
+        LazyExpression
+    """
+    return LazyExpression(None, (data,))
+
+
+def where(condition:Any, x:Any, y:Any) -> LazyExpression:
+    """ Lazy `np.where(condition, x, y)` (at least one of the arguments must be a LazyExpression or GeoData) """
+    return LazyExpression(np.where, (condition, x, y))
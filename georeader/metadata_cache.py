@@ -0,0 +1,241 @@
+"""
+Cache of the headers of raster files.
+
+Creating a `RasterioReader` opens the files to read their transform, crs, shape, etc. For long time series in
+cloud buckets this is slower than reading the data. This module stores those headers in a process-wide LRU cache
+and, optionally, in a directory of JSON files shared by several processes (e.g. the workers of a batch job).
+Entries are keyed by `(path, overview_level)` and validated with the signature of the file (modification time and
+size of local files; etag or modification time of remote files if `fsspec` is installed). Remote files whose
+signature can't be obtained are assumed to be immutable.
+
+The directory of the persistent cache can be set with the `GEOREADER_METADATA_CACHE_DIR` environment variable.
+
+Examples:
+    >>> from georeader.rasterio_reader import RasterioReader
+    >>> from georeader import metadata_cache
+    >>> metadata_cache.get_metadata_cache().set_directory("/tmp/georeader_metadata")
+    >>> r = RasterioReader(["gs://bucket/t1.tif", "gs://bucket/t2.tif"], use_metadata_cache=True)
+"""
+import os
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import rasterio
+import rasterio.crs
+
+METADATA_CACHE_SIZE_DEFAULT = 4096
+# Seconds the signatures of remote files are reused by `cached_file_signature`
+FILE_SIGNATURE_TTL = 60.
+
+
+def read_metadata(path:str, overview_level:Optional[int]=None,
+                  rio_env_options:Optional[Dict[str, Any]]=None) -> Dict[str, Any]:
+    """
+    Opens the raster and returns its header as a JSON serializable dict with keys: transform, crs (wkt), dtype,
+    count, width, height, res, nodata, overviews (per band) and block_shapes (per band).
+
+    Args:
+        path: path of the raster.
+        overview_level: 0-based overview level to open. None opens the full resolution raster.
+        rio_env_options: GDAL options to open the raster.
+    """
+    if rio_env_options is None:
+        rio_env_options = {}
+
+    # rasterio.open hides the overviews of the raster if overview_level=None is given
+    kwargs_open = {} if overview_level is None else {"overview_level": overview_level}
+    with rasterio.Env(**rio_env_options):
+        with rasterio.open(path, "r", **kwargs_open) as src:
+            return {
+                "transform": list(src.transform)[:6],
+                "crs": None if src.crs is None else src.crs.to_wkt(),
+                "dtype": src.profile["dtype"],
+                "count": src.count,
+                "width": src.width,
+                "height": src.height,
+                "res": list(src.res),
+                "nodata": src.nodata,
+                "overviews": [src.overviews(i) for i in src.indexes],
+                "block_shapes": [list(bs) for bs in src.block_shapes],
+            }
+
+
+def metadata_crs(metadata:Dict[str, Any]) -> Optional[rasterio.crs.CRS]:
+    """ Returns the crs of the metadata dict as a `rasterio.crs.CRS` object """
+    if metadata["crs"] is None:
+        return None
+    return rasterio.crs.CRS.from_wkt(metadata["crs"])
+
+
+def metadata_transform(metadata:Dict[str, Any]) -> rasterio.Affine:
+    """ Returns the transform of the metadata dict as a `rasterio.Affine` object """
+    return rasterio.Affine(*metadata["transform"])
+
+
+def file_signature(path:str) -> Optional[str]:
+    """
+    Returns a string that changes when the file changes (modification time and size for local files, etag or
+    modification time for remote files). Returns None if it can't be computed (e.g. GDAL virtual file system
+    paths such as `/vsizip/` or `/vsis3/`).
+    """
+    if path.startswith("file://"):
+        path = path[len("file://"):]
+
+    if path.startswith("/vsi"):
+        return None
+
+    if "://" not in path:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    try:
+        import fsspec
+    except ImportError:
+        return None
+
+    try:
+        info = fsspec.filesystem(path.split(":", 1)[0]).info(path)
+    except Exception:
+        return None
+
+    for k in ["etag", "ETag", "md5Hash", "mtime", "updated", "LastModified"]:
+        if info.get(k, None) is not None:
+            return f"{info[k]}-{info.get('size', '')}"
+    return None
+
+
+_FILE_SIGNATURES: OrderedDict = OrderedDict()
+_FILE_SIGNATURES_LOCK = threading.Lock()
+
+
+def cached_file_signature(path:str, ttl:float=FILE_SIGNATURE_TTL) -> Optional[str]:
+    """
+    Returns `file_signature(path)`. Signatures of remote files (that require a metadata request) are memoised in a
+    process-wide cache for `ttl` seconds, so files rewritten within that time may not be detected. Signatures of
+    local files are computed on each call (`os.stat` is cheap).
+
+    Args:
+        path: path of the raster.
+        ttl: seconds a remote signature is reused.
+    """
+    if "://" not in path or path.startswith("file://"):
+        return file_signature(path)
+
+    now = time.monotonic()
+    with _FILE_SIGNATURES_LOCK:
+        entry = _FILE_SIGNATURES.get(path, None)
+        if (entry is not None) and (now - entry[0] < ttl):
+            return entry[1]
+
+    signature = file_signature(path)
+    with _FILE_SIGNATURES_LOCK:
+        _FILE_SIGNATURES[path] = (now, signature)
+        _FILE_SIGNATURES.move_to_end(path)
+        while len(_FILE_SIGNATURES) > METADATA_CACHE_SIZE_DEFAULT:
+            _FILE_SIGNATURES.popitem(last=False)
+    return signature
+
+
+class MetadataCache:
+    """
+    Thread-safe LRU cache of raster headers with an optional persistent store in `directory` (one JSON file
+    per entry, written atomically so that it can be shared by several processes).
+
+    Args:
+        directory: directory of the persistent store. If None the entries are only kept in memory.
+        max_entries: maximum number of entries kept in memory.
+    """
+    def __init__(self, directory:Optional[str]=None, max_entries:int=METADATA_CACHE_SIZE_DEFAULT):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.set_directory(directory)
+
+    def set_directory(self, directory:Optional[str]) -> None:
+        """ Sets the directory of the persistent store (None disables it) """
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def _entry_path(self, key:Tuple[str, Optional[int]]) -> str:
+        name = hashlib.sha1(json.dumps(list(key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def get(self, path:str, overview_level:Optional[int]=None,
+            rio_env_options:Optional[Dict[str, Any]]=None) -> Dict[str, Any]:
+        """
+        Returns the header of the raster (see `read_metadata`). It only opens the raster if there is no valid
+        entry in memory or in the persistent store.
+
+        Args:
+            path: path of the raster.
+            overview_level: 0-based overview level. None for the full resolution raster.
+            rio_env_options: GDAL options to open the raster.
+        """
+        key = (path, overview_level)
+        signature = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if (entry is not None) and (entry[0] == signature):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        metadata = None
+        if self.directory is not None:
+            entry_path = self._entry_path(key)
+            if os.path.exists(entry_path):
+                with open(entry_path, "r") as fh:
+                    entry_disk = json.load(fh)
+                if entry_disk["signature"] == signature:
+                    metadata = entry_disk["metadata"]
+
+        if metadata is None:
+            metadata = read_metadata(path, overview_level=overview_level, rio_env_options=rio_env_options)
+            if self.directory is not None:
+                entry_path_tmp = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(entry_path_tmp, "w") as fh:
+                    json.dump({"path": path, "overview_level": overview_level,
+                               "signature": signature, "metadata": metadata}, fh)
+                os.replace(entry_path_tmp, entry_path)
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+
+        with self._lock:
+            self._entries[key] = (signature, metadata)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return metadata
+
+    def clear(self) -> None:
+        """ Removes the entries in memory and resets the counters (the persistent store is not modified) """
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """ Returns the hit and miss counters and the number of entries in memory """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+_METADATA_CACHE = MetadataCache(directory=os.environ.get("GEOREADER_METADATA_CACHE_DIR", None))
+
+
+def get_metadata_cache() -> MetadataCache:
+    """ Returns the process-wide metadata cache used by `RasterioReader` with `use_metadata_cache=True` """
+    return _METADATA_CACHE
@@ -1,17 +1,21 @@
 from georeader.abstract_reader import GeoData
 from georeader.geotensor import GeoTensor
-from typing import List, Optional, Tuple, Union, Callable
+from typing import Any, List, Optional, Tuple, Union, Callable
 import rasterio.warp
 from georeader import read
 from georeader.read import read_reproject
 import numpy as np
 from georeader import window_utils
 from georeader import slices
+from georeader import instrumentation
 from shapely.geometry import Polygon, MultiPolygon, box
 import rasterio.windows
 from collections import namedtuple
 import georeader
 
+# Size of the windows of the mosaics written to a given output (`spatial_mosaic(..., out=...)`)
+OUT_WINDOW_SIZE_DEFAULT = (1024, 1024)
+
 
 def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
                    polygon:Optional[Polygon]=None,
@@ -23,11 +27,15 @@ def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
                    window_size: Optional[Tuple[int, int]]= None,
                    resampling:rasterio.warp.Resampling=rasterio.warp.Resampling.cubic_spline,
                    masking_function:Optional[Callable[[GeoData], GeoData]]=None,
-                   dst_nodata:Optional[int]=None) -> GeoTensor:
+                   dst_nodata:Optional[int]=None,
+                   use_warp_plan:bool=False,
+                   split_parts:Optional[str]=None,
+                   parts_gap:int=read.SIZE_DEFAULT,
+                   out:Optional[GeoTensor]=None) -> Union[GeoTensor, List[GeoTensor]]:
     """
     Computes the spatial mosaic of all input products in `data_list`. It iteratively calls `read_reproject` with
-    all the list of rasters while there is any `dst_nodata` value. This function m requires that the copy of the output
-    fits in memory.
+    all the list of rasters while there is any `dst_nodata` value. This function requires that the copy of the output
+    fits in memory unless `out` is given.
 
     This function is very similar to `rasterio.merge.merge`.
 
@@ -44,21 +52,111 @@ def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
         masking_function: function to call to the mask if provided or to the tensor (if not provided) should return a bool tensor
             with only spatial dimensions.
         dst_nodata: no data value. if None will use `data_list[0].fill_value_default`
+        use_warp_plan: if True the products are reprojected with the cached `WarpPlan` between the grids
+            (see `read.read_reproject`). Products that share the same grid (e.g. a time series of the same tile)
+            reuse the coordinates computed for the first one. Only used with nearest, bilinear, cubic and
+            cubic_spline resampling. Defaults to False.
+        split_parts: if `split_parts` is `"list"` or `"assemble"` the mosaic is computed separately for each
+            group of parts of `polygon` (see `read.group_polygon_parts`) so the space between distant parts is
+            not read. `"list"` returns the list of GeoTensors of the groups (a list with a single GeoTensor if
+            `polygon` is a Polygon or is not given, as `read.read_from_polygon`). `"assemble"` copies them in a
+            GeoTensor covering the whole `polygon` filled with `dst_nodata`: that array is allocated (if
+            `dst_nodata` is 0 the OS only commits the pages written by the groups, otherwise it is filled in
+            memory); use `"list"` (or `out`) if it does not fit in memory.
+        parts_gap: distance in pixels of the output grid to group the parts of `polygon`.
+        out: GeoTensor to write the mosaic in (e.g. a disk-backed GeoTensor created with
+            `GeoTensor.empty_on_disk`). Its grid (transform, crs and shape) is the grid of the mosaic, so `polygon`,
+            `bounds`, `dst_transform` and `dst_crs` must be None. The mosaic is computed and written window by
+            window (of `window_size`, defaults to `OUT_WINDOW_SIZE_DEFAULT`) so the memory used is bounded by the
+            size of the windows. Windows that do not intersect any product are filled with `dst_nodata`.
 
     Returns:
-        GeoTensor with mosaic over the given bounds
+        GeoTensor with mosaic over the given bounds (list of GeoTensors if `split_parts="list"`, `out` if given)
 
     """
+    kwargs = dict(dst_transform=dst_transform, bounds=bounds, dst_crs=dst_crs,
+                  dtype_dst=dtype_dst, window_size=window_size, resampling=resampling,
+                  masking_function=masking_function, dst_nodata=dst_nodata, use_warp_plan=use_warp_plan)
+    with instrumentation.record("spatial_mosaic") as call_record:
+        if out is not None:
+            assert (polygon is None) and (bounds is None) and (dst_transform is None) and (dst_crs is None), \
+                "The grid of the mosaic is the grid of out: polygon, bounds, dst_transform and dst_crs must be None"
+            data_return = _spatial_mosaic_out(data_list, out=out, call_record=call_record,
+                                              **{k: v for k, v in kwargs.items()
+                                                 if k not in ("dst_transform", "bounds", "dst_crs")})
+        elif (split_parts is not None) and (polygon is not None):
+            assert split_parts in read.POLYGON_PARTS_MODES, \
+                f"split_parts must be one of {read.POLYGON_PARTS_MODES} found {split_parts}"
+            data_return = _spatial_mosaic_parts(data_list, polygon=polygon, crs_polygon=crs_polygon,
+                                                split_parts=split_parts, parts_gap=parts_gap,
+                                                call_record=call_record, **kwargs)
+        else:
+            assert (split_parts is None) or (split_parts in read.POLYGON_PARTS_MODES), \
+                f"split_parts must be one of {read.POLYGON_PARTS_MODES} found {split_parts}"
+            data_return = _spatial_mosaic(data_list, polygon=polygon, crs_polygon=crs_polygon,
+                                          call_record=call_record, **kwargs)
+            if split_parts == "list":
+                data_return = [data_return]
+
+        if isinstance(data_return, list):
+            call_record.add(output_nbytes=sum(instrumentation.nbytes(d) for d in data_return))
+        else:
+            call_record.add(output_nbytes=instrumentation.nbytes(data_return))
+    return data_return
+
 
+def _spatial_mosaic_parts(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
+                          polygon:Union[Polygon, MultiPolygon], crs_polygon:Optional[str],
+                          dst_transform:Optional[rasterio.transform.Affine], dst_crs:Optional[str],
+                          dst_nodata:Optional[int], split_parts:str, parts_gap:int, call_record:Any,
+                          **kwargs) -> Union[GeoTensor, List[GeoTensor]]:
+    """ Computes the mosaic of each group of parts of `polygon` (see `spatial_mosaic`) """
     assert len(data_list) > 0, f"Expected at least one product found 0 {data_list}"
+    first_data_object = data_list[0][0] if isinstance(data_list[0], tuple) else data_list[0]
+    if dst_transform is None:
+        dst_transform = first_data_object.transform
+    if dst_crs is None:
+        dst_crs = first_data_object.crs
+    if crs_polygon is None:
+        crs_polygon = dst_crs
+
+    GeoDataFake = namedtuple("GeoDataFake", ["transform", "crs"])
+    grid = GeoDataFake(transform=dst_transform, crs=dst_crs)
+    groups = read.group_polygon_parts(grid, polygon, crs_polygon, gap=parts_gap)
+    data_parts = [_spatial_mosaic(data_list, polygon=group, crs_polygon=crs_polygon, dst_transform=dst_transform,
+                                  dst_crs=dst_crs, dst_nodata=dst_nodata, call_record=call_record, **kwargs)
+                  for group in groups]
+    if split_parts == "list":
+        return data_parts
+
+    # A single group covers the window of the whole polygon
+    if len(data_parts) == 1:
+        return data_parts[0]
+
+    window_polygon = window_utils.round_outer_window(read.window_from_polygon(grid, polygon, crs_polygon=crs_polygon))
+    first_part = data_parts[0]
+    return read._assemble_parts(data_parts, transform=rasterio.windows.transform(window_polygon, transform=dst_transform),
+                                shape=tuple(first_part.shape[:-2]) + (int(window_polygon.height), int(window_polygon.width)),
+                                crs=dst_crs, fill_value_default=first_part.fill_value_default, dtype=first_part.dtype)
+
+
+def _spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
+                    polygon:Optional[Polygon],
+                    crs_polygon:Optional[str],
+                    dst_transform:Optional[rasterio.transform.Affine],
+                    bounds:Optional[Tuple[float, float, float, float]],
+                    dst_crs:Optional[str],
+                    dtype_dst:Optional[str],
+                    window_size: Optional[Tuple[int, int]],
+                    resampling:rasterio.warp.Resampling,
+                    masking_function:Optional[Callable[[GeoData], GeoData]],
+                    dst_nodata:Optional[int],
+                    use_warp_plan:bool,
+                    call_record:Any) -> GeoTensor:
+    """ Implementation of `spatial_mosaic`. The phases of the call are added to `call_record` """
+    assert len(data_list) > 0, f"Expected at least one product found 0 {data_list}"
+    first_data_object = data_list[0][0] if isinstance(data_list[0], tuple) else data_list[0]
 
-    if isinstance(data_list[0], tuple):
-        first_data_object =  data_list[0][0]
-        first_mask_object = data_list[0][1]
-    else:
-        first_data_object = data_list[0]
-        first_mask_object = None
-    
     if dst_transform is None:
         dst_transform = first_data_object.transform
 
@@ -93,16 +191,93 @@ def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
 
     # Shift transform to window
     dst_transform = rasterio.windows.transform(window_polygon, transform=dst_transform)
+    return _mosaic_grid(data_list, dst_transform=dst_transform, dst_crs=dst_crs,
+                        height=window_polygon.height, width=window_polygon.width, dtype_dst=dtype_dst,
+                        window_size=window_size, resampling=resampling, masking_function=masking_function,
+                        dst_nodata=dst_nodata, use_warp_plan=use_warp_plan, call_record=call_record)
+
+
+def _spatial_mosaic_out(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
+                        out:GeoTensor,
+                        dtype_dst:Optional[str],
+                        window_size: Optional[Tuple[int, int]],
+                        resampling:rasterio.warp.Resampling,
+                        masking_function:Optional[Callable[[GeoData], GeoData]],
+                        dst_nodata:Optional[int],
+                        use_warp_plan:bool,
+                        call_record:Any) -> GeoTensor:
+    """ Computes the mosaic in the grid of `out` window by window writing it to `out` (see `spatial_mosaic`) """
+    assert len(data_list) > 0, f"Expected at least one product found 0 {data_list}"
+    first_data_object = data_list[0][0] if isinstance(data_list[0], tuple) else data_list[0]
+    dst_nodata = dst_nodata or first_data_object.fill_value_default
+    if dtype_dst is None:
+        dtype_dst = out.dtype
+
+    # Cache of the polygons geodata
+    polygons_geodata = [None for _ in range(len(data_list))]
+    for window in slices.create_windows(out.shape[-2:], window_size or OUT_WINDOW_SIZE_DEFAULT):
+        polygon_window = window_utils.window_polygon(window, out.transform)
+        data_list_window = []
+        for _i, data in enumerate(data_list):
+            if polygons_geodata[_i] is None:
+                geodata = data[0] if isinstance(data, tuple) else data
+                polygons_geodata[_i] = geodata.footprint(crs=out.crs)
+            if polygons_geodata[_i].intersects(polygon_window):
+                data_list_window.append(data)
+
+        # The first product is always kept: its values are the output where all the products are invalid
+        if (len(data_list_window) > 0) and (data_list_window[0] is not data_list[0]):
+            data_list_window.insert(0, data_list[0])
+
+        if len(data_list_window) == 0:
+            with call_record.phase("mosaic"):
+                out.write_from_window(np.full(out.shape[:-2] + (window.height, window.width), dst_nodata,
+                                              dtype=out.dtype), window)
+            continue
+
+        data_window = _mosaic_grid(data_list_window,
+                                   dst_transform=rasterio.windows.transform(window, transform=out.transform),
+                                   dst_crs=out.crs, height=window.height, width=window.width, dtype_dst=dtype_dst,
+                                   window_size=None, resampling=resampling, masking_function=masking_function,
+                                   dst_nodata=dst_nodata, use_warp_plan=use_warp_plan, call_record=call_record)
+        with call_record.phase("mosaic"):
+            out.write_from_window(data_window.values, window)
+
+    return out
+
+
+def _mosaic_grid(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
+                 dst_transform:rasterio.transform.Affine,
+                 dst_crs:Any,
+                 height:int,
+                 width:int,
+                 dtype_dst:Optional[str],
+                 window_size: Optional[Tuple[int, int]],
+                 resampling:rasterio.warp.Resampling,
+                 masking_function:Optional[Callable[[GeoData], GeoData]],
+                 dst_nodata:Optional[int],
+                 use_warp_plan:bool,
+                 call_record:Any) -> GeoTensor:
+    """ Computes the mosaic of `data_list` in the grid of shape `(height, width)` of `dst_transform` and `dst_crs` """
+    if isinstance(data_list[0], tuple):
+        first_data_object =  data_list[0][0]
+        first_mask_object = data_list[0][1]
+    else:
+        first_data_object = data_list[0]
+        first_mask_object = None
+
     dst_nodata = dst_nodata or first_data_object.fill_value_default
 
     # Get object to save the results
-    data_return = read_reproject(first_data_object,
-                                 dst_crs=dst_crs, dst_transform=dst_transform,
-                                 resampling=resampling,
-                                 dtype_dst=dtype_dst,
-                                 window_out=rasterio.windows.Window(row_off=0, col_off=0, width=window_polygon.width,
-                                                                    height=window_polygon.height),
-                                 dst_nodata=dst_nodata)
+    with call_record.phase("read"):
+        data_return = read_reproject(first_data_object,
+                                     dst_crs=dst_crs, dst_transform=dst_transform,
+                                     resampling=resampling,
+                                     dtype_dst=dtype_dst,
+                                     window_out=rasterio.windows.Window(row_off=0, col_off=0,
+                                                                        width=width,
+                                                                        height=height),
+                                     dst_nodata=dst_nodata, use_warp_plan=use_warp_plan)
 
     # invalid_values of spatial locations only  -> any
     invalid_values = data_return.values == dst_nodata
@@ -116,12 +291,14 @@ def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
         if (masking_function is None) and len(first_mask_object.shape) > 2:
             assert (len(first_mask_object.shape) == 3) and (first_mask_object.shape[0] == 1), f"Expected two dims, found {first_mask_object.shape}"
 
-        invalid_geotensor = read_reproject(first_mask_object,
-                                           dst_crs=dst_crs, dst_transform=dst_transform,
-                                           resampling=rasterio.warp.Resampling.nearest,
-                                           window_out=rasterio.windows.Window(row_off=0, col_off=0,
-                                                                              width=window_polygon.width,
-                                                                              height=window_polygon.height))
+        with call_record.phase("read"):
+            invalid_geotensor = read_reproject(first_mask_object,
+                                               dst_crs=dst_crs, dst_transform=dst_transform,
+                                               resampling=rasterio.warp.Resampling.nearest,
+                                               window_out=rasterio.windows.Window(row_off=0, col_off=0,
+                                                                                  width=width,
+                                                                                  height=height),
+                                               use_warp_plan=use_warp_plan)
         if masking_function is not None:
             invalid_geotensor = masking_function(invalid_geotensor)
 
@@ -189,10 +366,12 @@ def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
                     assert (len(geomask.shape) == 3) and (
                                 geomask.shape[0] == 1), f"Expected two dims, found {geomask.shape}"
 
-                invalid_geotensor = read_reproject(geomask,
-                                                   dst_crs=dst_crs, dst_transform=dst_transform_iter,
-                                                   resampling=rasterio.warp.Resampling.nearest,
-                                                   window_out=window_reproject_iter)
+                with call_record.phase("read"):
+                    invalid_geotensor = read_reproject(geomask,
+                                                       dst_crs=dst_crs, dst_transform=dst_transform_iter,
+                                                       resampling=rasterio.warp.Resampling.nearest,
+                                                       window_out=window_reproject_iter,
+                                                       use_warp_plan=use_warp_plan)
                 if masking_function is not None:
                     invalid_geotensor = masking_function(invalid_geotensor)
 
@@ -203,10 +382,11 @@ def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
                     continue
                 invalid_values_iter = invalid_geotensor.values
 
-            data_read = read_reproject(geodata, dst_crs=dst_crs, window_out=window_reproject_iter,
-                                       dst_transform=dst_transform_iter, resampling=resampling,
-                                       dtype_dst=dtype_dst,
-                                       dst_nodata=dst_nodata)
+            with call_record.phase("read"):
+                data_read = read_reproject(geodata, dst_crs=dst_crs, window_out=window_reproject_iter,
+                                           dst_transform=dst_transform_iter, resampling=resampling,
+                                           dtype_dst=dtype_dst,
+                                           dst_nodata=dst_nodata, use_warp_plan=use_warp_plan)
 
             if (geomask is None) and (masking_function is not None):
                 invalid_geotensor = masking_function(data_read)
@@ -229,8 +409,9 @@ def spatial_mosaic(data_list:Union[List[GeoData], List[Tuple[GeoData,GeoData]]],
                 invalid_values_iter = masked_values_read
 
             # Copy values invalids in window and valids in iter
-            mask_values_copy_out = invalid_values_window & ~invalid_values_iter
-            data_return.values[slice_obj][..., mask_values_copy_out] = data_read.values[...,mask_values_copy_out]
+            with call_record.phase("mosaic"):
+                mask_values_copy_out = invalid_values_window & ~invalid_values_iter
+                data_return.values[slice_obj][..., mask_values_copy_out] = data_read.values[...,mask_values_copy_out]
 
             invalid_values_window &= invalid_values_iter
 
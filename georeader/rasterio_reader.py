@@ -1,16 +1,28 @@
 import rasterio
 import rasterio.windows
+import rasterio.vrt
+import rasterio.warp
 import numpy as np
-from typing import Tuple, Dict, List, Optional, Union, Any
+from typing import Tuple, Dict, List, Optional, Union, Any, Iterator
 import warnings
 import numbers
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Executor
+from collections import OrderedDict
+from contextlib import contextmanager
 from georeader import geotensor
 from collections.abc import Iterable
 from georeader import window_utils
+from georeader import block_cache
+from georeader import metadata_cache
+from georeader import tiff_memmap
+from georeader import instrumentation
 from georeader.window_utils import window_bounds, get_slice_pad
 from shapely.geometry import Polygon
 from georeader.abstract_reader import same_extent, GeoData
-from georeader.read import WEB_MERCATOR_CRS, SIZE_DEFAULT, window_from_tile, read_from_tile
+from georeader.read import WEB_MERCATOR_CRS, SIZE_DEFAULT, window_from_tile, read_from_tile, select_overview_level, \
+    iter_blocks
 from numpy.typing import NDArray
 
 # https://developmentseed.org/titiler/advanced/performance_tuning/#aws-configuration
@@ -29,6 +41,9 @@ RIO_ENV_OPTIONS_DEFAULT = dict(
 # VSICurlClearCache()
 # https://github.com/rasterio/rasterio/blob/main/rasterio/_path.py
 
+# Number of threads to read the headers of the rasters when checking them (if max_workers is not given)
+CHECK_MAX_WORKERS_DEFAULT = 16
+
 def _vsi_path(path:str)->str:
     """
     Function to convert a path to a VSI path. We use this function to try re-reading the image 
@@ -55,13 +70,161 @@ def _vsi_path(path:str)->str:
         return path
 
 
+HANDLE_POOL_SIZE_DEFAULT = 32
+
+
+class DatasetHandlePool:
+    """
+    LRU pool of open rasterio datasets. Datasets are keyed by path, overview level and GDAL options.
+    Each thread of each process has its own set of open datasets (rasterio datasets must not be shared
+    between threads) and the pool is invalidated in the child after a fork. The datasets of the threads that
+    have exited (e.g. the workers of a shut down `ThreadPoolExecutor`) are closed the next time a dataset is
+    opened through the pool.
+
+    Keeping the dataset open avoids re-fetching the headers of remote files and keeps the GDAL block cache
+    of the dataset alive between `read` calls.
+
+    Args:
+        maxsize: maximum number of datasets kept open per thread.
+
+    Examples:
+        >>> pool = get_handle_pool()
+        >>> r = RasterioReader("path/to/raster.tif", use_handle_pool=True)
+        >>> r.read(window=rasterio.windows.Window(0, 0, 256, 256))
+        >>> pool.stats() # {"hits": 0, "misses": 1, "evictions": 0, "open": 1}
+    """
+    def __init__(self, maxsize:int=HANDLE_POOL_SIZE_DEFAULT):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # Thread id -> (generation, open datasets of the thread). Datasets of older generations were
+        # invalidated by `clear` and are closed by their thread
+        self._handles: Dict[int, Tuple[int, OrderedDict]] = {}
+        self._generation = 0
+        self._pid = os.getpid()
+        # Datasets inherited from the parent process. They are never used nor closed in the child.
+        self._forked_handles = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._forked_handles.append(self._handles)
+        self._handles = {}
+        self._pid = os.getpid()
+
+    def get(self, path:str, overview_level:Optional[int]=None,
+            rio_env_options:Optional[Dict[str, Any]]=None,
+            call_record:Optional[instrumentation.CallRecord]=None) -> rasterio.DatasetReader:
+        """
+        Returns an open dataset of `path`. It opens the dataset if it is not in the pool of the current thread.
+        It must be called within a `rasterio.Env` with the `rio_env_options`.
+
+        Args:
+            path: path of the raster.
+            overview_level: overview level to open (as in `rasterio.open`).
+            rio_env_options: GDAL options used to open the dataset. Part of the key of the pool.
+            call_record: record of the instrumented call. The dataset is counted if it is opened.
+
+        Returns:
+            open rasterio dataset. Do not close it.
+        """
+        if os.getpid() != self._pid:
+            self._after_fork()
+
+        key = (path, overview_level, _options_key(rio_env_options))
+        # current_thread registers the threads not created with threading (so they are seen as alive)
+        ident = threading.current_thread().ident
+        with self._lock:
+            generation, handles = self._handles.get(ident, (self._generation, OrderedDict()))
+            if generation != self._generation:
+                for src_invalid in handles.values():
+                    src_invalid.close()
+                handles = OrderedDict()
+            self._handles[ident] = (self._generation, handles)
+
+            src = handles.get(key, None)
+            if (src is not None) and not src.closed:
+                handles.move_to_end(key)
+                self.hits += 1
+                return src
+            self.misses += 1
+            self._close_exited_threads()
+
+        src = rasterio.open(path, "r", overview_level=overview_level)
+        if call_record is not None:
+            call_record.add(datasets_opened=1)
+
+        with self._lock:
+            handles[key] = src
+            while len(handles) > self.maxsize:
+                _, src_evict = handles.popitem(last=False)
+                src_evict.close()
+                self.evictions += 1
+
+        return src
+
+    def _close_exited_threads(self) -> None:
+        """ Closes the datasets of the threads that have exited. Must be called with the lock held """
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [ident for ident in self._handles if ident not in alive]:
+            _, handles = self._handles.pop(ident)
+            for src in handles.values():
+                src.close()
+
+    def clear(self) -> None:
+        """
+        Closes the open datasets of the calling thread and of the threads that have exited, and resets the
+        counters. The datasets of the other threads (which could be reading from them) are invalidated: their
+        thread closes them the next time it uses the pool.
+        """
+        ident = threading.current_thread().ident
+        with self._lock:
+            self._generation += 1
+            if ident in self._handles:
+                _, handles = self._handles.pop(ident)
+                for src in handles.values():
+                    src.close()
+            self._close_exited_threads()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit, miss and eviction counters and the number of open datasets (without the datasets
+        invalidated by `clear`)
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "open": sum(len(h) for g, h in self._handles.values() if g == self._generation)}
+
+
+def _options_key(rio_env_options:Optional[Dict[str, Any]]) -> Tuple:
+    if rio_env_options is None:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in rio_env_options.items()))
+
+
+_HANDLE_POOL = DatasetHandlePool()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: _HANDLE_POOL._after_fork())
+
+
+def get_handle_pool() -> DatasetHandlePool:
+    """ Returns the process-wide pool of open datasets used by `RasterioReader` with `use_handle_pool=True` """
+    return _HANDLE_POOL
+
+
 class RasterioReader:
     """
     Class to read a raster or a set of rasters files (``paths``). If the path is a single file it will return a 3D np.ndarray 
     with shape (C, H, W). If `paths` is a list, the `read` method will return a 4D np.ndarray with shape (len(paths), C, H, W)
 
     It checks that all rasters have same CRS, transform and shape. The `read` method will open the file every time it
-    is called to work in parallel processing scenario.
+    is called to work in parallel processing scenario. Set `use_handle_pool=True` to keep the datasets open between
+    calls (see `DatasetHandlePool`).
 
     Parameters
     -------------------
@@ -89,6 +252,30 @@ class RasterioReader:
     - rio_env_options : `Optional[Dict[str, str]]`
         GDAL options for reading. Defaults to: `RIO_ENV_OPTIONS_DEFAULT`. If you read rasters that might change
         from a remote source, you might want to set `read_with_CPL_VSIL_CURL_NON_CACHED` to True.
+    - use_handle_pool : `bool`
+        If True, `read` reuses the open datasets of the process-wide `DatasetHandlePool` instead of opening
+        the files on every call. Defaults to False.
+    - max_workers : `Optional[int]`
+        If greater than 1, `read` reads the `paths` concurrently with a pool of `max_workers` threads (GDAL
+        releases the GIL while reading). Defaults to None (sequential reads).
+    - use_block_cache : `bool`
+        If True, `read` serves the data from the decoded blocks of the process-wide `block_cache.BlockCache`
+        and adds the blocks it decodes to it. Useful when the same blocks are read many times. Blocks are keyed by
+        the signature of the file (see `metadata_cache.cached_file_signature`): local files are checked on each
+        read, the signatures of remote files (that require fsspec and a metadata request) are reused for
+        `metadata_cache.FILE_SIGNATURE_TTL` seconds and GDAL virtual file system paths (e.g. `/vsizip/`) are
+        assumed to be immutable. Defaults to False.
+    - use_metadata_cache : `bool`
+        If True, the headers of the rasters are taken from the process-wide `metadata_cache.MetadataCache`
+        (optionally persisted on disk) instead of opening the files. Defaults to False.
+    - use_memmap : `bool`
+        If True, `read` takes the pixels of uncompressed local GeoTIFFs with contiguous strips or tiles from a
+        `numpy.memmap` of the file instead of reading them with GDAL (see `tiff_memmap`). Windows within the raster
+        of striped single-path readers are returned as views of the file. Other rasters are read with GDAL.
+        Defaults to False.
+    - metadata : `Optional[Dict[Tuple[str, Optional[int]], Dict[str, Any]]]`
+        Headers of the rasters already read keyed by `(path, overview_level)` (see `metadata_cache.read_metadata`).
+        Copies of the reader share them to avoid opening the files again.
 
     Attributes
     -------------------
@@ -123,7 +310,13 @@ class RasterioReader:
                  fill_value_default:Optional[Union[int, float]]=None,
                  stack:bool=True, indexes:Optional[List[int]]=None,
                  overview_level:Optional[int]=None, check:bool=True,
-                 rio_env_options:Optional[Dict[str, str]]=None):
+                 rio_env_options:Optional[Dict[str, str]]=None,
+                 use_handle_pool:bool=False,
+                 max_workers:Optional[int]=None,
+                 use_block_cache:bool=False,
+                 use_metadata_cache:bool=False,
+                 use_memmap:bool=False,
+                 metadata:Optional[Dict[Tuple[str, Optional[int]], Dict[str, Any]]]=None):
 
         # Syntactic sugar
         if isinstance(paths, str):
@@ -138,30 +331,36 @@ class RasterioReader:
         self.paths = paths
 
         self.stack = stack
+        self.use_handle_pool = use_handle_pool
+        self.max_workers = max_workers
+        self.use_block_cache = use_block_cache
+
+        self.use_metadata_cache = use_metadata_cache
+        self.use_memmap = use_memmap
+        self.metadata = {} if metadata is None else metadata
 
         # TODO keep just a global nodata of size (T,C,) and fill with these values?
         self.fill_value_default = fill_value_default
         self.overview_level = overview_level
-        with rasterio.Env(**self.rio_env_options):
-            with rasterio.open(self.paths[0], "r", overview_level=overview_level) as src:
-                self.real_transform = src.transform
-                self.crs = src.crs
-                self.dtype = src.profile["dtype"]
-                self.real_count = src.count
-                self.real_indexes = list(range(1, self.real_count + 1))
-                if self.stack:
-                    self.real_shape = (len(self.paths), src.count,) + src.shape
-                else:
-                    self.real_shape = (len(self.paths) * self.real_count, ) + src.shape
+        metadata_first = self._path_metadata(self.paths[0], self.overview_level)
+        self.real_transform = metadata_cache.metadata_transform(metadata_first)
+        self.crs = metadata_cache.metadata_crs(metadata_first)
+        self.dtype = metadata_first["dtype"]
+        self.real_count = metadata_first["count"]
+        self.real_indexes = list(range(1, self.real_count + 1))
+        if self.stack:
+            self.real_shape = (len(self.paths), self.real_count,) + (metadata_first["height"], metadata_first["width"])
+        else:
+            self.real_shape = (len(self.paths) * self.real_count, ) + (metadata_first["height"], metadata_first["width"])
 
-                self.real_width = src.width
-                self.real_height = src.height
+        self.real_width = metadata_first["width"]
+        self.real_height = metadata_first["height"]
 
-                self.nodata = src.nodata
-                if self.fill_value_default is None:
-                    self.fill_value_default = self.nodata if (self.nodata is not None) else 0
+        self.nodata = metadata_first["nodata"]
+        if self.fill_value_default is None:
+            self.fill_value_default = self.nodata if (self.nodata is not None) else 0
 
-                self.res = src.res
+        self.res = tuple(metadata_first["res"])
 
         # if (abs(self.real_transform.b) > 1e-6) or (abs(self.real_transform.d) > 1e-6):
         #     warnings.warn(f"transform of {self.paths[0]} is not rectilinear {self.real_transform}. "
@@ -188,29 +387,58 @@ class RasterioReader:
         # Assert all paths have same tranform and crs
         #  (checking width and height will not be needed since we're reading with boundless option but I don't see the point to ignore it)
         if check and len(self.paths) > 1:
-            for p in self.paths:
-                with rasterio.Env(**self.rio_env_options):
-                    with rasterio.open(p, "r", overview_level=overview_level) as src:
-                        if not src.transform.almost_equals(self.real_transform, 1e-6):
-                            raise ValueError(f"Different transform in {self.paths[0]} and {p}: {self.real_transform} {src.transform}")
-                        if not str(src.crs).lower() == str(self.crs).lower():
-                            raise ValueError(f"Different CRS in {self.paths[0]} and {p}: {self.crs} {src.crs}")
-                        if self.real_count != src.count:
-                            raise ValueError(f"Different number of bands in {self.paths[0]} and {p} {self.real_count} {src.count}")
-                        if src.nodata != self.nodata:
-                            warnings.warn(
-                                f"Different nodata in {self.paths[0]} and {p}: {self.nodata} {src.nodata}. This might lead to unexpected behaviour")
-
-                        if (self.real_width != src.width) or (self.real_height != src.height):
-                            if allow_different_shape:
-                                warnings.warn(f"Different shape in {self.paths[0]} and {p}: ({self.real_height}, {self.real_width}) ({src.height}, {src.width}) Might lead to unexpected behaviour")
-                            else:
-                                raise ValueError(f"Different shape in {self.paths[0]} and {p}: ({self.real_height}, {self.real_width}) ({src.height}, {src.width})")
+            # Headers are read concurrently and checked in order
+            metadata_paths = [None] * len(self.paths)
+            def read_metadata_path(i:int, p:str) -> None:
+                metadata_paths[i] = self._path_metadata(p, self.overview_level)
+
+            _map_paths(read_metadata_path, self.paths,
+                       max_workers=CHECK_MAX_WORKERS_DEFAULT if self.max_workers is None else self.max_workers)
+
+            for p, metadata_path in zip(self.paths, metadata_paths):
+                transform = metadata_cache.metadata_transform(metadata_path)
+                crs = metadata_cache.metadata_crs(metadata_path)
+                count, nodata = metadata_path["count"], metadata_path["nodata"]
+                width, height = metadata_path["width"], metadata_path["height"]
+                if not transform.almost_equals(self.real_transform, 1e-6):
+                    raise ValueError(f"Different transform in {self.paths[0]} and {p}: {self.real_transform} {transform}")
+                if not str(crs).lower() == str(self.crs).lower():
+                    raise ValueError(f"Different CRS in {self.paths[0]} and {p}: {self.crs} {crs}")
+                if self.real_count != count:
+                    raise ValueError(f"Different number of bands in {self.paths[0]} and {p} {self.real_count} {count}")
+                if nodata != self.nodata:
+                    warnings.warn(
+                        f"Different nodata in {self.paths[0]} and {p}: {self.nodata} {nodata}. This might lead to unexpected behaviour")
+
+                if (self.real_width != width) or (self.real_height != height):
+                    if allow_different_shape:
+                        warnings.warn(f"Different shape in {self.paths[0]} and {p}: ({self.real_height}, {self.real_width}) ({height}, {width}) Might lead to unexpected behaviour")
+                    else:
+                        raise ValueError(f"Different shape in {self.paths[0]} and {p}: ({self.real_height}, {self.real_width}) ({height}, {width})")
 
         self.check = check
         if indexes is not None:
             self.set_indexes(indexes)
 
+    def _path_metadata(self, path:str, overview_level:Optional[int]) -> Dict[str, Any]:
+        """
+        Returns the header of `path` (see `metadata_cache.read_metadata`). Headers are stored in `self.metadata`
+        and taken from the process-wide metadata cache if `self.use_metadata_cache`.
+
+        Args:
+            path: path of the raster.
+            overview_level: 0-based overview level of the header (None for the full resolution raster).
+        """
+        key = (path, overview_level)
+        if key not in self.metadata:
+            if self.use_metadata_cache:
+                self.metadata[key] = metadata_cache.get_metadata_cache().get(path, overview_level=overview_level,
+                                                                             rio_env_options=self.rio_env_options)
+            else:
+                self.metadata[key] = metadata_cache.read_metadata(path, overview_level=overview_level,
+                                                                  rio_env_options=self.rio_env_options)
+        return self.metadata[key]
+
     def set_indexes(self, indexes:List[int], relative:bool=True)-> None:
         """
         Set the channels to read. This is useful for processing only some channels of the raster. The indexes
@@ -384,7 +612,13 @@ class RasterioReader:
                                     allow_different_shape=self.allow_different_shape,
                                     window_focus=self.window_focus, fill_value_default=self.fill_value_default,
                                     stack=self.stack, overview_level=self.overview_level,
-                                    check=False)
+                                    check=False, rio_env_options=self.rio_env_options,
+                                    use_handle_pool=self.use_handle_pool,
+                                    max_workers=self.max_workers,
+                                    use_block_cache=self.use_block_cache,
+                                    use_metadata_cache=self.use_metadata_cache,
+                                    use_memmap=self.use_memmap,
+                                    metadata=self.metadata)
 
         rst_reader.set_window(window, relative=True, boundless=boundless)
         rst_reader.set_indexes(self.indexes, relative=False)
@@ -470,7 +704,13 @@ class RasterioReader:
         rst_reader = RasterioReader(paths, allow_different_shape=self.allow_different_shape,
                                     window_focus=self.window_focus, fill_value_default=self.fill_value_default,
                                     stack=stack, overview_level=self.overview_level,
-                                    check=False)
+                                    check=False, rio_env_options=self.rio_env_options,
+                                    use_handle_pool=self.use_handle_pool,
+                                    max_workers=self.max_workers,
+                                    use_block_cache=self.use_block_cache,
+                                    use_metadata_cache=self.use_metadata_cache,
+                                    use_memmap=self.use_memmap,
+                                    metadata=self.metadata)
         window_current = rasterio.windows.Window.from_slices(*slice_, boundless=boundless,
                                                              width=self.width, height=self.height)
 
@@ -487,25 +727,53 @@ class RasterioReader:
                               window_focus=self.window_focus, 
                               fill_value_default=self.fill_value_default,
                               stack=self.stack, overview_level=self.overview_level,
-                              check=False)
+                              check=False, rio_env_options=self.rio_env_options,
+                              use_handle_pool=self.use_handle_pool,
+                              max_workers=self.max_workers,
+                              use_block_cache=self.use_block_cache,
+                              use_metadata_cache=self.use_metadata_cache,
+                              use_memmap=self.use_memmap,
+                              metadata=self.metadata)
     
     def overviews(self, index:int=1, time_index:int=0) -> List[int]:
         """
         Returns a list of the available overview levels for the current raster.
         """
-        with rasterio.Env(**self.rio_env_options):
-            with rasterio.open(self.paths[time_index]) as src:
-                return src.overviews(index)
+        return list(self._path_metadata(self.paths[time_index], None)["overviews"][index - 1])
     
     def reader_overview(self, overview_level:int) -> '__class__':
+        """
+        Returns a reader of the `overview_level` pyramid level of the rasters. The `window_focus` and `indexes`
+        of the current reader are kept (`window_focus` is rescaled to the pixels of the overview).
+
+        Args:
+            overview_level: 0-based overview level. Negative values count from the coarsest overview.
+        """
         if overview_level < 0:
             overview_level = len(self.overviews()) + overview_level
         
-        return RasterioReader(self.paths, allow_different_shape=self.allow_different_shape,
-                              window_focus=self.window_focus, 
-                              fill_value_default=self.fill_value_default,
-                              stack=self.stack, overview_level=overview_level,
-                              check=False)
+        rst_reader = RasterioReader(self.paths, allow_different_shape=self.allow_different_shape,
+                                    fill_value_default=self.fill_value_default,
+                                    stack=self.stack, overview_level=overview_level,
+                                    check=False, rio_env_options=self.rio_env_options,
+                                    use_handle_pool=self.use_handle_pool,
+                                    max_workers=self.max_workers,
+                                    use_block_cache=self.use_block_cache,
+                                    use_metadata_cache=self.use_metadata_cache,
+                                    use_memmap=self.use_memmap,
+                                    metadata=self.metadata)
+
+        if self.window_focus != self.real_window:
+            scale_x = rst_reader.real_width / self.real_width
+            scale_y = rst_reader.real_height / self.real_height
+            window_focus = rasterio.windows.Window(col_off=self.window_focus.col_off * scale_x,
+                                                   row_off=self.window_focus.row_off * scale_y,
+                                                   width=self.window_focus.width * scale_x,
+                                                   height=self.window_focus.height * scale_y)
+            rst_reader.set_window(window_utils.round_outer_window(window_focus), relative=False)
+
+        rst_reader.set_indexes(self.indexes, relative=False)
+        return rst_reader
     
     def block_windows(self, bidx:int=1, time_idx:int=0) -> List[Tuple[int, rasterio.windows.Window]]:
         """
@@ -526,18 +794,170 @@ class RasterioReader:
 
         return windows_return
 
+    def iter_blocks(self, window_size:Optional[Tuple[int, int]]=None, overlap:Union[int, Tuple[int, int]]=0,
+                    prefetch:int=2, boundless:bool=True) -> Iterator[Tuple[rasterio.windows.Window, geotensor.GeoTensor]]:
+        """
+        Iterates over the raster (within `window_focus` and reading only the selected `indexes`) yielding
+        `(window, GeoTensor)` pairs while the next `prefetch` windows are read in a background thread pool.
+        See `read.iter_blocks`.
+
+        Args:
+            window_size: `(height, width)` of the windows. Defaults to the block shape of the raster.
+            overlap: number of pixels of overlap between consecutive windows (int or `(rows, cols)`).
+            prefetch: number of windows read in advance. Defaults to 2.
+            boundless: if `True` windows that go beyond the raster are padded with `self.fill_value_default`.
+
+        Examples:
+            >>> r = RasterioReader("path/to/raster.tif")
+            >>> for window, data in r.iter_blocks(window_size=(512, 512), overlap=32, prefetch=4):
+            >>>     process(data)
+        """
+        return iter_blocks(self, window_size=window_size, overlap=overlap, prefetch=prefetch, boundless=boundless)
+
+    def block_shape(self, bidx:int=1, time_idx:int=0) -> Tuple[int, int]:
+        """
+        Returns the (height, width) of the internal blocks (tiles or strips) of the raster.
+
+        Args:
+            bidx: band index (1-based)
+            time_idx: time index (0-based)
+        """
+        return tuple(self._path_metadata(self.paths[time_idx], self.overview_level)["block_shapes"][bidx - 1])
+
+    def read_windows(self, windows:List[rasterio.windows.Window], boundless:bool=True,
+                     return_report:bool=False) -> Union[List[Optional[geotensor.GeoTensor]],
+                                                         Tuple[List[Optional[geotensor.GeoTensor]], Dict[str, int]]]:
+        """
+        Reads several windows (relative to `self.window_focus`) decoding each block of the raster only once.
+
+        The blocks touched by all the windows are grouped into block-aligned rectangles that are read with one
+        `read` call each. The requested windows are then sliced from those rectangles. This is much faster than calling
+        `read` for each window when the windows overlap or are adjacent (e.g. chips for training data).
+
+        Args:
+            windows: list of windows to read. Windows are rounded to the outer pixel grid.
+            boundless: if `True` the outputs have the shape of the windows (padding with `fill_value_default`).
+                If `False` the windows are intersected with the raster and windows out of the raster return None.
+            return_report: if `True` it also returns a dict with the number of blocks requested
+                (sum over the windows), the number of blocks decoded and the number of reads.
+
+        Returns:
+            List of GeoTensors in the same order as `windows`. If `return_report` a tuple (list, report).
+
+        Examples:
+            >>> r = RasterioReader("path/to/raster.tif")
+            >>> windows = [rasterio.windows.Window(col_off=c, row_off=0, width=64, height=64) for c in range(0, 512, 32)]
+            >>> chips, report = r.read_windows(windows, return_report=True)
+            >>> report # {"blocks_requested": 16, "blocks_decoded": 2, "reads": 1}
+        """
+        block_height, block_width = self.block_shape(self.indexes[0])
+        row_off_focus, col_off_focus = self.window_focus.row_off, self.window_focus.col_off
+
+        # Windows in absolute (self.real_window) coordinates intersected with the raster
+        windows_real = []
+        blocks_needed = set()
+        blocks_requested = 0
+        for window in windows:
+            window = window_utils.round_outer_window(window)
+            window_abs = rasterio.windows.Window(col_off=window.col_off + col_off_focus,
+                                                 row_off=window.row_off + row_off_focus,
+                                                 width=window.width, height=window.height)
+            if not rasterio.windows.intersect([self.real_window, window_abs]):
+                windows_real.append((window, None))
+                continue
+
+            window_int = rasterio.windows.intersection(self.real_window, window_abs)
+            windows_real.append((window, window_int))
+            rows_blocks = range(int(window_int.row_off) // block_height,
+                                (int(window_int.row_off + window_int.height) - 1) // block_height + 1)
+            cols_blocks = range(int(window_int.col_off) // block_width,
+                                (int(window_int.col_off + window_int.width) - 1) // block_width + 1)
+            blocks_requested += len(rows_blocks) * len(cols_blocks)
+            blocks_needed.update((r, c) for r in rows_blocks for c in cols_blocks)
+
+        # Read each block-aligned rectangle once
+        rectangles = []
+        for (r0, r1, c0, c1) in _block_rectangles(blocks_needed):
+            window_rect = rasterio.windows.Window(col_off=c0 * block_width, row_off=r0 * block_height,
+                                                  width=(c1 - c0) * block_width, height=(r1 - r0) * block_height)
+            window_rect = rasterio.windows.intersection(self.real_window, window_rect)
+            window_rect_relative = rasterio.windows.Window(col_off=window_rect.col_off - col_off_focus,
+                                                           row_off=window_rect.row_off - row_off_focus,
+                                                           width=window_rect.width, height=window_rect.height)
+            rectangles.append((window_rect, self.read(window=window_rect_relative, boundless=False)))
+
+        outputs = []
+        for window, window_int in windows_real:
+            if window_int is None:
+                if not boundless:
+                    outputs.append(None)
+                    continue
+                window_out = window
+            elif boundless:
+                window_out = window
+            else:
+                window_out = rasterio.windows.Window(col_off=window_int.col_off - col_off_focus,
+                                                     row_off=window_int.row_off - row_off_focus,
+                                                     width=window_int.width, height=window_int.height)
+
+            shape_out = self.shape[:-2] + (int(window_out.height), int(window_out.width))
+            fill = boundless and ((window_int is None) or (window_int.width != window.width) or
+                                  (window_int.height != window.height))
+            if fill:
+                values = np.full(shape_out, self.fill_value_default, dtype=self.dtype)
+            else:
+                values = np.empty(shape_out, dtype=self.dtype)
+
+            if window_int is not None:
+                row_off_out = window_out.row_off + row_off_focus
+                col_off_out = window_out.col_off + col_off_focus
+                for window_rect, data_rect in rectangles:
+                    if not rasterio.windows.intersect([window_rect, window_int]):
+                        continue
+                    window_copy = rasterio.windows.intersection(window_rect, window_int)
+                    slice_rows_rect = slice(int(window_copy.row_off - window_rect.row_off),
+                                            int(window_copy.row_off - window_rect.row_off + window_copy.height))
+                    slice_cols_rect = slice(int(window_copy.col_off - window_rect.col_off),
+                                            int(window_copy.col_off - window_rect.col_off + window_copy.width))
+                    slice_rows_out = slice(int(window_copy.row_off - row_off_out),
+                                           int(window_copy.row_off - row_off_out + window_copy.height))
+                    slice_cols_out = slice(int(window_copy.col_off - col_off_out),
+                                           int(window_copy.col_off - col_off_out + window_copy.width))
+                    values[..., slice_rows_out, slice_cols_out] = data_rect[..., slice_rows_rect, slice_cols_rect]
+
+            outputs.append(geotensor.GeoTensor(values, transform=rasterio.windows.transform(window_out, self.transform),
+                                               crs=self.crs, fill_value_default=self.fill_value_default))
+
+        if return_report:
+            report = {"blocks_requested": blocks_requested, "blocks_decoded": len(blocks_needed),
+                      "reads": len(rectangles)}
+            return outputs, report
+
+        return outputs
+
     def copy(self) -> '__class__':
         return self.__copy__()
 
-    def load(self, boundless:bool=True) -> geotensor.GeoTensor:
+    def lazy(self) -> Any:
+        """ Returns a `lazy.LazyExpression` to compute band math reading this object window by window (see `georeader.lazy`) """
+        from georeader import lazy
+        return lazy.lazy(self)
+
+    def load(self, boundless:bool=True, max_workers:Optional[int]=None,
+             out:Optional[np.ndarray]=None) -> geotensor.GeoTensor:
         """
         Load all raster in memory in an GeoTensor object
 
+        Args:
+            boundless: if `True` the output has the shape of `self.window_focus` (padding with `fill_value_default`).
+            max_workers: number of threads to read the paths concurrently. Defaults to `self.max_workers`.
+            out: array (or `np.memmap`) of shape `self.shape` to fill in place. The returned GeoTensor wraps it.
+
         Returns:
             GeoTensor (wrapper of numpy array with spatial information)
 
         """
-        np_data = self.read(boundless=boundless)
+        np_data = self.read(boundless=boundless, max_workers=max_workers, out=out)
         if boundless:
             transform = self.transform
         else:
@@ -567,12 +987,7 @@ class RasterioReader:
         return self.read()
 
     def footprint(self, crs:Optional[str]=None) -> Polygon:
-        pol = window_utils.window_polygon(rasterio.windows.Window(row_off=0, col_off=0, height=self.shape[-2], width=self.shape[-1]),
-                                          self.transform)
-        if (crs is None) or window_utils.compare_crs(self.crs, crs):
-            return pol
-
-        return window_utils.polygon_to_crs(pol, self.crs, crs)
+        return window_utils.footprint(self.transform, self.shape[-2:], self.crs, crs)
     
     def meshgrid(self, dst_crs:Optional[Any]=None) -> Tuple[NDArray, NDArray]:
         from georeader import griddata
@@ -590,22 +1005,55 @@ class RasterioReader:
          fill_value_default: {self.fill_value_default}
         """
 
+    @contextmanager
+    def _open(self, path:str, options:Dict[str, Any],
+              call_record:Any=instrumentation._NULL_RECORD) -> Iterator[rasterio.DatasetReader]:
+        """ Opens `path` within a `rasterio.Env` with `options`. Datasets of the handle pool are not closed on exit """
+        with rasterio.Env(**options):
+            if self.use_handle_pool and ("CPL_VSIL_CURL_NON_CACHED" not in options):
+                with call_record.phase("open"):
+                    src = _HANDLE_POOL.get(path, overview_level=self.overview_level, rio_env_options=options,
+                                           call_record=call_record)
+                yield src
+            else:
+                with call_record.phase("open"):
+                    src = rasterio.open(path, "r", overview_level=self.overview_level)
+                call_record.add(datasets_opened=1)
+                with src:
+                    yield src
+
     def read(self, **kwargs) -> np.ndarray:
         """
         Read data from the list of rasters. It reads with boundless=True by default and
         fill_value=self.fill_value_default by default.
 
-        This function is process safe (opens and closes the rasterio object every time is called).
+        This function is process safe (opens and closes the rasterio object every time is called). If
+        `self.use_handle_pool` it reuses the open datasets of the current thread (the pool is invalidated after fork).
 
         For arguments see: https://rasterio.readthedocs.io/en/latest/api/rasterio.io.html#rasterio.io.DatasetReader.read
 
+        Extra arguments:
+            max_workers: number of threads to read the paths concurrently. Defaults to `self.max_workers`.
+            executor: `concurrent.futures.Executor` to submit the reads of each path. If provided `max_workers`
+                is ignored. The executor is not shut down.
+            out: array (or `np.memmap`) with the shape of the output to fill in place. If provided it is returned.
+                The data is cast to `out.dtype`.
+
         Returns:
             if self.stack:
                 4D np.ndarray with shape (len(paths), C, H, W)
             if self.stack is False:
                 3D np.ndarray with shape (len(paths)*C, H, W)
+            if `indexes` is an int the band dimension is dropped.
         """
+        with instrumentation.record("RasterioReader.read") as call_record:
+            obj_out = self._read(call_record, **kwargs)
+            if obj_out is not None:
+                call_record.add(output_nbytes=obj_out.nbytes)
+        return obj_out
 
+    def _read(self, call_record:Any, **kwargs) -> np.ndarray:
+        """ Implementation of `read`. The phases and counters of the call are added to `call_record` """
         if ("window" in kwargs) and kwargs["window"] is not None:
             window_read = kwargs["window"]
             if isinstance(window_read, tuple):
@@ -626,6 +1074,12 @@ class RasterioReader:
         else:
             read_with_CPL_VSIL_CURL_NON_CACHED = False
 
+        max_workers = kwargs.pop("max_workers", None)
+        if max_workers is None:
+            max_workers = self.max_workers
+        executor = kwargs.pop("executor", None)
+        out = kwargs.pop("out", None)
+
         if "boundless" not in kwargs:
             kwargs["boundless"] = True
 
@@ -665,11 +1119,25 @@ class RasterioReader:
         else:
             spatial_shape = (window.height, window.width)
 
-        shape = (len(self.paths), n_bands_read) + spatial_shape
+        n_paths = len(self.paths)
+        if flat_channels:
+            if self.stack or (n_paths > 1):
+                shape = (n_paths, ) + spatial_shape
+            else:
+                shape = spatial_shape
+        elif self.stack:
+            shape = (n_paths, n_bands_read) + spatial_shape
+        else:
+            shape = (n_paths * n_bands_read, ) + spatial_shape
 
-        obj_out = np.full(shape, kwargs["fill_value"], dtype=self.dtype)
-        if rasterio.windows.intersect([self.real_window, window]):
-            pad = None
+        # The data of each path is written in its slice of obj_out with rasterio (out= argument).
+        # out_shape is given by the shape of that slice.
+        kwargs.pop("out_shape", None)
+
+        intersects = rasterio.windows.intersect([self.real_window, window])
+        pad = None
+        need_pad = False
+        if intersects:
             if kwargs["boundless"]:
                 slice_, pad = get_slice_pad(self.real_window, window)
                 need_pad = any(x != 0 for x in pad["x"] + pad["y"])
@@ -677,7 +1145,7 @@ class RasterioReader:
                 #  read and pad instead of using boundless attribute when transform is not rectilinear (otherwise rasterio fails!)
                 if (abs(self.real_transform.b) > 1e-6) or (abs(self.real_transform.d) > 1e-6):
                     if need_pad:
-                        assert kwargs.get("out_shape", None) is None, "out_shape not compatible with boundless and non rectilinear transform!"
+                        assert spatial_shape == (window.height, window.width), "out_shape not compatible with boundless and non rectilinear transform!"
                         kwargs["window"] = rasterio.windows.Window.from_slices(slice_["y"], slice_["x"])
                         kwargs["boundless"] = False
                     else:
@@ -686,8 +1154,62 @@ class RasterioReader:
                     #  if transform is rectilinear read boundless if needed
                     kwargs["boundless"] = need_pad
                     pad = None
+            else:
+                kwargs["window"] = window
+
+        # Reads with no extra rasterio arguments can be served without GDAL decoding the blocks: from the
+        # memory map of uncompressed GeoTIFFs (reads at native resolution) or from the decoded blocks of the block
+        # cache (reads at native resolution or decimated reads within the raster)
+        direct_read = intersects and (not read_with_CPL_VSIL_CURL_NON_CACHED) and \
+                      block_cache._is_integer_window(window) and \
+                      (set(kwargs.keys()) <= {"window", "boundless", "fill_value", "indexes"})
+        use_memmap = self.use_memmap and direct_read and (self.overview_level is None) and \
+                     (spatial_shape == (window.height, window.width))
+        use_block_cache = self.use_block_cache and direct_read
+        need_pad_direct = False
+        if use_memmap or use_block_cache:
+            slice_direct, pad_direct = get_slice_pad(self.real_window, window)
+            window_direct = rasterio.windows.Window.from_slices(slice_direct["y"], slice_direct["x"])
+            need_pad_direct = any(x != 0 for x in pad_direct["x"] + pad_direct["y"])
+            use_block_cache = use_block_cache and ((spatial_shape == (window.height, window.width)) or not need_pad_direct)
+
+        if use_memmap and (out is None) and (n_paths == 1) and not need_pad_direct:
+            tiff = tiff_memmap.open_tiff_memmap(self.paths[0])
+            if tiff is not None:
+                # View of the memory map (copy-on-write) for striped rasters
+                with call_record.phase("read"):
+                    data = tiff.read(window_direct, kwargs["indexes"]).reshape(shape)
+                call_record.add(bytes_read=data.nbytes)
+                return data
+
+        # Only the padded areas of non rectilinear rasters (or windows that do not intersect the data)
+        # are not written by rasterio.
+        needs_fill = (not intersects) or ((pad is not None) and need_pad) or \
+                     ((use_memmap or use_block_cache) and need_pad_direct)
+
+        if out is None:
+            if needs_fill:
+                obj_out = np.full(shape, kwargs["fill_value"], dtype=self.dtype)
+            else:
+                obj_out = np.empty(shape, dtype=self.dtype)
+        else:
+            assert tuple(out.shape) == shape, f"Expected out with shape {shape} found {out.shape}"
+            obj_out = out
+            if needs_fill:
+                obj_out[...] = kwargs["fill_value"]
+
+        def target_path(i:int) -> np.ndarray:
+            """ View of obj_out (3D: bands, y, x) where the data of path i is written """
+            if flat_channels:
+                if obj_out.ndim == 2:
+                    return obj_out[np.newaxis]
+                return obj_out[i:(i+1)]
+            if self.stack:
+                return obj_out[i]
+            return obj_out[(i * n_bands_read):((i + 1) * n_bands_read)]
 
-            for i, p in enumerate(self.paths):
+        if intersects:
+            def read_path(i:int, p:str) -> None:
                 options = self.rio_env_options.copy()
                 if read_with_CPL_VSIL_CURL_NON_CACHED:
                     options["CPL_VSIL_CURL_NON_CACHED"] = _vsi_path(p)
@@ -696,40 +1218,103 @@ class RasterioReader:
                         options["CPL_VSIL_CURL_NON_CACHED"] = _vsi_path(p)
                     del options["read_with_CPL_VSIL_CURL_NON_CACHED"]
 
-                with rasterio.Env(**options):
-                    with rasterio.open(p, "r", overview_level=self.overview_level) as src:
+                obj_out_path = target_path(i)
+                # Add pad when reading
+                if pad is not None and need_pad:
+                    slice_y = slice(pad["y"][0], -pad["y"][1] if pad["y"][1] !=0 else None)
+                    slice_x = slice(pad["x"][0], -pad["x"][1] if pad["x"][1] !=0 else None)
+                    obj_out_path = obj_out_path[:, slice_y, slice_x]
+
+                if use_memmap or use_block_cache:
+                    obj_out_direct = target_path(i)[:, slice(pad_direct["y"][0], obj_out.shape[-2] - pad_direct["y"][1]),
+                                                       slice(pad_direct["x"][0], obj_out.shape[-1] - pad_direct["x"][1])]
+
+                if use_memmap:
+                    tiff = tiff_memmap.open_tiff_memmap(p)
+                    if tiff is not None:
+                        with call_record.phase("read"):
+                            obj_out_direct[...] = tiff.read(window_direct, kwargs["indexes"])
+                        call_record.add(bytes_read=obj_out_direct.nbytes)
+                        return
+
+                with self._open(p, options, call_record=call_record) as src:
+                    with call_record.phase("read"):
+                        # The signature of the file is part of the key: blocks of rewritten files are not reused
+                        if use_block_cache and block_cache.read_window_cached(src, (p, self.overview_level,
+                                                                                   metadata_cache.cached_file_signature(p)),
+                                                                              kwargs["indexes"], window_direct,
+                                                                              obj_out_direct):
+                            call_record.add(bytes_read=obj_out_direct.nbytes)
+                            return
+
                         # rasterio.read API: https://rasterio.readthedocs.io/en/latest/api/rasterio.io.html#rasterio.io.DatasetReader.read
-                        read_data = src.read(**kwargs)
+                        src.read(out=obj_out_path, **kwargs)
+                    call_record.add(bytes_read=obj_out_path.nbytes)
 
-                        # Add pad when reading
-                        if pad is not None and need_pad:
-                            slice_y = slice(pad["y"][0], -pad["y"][1] if pad["y"][1] !=0 else None)
-                            slice_x = slice(pad["x"][0], -pad["x"][1] if pad["x"][1] !=0 else None)
-                            obj_out[i, :, slice_y, slice_x] = read_data
-                        else:
-                            obj_out[i] = read_data
-                            # pad_list_np = _get_pad_list(pad)
-                        #
-                        # read_data = np.pad(read_data, tuple(pad_list_np), mode="constant",
-                        #                    constant_values=self.fill_value_default)
+            _map_paths(read_path, self.paths, max_workers=max_workers, executor=executor)
 
+        return obj_out
+    
+    def read_warped(self, dst_crs:Any, dst_transform:rasterio.Affine, shape:Tuple[int, int],
+                    resampling:rasterio.warp.Resampling=rasterio.warp.Resampling.cubic_spline,
+                    dst_nodata:Optional[Union[int, float]]=None, num_threads:int=1,
+                    max_workers:Optional[int]=None, out:Optional[np.ndarray]=None) -> np.ndarray:
+        """
+        Reprojects the rasters to the grid (`dst_crs`, `dst_transform`, `shape`) with `rasterio.vrt.WarpedVRT`.
+        GDAL only reads the blocks of the rasters that are needed for each block of the output.
 
+        The rasters are warped as a whole: data outside `self.window_focus` is not masked. See
+        `read.read_reproject` with `use_warped_vrt=True` for a function that takes care of that.
 
-        if flat_channels:
-            obj_out = obj_out[:, 0]
+        Args:
+            dst_crs: crs of the output.
+            dst_transform: transform of the output.
+            shape: spatial shape (height, width) of the output.
+            resampling: resampling method. Defaults to cubic_spline.
+            dst_nodata: nodata value of the output. Defaults to `self.fill_value_default`.
+            num_threads: number of threads of the GDAL warper. Defaults to 1.
+            max_workers: number of threads to read the paths concurrently. Defaults to `self.max_workers`.
+            out: array with the shape of the output to fill in place. If provided it is returned.
 
-        if not self.stack:
-            if obj_out.shape[0] == 1:
-                obj_out = obj_out[0]
-            else:
-                obj_out = np.concatenate([obj_out[i] for i in range(obj_out.shape[0])],
-                                         axis=0)
+        Returns:
+            np.ndarray with shape `self.shape[:-2] + shape`.
+        """
+        if dst_nodata is None:
+            dst_nodata = self.fill_value_default
+        if max_workers is None:
+            max_workers = self.max_workers
+
+        shape_out = tuple(self.shape[:-2]) + tuple(shape)
+        if out is None:
+            out = np.empty(shape_out, dtype=self.dtype)
+        assert tuple(out.shape) == shape_out, f"Expected out with shape {shape_out} found {out.shape}"
+
+        with instrumentation.record("RasterioReader.read_warped") as call_record:
+            def read_path(i:int, p:str) -> None:
+                options = self.rio_env_options.copy()
+                options.pop("read_with_CPL_VSIL_CURL_NON_CACHED", None)
+                if self.stack:
+                    out_path = out[i]
+                else:
+                    out_path = out[(i * self.count):((i + 1) * self.count)]
+
+                with self._open(p, options, call_record=call_record) as src:
+                    with call_record.phase("warp"):
+                        with rasterio.vrt.WarpedVRT(src, crs=dst_crs, transform=dst_transform,
+                                                    width=shape[1], height=shape[0], resampling=resampling,
+                                                    src_nodata=self.fill_value_default, nodata=dst_nodata,
+                                                    warp_extras={"NUM_THREADS": num_threads}) as vrt:
+                            vrt.read(indexes=self.indexes, out=out_path)
+
+            _map_paths(read_path, self.paths, max_workers=max_workers)
+            call_record.add(output_nbytes=out.nbytes)
+
+        return out
 
-        return obj_out
-    
     def read_from_tile(self, x:int, y:int, z:int, 
                        out_shape:Tuple[int,int]=(SIZE_DEFAULT, SIZE_DEFAULT),
-                       dst_crs:Optional[Any]=WEB_MERCATOR_CRS) -> geotensor.GeoTensor:
+                       dst_crs:Optional[Any]=WEB_MERCATOR_CRS,
+                       overview_strategy:str="off") -> geotensor.GeoTensor:
         """
         Read a web mercator tile from a raster.
         
@@ -741,13 +1326,15 @@ class RasterioReader:
             z (int): z coordinate of the tile in the TMS system.
             out_shape (Tuple[int,int]: size of the tile to read. Defaults to (read.SIZE_DEFAULT, read.SIZE_DEFAULT).
             dst_crs (Optional[Any], optional): CRS of the output tile. Defaults to read.WEB_MERCATOR_CRS.
+            overview_strategy (str, optional): strategy to select the overview to read from (see 
+                `read.select_overview_level`). Defaults to "off" (reads the full resolution data).
             
         Returns:
             geotensor.GeoTensor: geotensor with the tile data.
         """
         window = window_from_tile(self, x, y, z)
         window = window_utils.round_outer_window(window)
-        data = read_out_shape(self, out_shape=out_shape, window=window)
+        data = read_out_shape(self, out_shape=out_shape, window=window, overview_strategy=overview_strategy)
 
         if window_utils.compare_crs(self.crs, dst_crs):
             return data
@@ -755,9 +1342,77 @@ class RasterioReader:
         # window = window_utils.pad_window(window, (1, 1))
         # data = read_out_shape(self, out_shape=size_out, window=window)
 
-        return read_from_tile(data, x, y, z, dst_crs=dst_crs, out_shape=out_shape)
+        output = read_from_tile(data, x, y, z, dst_crs=dst_crs, out_shape=out_shape)
+        if overview_strategy != "off":
+            output.overview_level = data.overview_level
+        return output
         
 
+def _map_paths(func, paths:List[str], max_workers:Optional[int]=None,
+               executor:Optional[Executor]=None) -> None:
+    """
+    Calls `func(i, path)` for each path. If `executor` is given or `max_workers > 1` the calls are submitted to a
+    thread pool. Exceptions are propagated in the order of `paths`.
+    """
+    if (executor is None) and ((max_workers is None) or (max_workers <= 1) or (len(paths) <= 1)):
+        for i, p in enumerate(paths):
+            func(i, p)
+        return
+
+    if executor is not None:
+        futures = [executor.submit(func, i, p) for i, p in enumerate(paths)]
+        for f in futures:
+            f.result()
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        futures = [pool.submit(func, i, p) for i, p in enumerate(paths)]
+        for f in futures:
+            f.result()
+
+
+def _block_rectangles(blocks:set) -> List[Tuple[int, int, int, int]]:
+    """
+    Groups a set of (block_row, block_col) indexes into rectangles (row_start, row_end, col_start, col_end)
+    (end excluded) that cover each block exactly once. Consecutive blocks in a row are merged into runs and runs
+    with the same columns in consecutive rows are merged into rectangles.
+    """
+    cols_by_row = {}
+    for r, c in blocks:
+        cols_by_row.setdefault(r, []).append(c)
+
+    runs_by_row = {}
+    for r, cols in cols_by_row.items():
+        cols = sorted(cols)
+        runs = []
+        start = prev = cols[0]
+        for c in cols[1:]:
+            if c != prev + 1:
+                runs.append((start, prev + 1))
+                start = c
+            prev = c
+        runs.append((start, prev + 1))
+        runs_by_row[r] = runs
+
+    rectangles = []
+    open_rectangles = {}  # (col_start, col_end) -> row_start
+    prev_row = None
+    for r in sorted(runs_by_row):
+        runs = set(runs_by_row[r])
+        for run in list(open_rectangles):
+            if (prev_row != r - 1) or (run not in runs):
+                rectangles.append((open_rectangles.pop(run), prev_row + 1) + run)
+        for run in runs:
+            if run not in open_rectangles:
+                open_rectangles[run] = r
+        prev_row = r
+
+    for run, row_start in open_rectangles.items():
+        rectangles.append((row_start, prev_row + 1) + run)
+
+    return rectangles
+
+
 def _get_pad_list(pad_width:Dict[str,Tuple[int,int]]):
     pad_list_np = [(0, 0)]
     for k in ["y", "x"]:
@@ -773,7 +1428,10 @@ def read_out_shape(reader:Union[RasterioReader, rasterio.DatasetReader],
                    indexes:Optional[Union[List[int], int]]=None,
                    window:Optional[rasterio.windows.Window]=None,
                    out_shape:Optional[Tuple[int, int]]=None,
-                   fill_value_default:int=0) -> geotensor.GeoTensor:
+                   fill_value_default:int=0,
+                   max_workers:Optional[int]=None,
+                   out:Optional[np.ndarray]=None,
+                   overview_strategy:str="off") -> geotensor.GeoTensor:
     """
     Reads data using the `out_shape` param of rasterio. This allows to read from the pyramids if the file is a COG.
     This function returns an xarray with the data with its geographic metadata.
@@ -786,6 +1444,12 @@ def read_out_shape(reader:Union[RasterioReader, rasterio.DatasetReader],
         out_shape: shape of the output to be readed. Conceptually, the function resizes the output to this shape
         fill_value_default: if the object is rasterio.DatasetReader and nodata is None it will use this value for the
             corresponding GeoTensor
+        max_workers: if reader is a RasterioReader, number of threads to read its paths concurrently.
+        out: array to fill in place with the output. If provided `out_shape` must match its spatial shape.
+        overview_strategy: if reader is a RasterioReader, selects explicitly the overview to read from with this
+            strategy (see `read.select_overview_level`). Defaults to "off": a RasterioReader opens the full
+            resolution raster and GDAL decimates it to `out_shape`. The selected level is stored in the
+            `overview_level` attribute of the output.
 
     Returns:
         GeoTensor with geo metadata
@@ -812,11 +1476,41 @@ def read_out_shape(reader:Union[RasterioReader, rasterio.DatasetReader],
     input_output_factor = (shape[0] / out_shape[-2], shape[1] / out_shape[-1])    
     transform = transform * rasterio.Affine.scale(input_output_factor[1], input_output_factor[0])
 
-    output = reader.read(indexes=indexes, out_shape=out_shape, window=window)
-
-    return geotensor.GeoTensor(output, transform=transform,
-                               crs=reader.crs, fill_value_default=getattr(reader, "fill_value_default",
-                                                                          reader.nodata if reader.nodata else fill_value_default))
+    overview_level = None
+    if isinstance(reader, RasterioReader):
+        reader_read, window_read = reader, window
+        if overview_strategy != "off":
+            overview_level = select_overview_level(reader, float(np.sqrt(input_output_factor[0] * input_output_factor[1])),
+                                                   overview_strategy)
+            if overview_level is not None:
+                reader_read = reader.reader_overview(overview_level)
+                window_read = _window_to_reader(rasterio.windows.Window(0, 0, width=shape[1], height=shape[0]) if window is None else window,
+                                                reader, reader_read)
+
+        output = reader_read.read(indexes=indexes, out_shape=out_shape, window=window_read, max_workers=max_workers,
+                                  out=out)
+    elif out is not None:
+        assert tuple(out.shape[-2:]) == tuple(out_shape[-2:]), f"Expected out with spatial shape {out_shape} found {out.shape}"
+        output = reader.read(indexes=indexes, out=out, window=window)
+    else:
+        output = reader.read(indexes=indexes, out_shape=out_shape, window=window)
+
+    output = geotensor.GeoTensor(output, transform=transform,
+                                 crs=reader.crs, fill_value_default=getattr(reader, "fill_value_default",
+                                                                            reader.nodata if reader.nodata else fill_value_default))
+    if overview_strategy != "off":
+        output.overview_level = overview_level
+    return output
+
+
+def _window_to_reader(window:rasterio.windows.Window, reader:RasterioReader,
+                      reader_dst:RasterioReader) -> rasterio.windows.Window:
+    """ Converts a window relative to `reader` to a (possibly fractional) window relative to `reader_dst` """
+    pixel_to_pixel = ~reader_dst.transform * reader.transform
+    col_off, row_off = pixel_to_pixel * (window.col_off, window.row_off)
+    col_end, row_end = pixel_to_pixel * (window.col_off + window.width, window.row_off + window.height)
+    return rasterio.windows.Window(col_off=col_off, row_off=row_off,
+                                   width=col_end - col_off, height=row_end - row_off)
 
 
 
@@ -5,16 +5,20 @@ import rasterio.features
 import numbers
 import numpy as np
 from math import ceil, copysign
-from typing import Tuple, Union, Optional, Dict, Any
-from collections import OrderedDict
+from typing import Tuple, Union, Optional, Dict, Any, List, Iterator
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import itertools
 from georeader.geotensor import GeoTensor
 from georeader import window_utils
 from georeader.window_utils import PIXEL_PRECISION, pad_window, round_outer_window, _is_exact_round
 from georeader.abstract_reader import GeoData
-from itertools import product
+from georeader.slices import create_windows
+from georeader import instrumentation
+from georeader import warp_plan
 from shapely.geometry import Polygon, MultiPolygon
 import mercantile
+import shapely
 from shapely.geometry import box
 import rasterio.transform
 import rasterio.rpc
@@ -23,6 +27,27 @@ from numpy.typing import NDArray
 
 SIZE_DEFAULT = 256
 WEB_MERCATOR_CRS = "EPSG:3857"
+OVERVIEW_STRATEGIES = ("off", "nearest-coarser", "strictly-finer")
+# Ways of returning the parts of a MultiPolygon read separately (see `read_from_polygon`)
+POLYGON_PARTS_MODES = ("list", "assemble")
+
+# Memory limit (in MB) of the GDAL warper when it is not set (GDAL default). Larger warps are split in chunks.
+GDAL_WARP_MEMORY_LIMIT = 64
+# Maximum memory (in MB) of the buffers of a multi-band warp in `read_reproject`
+WARP_MULTIBAND_MEMORY_LIMIT = 512
+# Default memory budget (in MB) of the tiles processed concurrently by `read_reproject_chunked`
+CHUNKED_MEMORY_BUDGET_DEFAULT = 1024
+# Number of chips read together (with one `read_windows` call) by `read_chips`
+CHIPS_BATCH_SIZE = 256
+# Resampling methods that `resize` computes with block reductions (downsampling) or by replicating the
+# pixels (upsampling) if the resolution changes by an integer factor
+RESIZE_BLOCK_METHODS = {
+    rasterio.warp.Resampling.nearest: "nearest",
+    rasterio.warp.Resampling.average: "mean",
+    rasterio.warp.Resampling.mode: "mode",
+    rasterio.warp.Resampling.min: "min",
+    rasterio.warp.Resampling.max: "max"
+}
 
 
 def _round_all(x):
@@ -34,8 +59,8 @@ def _transform_from_crs(center_coords:Tuple[float, float], crs_input:Union[Dict[
                        crs_output:Union[Dict[str,str],str]) -> Tuple[float, float]:
     """ Transforms a coordinate tuple from crs_input to crs_output """
 
-    coords_transformed = rasterio.warp.transform(crs_input, crs_output, [center_coords[0]], [center_coords[1]])
-    return coords_transformed[0][0], coords_transformed[1][0]
+    xs, ys = window_utils.transform_coords(crs_input, crs_output, [center_coords[0]], [center_coords[1]])
+    return float(xs[0]), float(ys[0])
 
 
 def window_from_polygon(data_in: Union[GeoData, rasterio.DatasetReader],
@@ -156,6 +181,131 @@ def window_from_center_coords(data_in: Union[GeoData, rasterio.DatasetReader],
     return window
 
 
+def _geometries_array(geometries:Any) -> np.ndarray:
+    """ Object array with the shapely geometries of a `GeoDataFrame`, `GeoSeries` or sequence of geometries """
+    return np.asarray(getattr(geometries, "geometry", geometries), dtype=object)
+
+
+def windows_from_bounds(data_in: Union[GeoData, rasterio.DatasetReader], bounds:Union[NDArray, Any],
+                        crs_bounds:Optional[Any]=None) -> NDArray:
+    """
+    Vectorised `window_from_bounds`: computes the windows to read in `data_in` from an array of bounds.
+
+    Args:
+        data_in: Reader with crs and transform attributes
+        bounds: array of shape `(N, 4)` with `(minx, miny, maxx, maxy)` bounds or array of shapely geometries
+            (the bounds of the geometries are used).
+        crs_bounds: Optional coordinate reference system of the bounds. If not provided assumes same crs as `data_in`
+
+    Returns:
+        float array of shape `(N, 4)` with the `(row_off, col_off, height, width)` of the windows relative to `data_in`.
+        Use `window_utils.round_outer_windows` to round them as `read_from_window` does.
+    """
+    bounds = np.asarray(bounds)
+    if bounds.dtype == object:
+        bounds = shapely.bounds(bounds)
+    bounds = bounds.astype(np.float64).reshape(-1, 4)
+
+    if (crs_bounds is not None) and not window_utils.compare_crs(crs_bounds, data_in.crs):
+        bounds = window_utils.transform_bounds(crs_bounds, data_in.crs, bounds)
+
+    # Pixel coordinates of the corners (same as rasterio.windows.from_bounds)
+    minx, miny, maxx, maxy = bounds[:, 0:1], bounds[:, 1:2], bounds[:, 2:3], bounds[:, 3:4]
+    xs = np.concatenate([minx, maxx, maxx, minx], axis=1)
+    ys = np.concatenate([maxy, maxy, miny, miny], axis=1)
+    inv = ~data_in.transform
+    cols = inv.a * xs + inv.b * ys + inv.c
+    rows = inv.d * xs + inv.e * ys + inv.f
+
+    row_off, col_off = np.min(rows, axis=1), np.min(cols, axis=1)
+    height = np.maximum(np.max(rows, axis=1) - row_off, 0.)
+    width = np.maximum(np.max(cols, axis=1) - col_off, 0.)
+    return np.stack([row_off, col_off, height, width], axis=1)
+
+
+def windows_from_polygons(data_in: Union[GeoData, rasterio.DatasetReader], polygons:Any,
+                          crs_polygons:Optional[Any]=None, window_surrounding:bool=False) -> NDArray:
+    """
+    Vectorised `window_from_polygon`: computes the windows that surround an array of polygons.
+
+    Args:
+        data_in: Reader with crs and transform attributes
+        polygons: array of shapely Polygons or MultiPolygons (or `GeoDataFrame`, `GeoSeries`).
+        crs_polygons: Optional coordinate reference system of the polygons. If not provided assumes same crs as `data_in`
+        window_surrounding: The windows surround the polygons. (i.e. row_off + height will not be a vertex)
+
+    Returns:
+        float array of shape `(N, 4)` with the `(row_off, col_off, height, width)` of the windows relative to `data_in`.
+        Use `window_utils.round_outer_windows` to round them as `read_from_window` does.
+    """
+    polygons = _geometries_array(polygons).reshape(-1)
+    type_ids = shapely.get_type_id(polygons)
+    if not np.all((type_ids == 3) | (type_ids == 6)):
+        raise NotImplementedError(f"Received shapes of type different from {Polygon} or {MultiPolygon}")
+
+    # Coordinates of the exterior rings of all the parts with the index of their polygon
+    parts, parts_index = shapely.get_parts(polygons, return_index=True)
+    coords, rings_index = shapely.get_coordinates(shapely.get_exterior_ring(parts), return_index=True)
+    index = parts_index[rings_index]
+    xs, ys = coords[:, 0], coords[:, 1]
+    if (crs_polygons is not None) and not window_utils.compare_crs(crs_polygons, data_in.crs):
+        xs, ys = window_utils.transform_coords(crs_polygons, data_in.crs, xs, ys)
+
+    inv = ~data_in.transform
+    cols = inv.a * xs + inv.b * ys + inv.c
+    rows = inv.d * xs + inv.e * ys + inv.f
+
+    n = len(polygons)
+    row_off, col_off = np.full(n, np.inf), np.full(n, np.inf)
+    row_max, col_max = np.full(n, -np.inf), np.full(n, -np.inf)
+    np.minimum.at(row_off, index, rows)
+    np.minimum.at(col_off, index, cols)
+    np.maximum.at(row_max, index, rows)
+    np.maximum.at(col_max, index, cols)
+    if window_surrounding:
+        row_max += 1
+        col_max += 1
+
+    return np.stack([row_off, col_off, row_max - row_off, col_max - col_off], axis=1)
+
+
+def windows_from_center_coords(data_in: Union[GeoData, rasterio.DatasetReader], center_coords:Union[NDArray, Any],
+                               shape:Tuple[int, int], crs_center_coords:Optional[Any]=None) -> NDArray:
+    """
+    Vectorised `window_from_center_coords`: computes the windows of shape `shape` centered on an array of
+    coordinates.
+
+    Args:
+        data_in: Reader with crs and transform attributes
+        center_coords: array of shape `(N, 2)` with the `(x, y)` center coords or array of shapely geometries
+            (the centroids of the geometries are used).
+        shape: Tuple with shape to read (H, W) format
+        crs_center_coords: Optional coordinate reference system of the coords. If not provided assumes same crs as `data_in`
+
+    Returns:
+        int64 array of shape `(N, 4)` with the `(row_off, col_off, height, width)` of the windows relative to `data_in`.
+    """
+    center_coords = np.asarray(center_coords)
+    if center_coords.dtype == object:
+        center_coords = shapely.get_coordinates(shapely.centroid(center_coords.reshape(-1)))
+    center_coords = center_coords.astype(np.float64).reshape(-1, 2)
+
+    xs, ys = center_coords[:, 0], center_coords[:, 1]
+    if (crs_center_coords is not None) and not window_utils.compare_crs(crs_center_coords, data_in.crs):
+        xs, ys = window_utils.transform_coords(crs_center_coords, data_in.crs, xs, ys)
+
+    inv = ~data_in.transform
+    cols = inv.a * xs + inv.b * ys + inv.c
+    rows = inv.d * xs + inv.e * ys + inv.f
+
+    # np.round rounds half to even as the builtin round of _round_all
+    windows = np.empty((len(xs), 4), dtype=np.int64)
+    windows[:, 0] = np.round(rows - shape[0] / 2)
+    windows[:, 1] = np.round(cols - shape[1] / 2)
+    windows[:, 2:] = shape
+    return windows
+
+
 def window_from_tile(data_in: Union[GeoData, rasterio.DatasetReader],
                      x:int, y:int, z:int) -> rasterio.windows.Window:
     """
@@ -178,6 +328,58 @@ def window_from_tile(data_in: Union[GeoData, rasterio.DatasetReader],
                                window_surrounding=True)
 
 
+def select_overview_level(data_in:GeoData, downsampling_factor:float,
+                          overview_strategy:str="strictly-finer") -> Optional[int]:
+    """
+    Selects the overview level of `data_in` to read data that is going to be downsampled by `downsampling_factor`.
+    `data_in` must implement the `overviews()` and `reader_overview()` methods (e.g. `RasterioReader`), otherwise
+    it returns None.
+
+    Args:
+        data_in: reader with overviews.
+        downsampling_factor: ratio between the destination resolution and the resolution of `data_in` (e.g. 8
+            if the destination pixels are 8 times larger than the pixels of `data_in`).
+        overview_strategy: one of `OVERVIEW_STRATEGIES`:
+            * "off": never use the overviews.
+            * "nearest-coarser": the finest overview that is as coarse as the destination resolution (or the
+                coarsest overview if none is). Reads the fewest bytes.
+            * "strictly-finer": the coarsest overview that is not coarser than the destination resolution. The
+                resampling never works with data coarser than the output.
+
+    Returns:
+        0-based overview level or None if the full resolution data should be read.
+    """
+    assert overview_strategy in OVERVIEW_STRATEGIES, \
+        f"Unknown overview_strategy {overview_strategy}. Expected one of {OVERVIEW_STRATEGIES}"
+
+    if (overview_strategy == "off") or (downsampling_factor <= 1) or not hasattr(data_in, "reader_overview"):
+        return None
+
+    # Overview levels are relative to the full resolution raster
+    if getattr(data_in, "overview_level", None) is not None:
+        return None
+
+    factors = data_in.overviews()
+    if len(factors) == 0:
+        return None
+
+    if overview_strategy == "strictly-finer":
+        levels = [i for i, f in enumerate(factors) if f <= downsampling_factor * (1 + 1e-6)]
+        return levels[-1] if len(levels) > 0 else None
+
+    levels = [i for i, f in enumerate(factors) if f >= downsampling_factor * (1 - 1e-6)]
+    return levels[0] if len(levels) > 0 else len(factors) - 1
+
+
+def _downsampling_factor(data_in:GeoData, polygon_dst:Polygon, crs_dst:Any,
+                         window_out:rasterio.windows.Window) -> float:
+    """ Ratio between the size of the pixels of `window_out` (that covers `polygon_dst`) and the pixels of `data_in` """
+    polygon_in = window_utils.polygon_to_crs(polygon_dst, crs_dst, data_in.crs)
+    area_pixel_out = polygon_in.area / (window_out.width * window_out.height)
+    area_pixel_in = abs(data_in.transform.determinant)
+    return float(np.sqrt(area_pixel_out / area_pixel_in))
+
+
 def read_from_window(data_in: GeoData,
                      window: rasterio.windows.Window, return_only_data: bool = False,
                      trigger_load: bool = False,
@@ -237,6 +439,109 @@ def read_from_window(data_in: GeoData,
     return data_sel
 
 
+def read_from_windows(data_in: GeoData, windows: List[rasterio.windows.Window],
+                      return_only_data: bool = False,
+                      boundless: bool = True) -> List[Union[GeoTensor, np.ndarray, None]]:
+    """
+    Reads several windows from `data_in`. If `data_in` implements `read_windows` (e.g. `RasterioReader`) the windows
+    are read together decoding each block of the raster only once; otherwise each window is read with
+    `read_from_window` and loaded.
+
+    Args:
+        data_in: GeoData with "x" and "y" coordinates
+        windows: list of windows to read.
+        return_only_data: defaults to `False`. If `True` it returns np.ndarrays otherwise GeoTensors.
+        boundless: if `True` data read will always have the shape of the provided window
+            (padding with `fill_value_default`)
+
+    Returns:
+        List of GeoTensors (or np.ndarrays) in the same order as `windows`.
+    """
+    if hasattr(data_in, "read_windows"):
+        data_sel = data_in.read_windows(windows, boundless=boundless)
+    else:
+        data_sel = [read_from_window(data_in, window, trigger_load=True, boundless=boundless) for window in windows]
+
+    if return_only_data:
+        return [d if d is None else np.asanyarray(d.values) for d in data_sel]
+
+    return data_sel
+
+
+def iter_blocks(data_in: GeoData, window_size:Optional[Tuple[int, int]]=None,
+                overlap:Union[int, Tuple[int, int]]=0, prefetch:int=2, boundless:bool=True,
+                include_incomplete:bool=True, start_negative_if_padding:bool=False,
+                trim_incomplete:bool=True) -> Iterator[Tuple[rasterio.windows.Window, GeoTensor]]:
+    """
+    Iterates over `data_in` in windows of `window_size` yielding `(window, GeoTensor)` pairs in row order. The next
+    `prefetch` windows are read in a background thread pool while the current one is processed.
+
+    The windows are created with `slices.create_windows` and they are relative to `data_in` (i.e. to the
+    `window_focus` of a `RasterioReader`). Only the selected bands of `data_in` are read.
+
+    Args:
+        data_in: GeoData with "x" and "y" coordinates
+        window_size: `(height, width)` of the windows. Defaults to the block shape of `data_in` if it has the
+            `block_shape` method (e.g. `RasterioReader`) otherwise to `(SIZE_DEFAULT, SIZE_DEFAULT)`.
+        overlap: number of pixels of overlap between consecutive windows (int or `(rows, cols)`).
+        prefetch: number of windows read in advance. 0 reads each window when it is requested.
+        boundless: if `True` windows that go beyond `data_in` are padded with `fill_value_default`.
+        include_incomplete: see `slices.create_windows`.
+        start_negative_if_padding: see `slices.create_windows`.
+        trim_incomplete: see `slices.create_windows`.
+
+    Yields:
+        Tuple with the window and the GeoTensor with the data of the window.
+
+    Examples:
+        >>> r = RasterioReader("path/to/raster.tif")
+        >>> for window, data in iter_blocks(r, window_size=(512, 512), overlap=32, prefetch=4):
+        >>>     process(data)
+    """
+    if window_size is None:
+        if hasattr(data_in, "block_shape"):
+            window_size = data_in.block_shape()
+        else:
+            window_size = (SIZE_DEFAULT, SIZE_DEFAULT)
+
+    if isinstance(overlap, numbers.Number):
+        overlap = (overlap, overlap)
+
+    windows = create_windows(data_in.shape[-2:], window_size=window_size, overlap=overlap,
+                             include_incomplete=include_incomplete,
+                             start_negative_if_padding=start_negative_if_padding,
+                             trim_incomplete=trim_incomplete)
+
+    def read_window(window:rasterio.windows.Window) -> Optional[GeoTensor]:
+        return read_from_window(data_in, window, trigger_load=True, boundless=boundless)
+
+    if prefetch <= 0:
+        for window in windows:
+            data = read_window(window)
+            if data is not None:
+                yield window, data
+        return
+
+    executor = ThreadPoolExecutor(max_workers=prefetch)
+    try:
+        futures = deque()
+        windows_iter = iter(windows)
+        for window in itertools.islice(windows_iter, prefetch):
+            futures.append((window, executor.submit(read_window, window)))
+
+        while len(futures) > 0:
+            window, future = futures.popleft()
+            for window_next in itertools.islice(windows_iter, 1):
+                futures.append((window_next, executor.submit(read_window, window_next)))
+
+            data = future.result()
+            if data is not None:
+                yield window, data
+    finally:
+        # Pending reads are cancelled if the generator is closed before the end
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def read_from_center_coords(data_in: GeoData, center_coords:Tuple[float, float], shape:Tuple[int,int],
                             crs_center_coords:Optional[Any]=None,
                             return_only_data:bool=False, trigger_load:bool=False,
@@ -267,6 +572,111 @@ def read_from_center_coords(data_in: GeoData, center_coords:Tuple[float, float],
                             trigger_load=trigger_load, boundless=boundless)
 
 
+def read_chips(data_in: GeoData, gdf: Any, shape:Tuple[int, int], crs:Optional[Any]=None,
+               boundless:bool=True, as_iterator:bool=False, max_workers:int=1,
+               batch_size:int=CHIPS_BATCH_SIZE) -> Union[GeoTensor, Iterator[Optional[GeoTensor]]]:
+    """
+    Reads chips of shape `shape` centered on the centroids of the geometries of `gdf`. The windows of all the
+    geometries are computed at once and the chips are read in batches of `batch_size` with `read_from_windows`:
+    if `data_in` implements `read_windows` (e.g. `RasterioReader`) each block of the raster is decoded only once per
+    batch. Batches are read in parallel in a thread pool of `max_workers` threads.
+
+    The chip of each geometry is the same as `read_from_center_coords(data_in, centroid, shape, crs)`.
+
+    Args:
+        data_in: GeoData with "x" and "y" coordinates
+        gdf: `geopandas.GeoDataFrame`, `geopandas.GeoSeries` or sequence of shapely geometries.
+        shape: `(height, width)` of the chips.
+        crs: CRS of the geometries. Defaults to `gdf.crs` if `gdf` has a `crs` attribute, otherwise it assumes
+            the geometries are in the crs of `data_in`.
+        boundless: if `True` chips that go beyond `data_in` are padded with `fill_value_default`. If `False` the
+            chips are intersected with `data_in` and chips out of `data_in` are `None` (only with `as_iterator`).
+        as_iterator: if `True` it returns an iterator of GeoTensors in the order of the rows of `gdf`. The batches
+            are then consecutive rows of `gdf` and `max_workers` batches are read in advance.
+            If `False` the chips are sorted by the block of `data_in` they fall in before splitting them in batches
+            (chips of the same batch share more blocks) and it returns a GeoTensor batch.
+        max_workers: number of batches read concurrently.
+        batch_size: number of chips read together.
+
+    Returns:
+        If `as_iterator` an iterator of GeoTensors (or None). Otherwise a GeoTensor with shape
+        `(len(gdf),) + data_in.shape[:-2] + shape` in the order of the rows of `gdf`. Its `transform` is the transform
+        of the first chip and its `transforms` attribute the list with the transforms of all the chips.
+
+    Examples:
+        >>> r = RasterioReader("path/to/raster.tif")
+        >>> points = geopandas.read_file("path/to/points.geojson")
+        >>> batch = read_chips(r, points, shape=(64, 64), max_workers=4)
+        >>> batch.shape # (len(points), r.count, 64, 64)
+    """
+    assert batch_size > 0, f"batch_size must be positive found {batch_size}"
+    if crs is None:
+        crs = getattr(gdf, "crs", None)
+
+    windows_array = windows_from_center_coords(data_in, _geometries_array(gdf), shape, crs)
+    row_off, col_off = windows_array[:, 0], windows_array[:, 1]
+    windows = window_utils.windows_to_list(windows_array)
+
+    def read_batch(idxs:NDArray) -> List[Optional[GeoTensor]]:
+        return read_from_windows(data_in, [windows[i] for i in idxs], boundless=boundless)
+
+    if as_iterator:
+        return _iter_chips(read_batch, len(windows), batch_size, max_workers)
+
+    assert boundless, "Chips can only be stacked in a batch if boundless=True"
+    assert len(windows) > 0, "Empty geometries provided"
+    assert len(data_in.shape) <= 3, "Chips of 4D data can't be stacked in a GeoTensor batch. Use as_iterator=True"
+
+    if hasattr(data_in, "block_shape"):
+        block_height, block_width = data_in.block_shape()
+    else:
+        block_height, block_width = (SIZE_DEFAULT, SIZE_DEFAULT)
+
+    order = np.lexsort((col_off // block_width, row_off // block_height))
+    batches = [order[i:(i + batch_size)] for i in range(0, len(order), batch_size)]
+
+    values = np.empty((len(windows),) + tuple(data_in.shape[:-2]) + tuple(shape), dtype=data_in.dtype)
+    transforms = [None] * len(windows)
+
+    def read_into(idxs:NDArray) -> None:
+        for i, chip in zip(idxs, read_batch(idxs)):
+            values[i] = chip.values
+            transforms[i] = chip.transform
+
+    if max_workers <= 1:
+        for idxs in batches:
+            read_into(idxs)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for f in [executor.submit(read_into, idxs) for idxs in batches]:
+                f.result()
+
+    batch = GeoTensor(values, transform=transforms[0], crs=data_in.crs,
+                      fill_value_default=data_in.fill_value_default)
+    batch.transforms = transforms
+    return batch
+
+
+def _iter_chips(read_batch, n_chips:int, batch_size:int, max_workers:int) -> Iterator[Optional[GeoTensor]]:
+    """ Yields the chips of `read_chips` in order reading `max_workers` batches in advance """
+    batches = (np.arange(i, min(i + batch_size, n_chips)) for i in range(0, n_chips, batch_size))
+    if max_workers <= 1:
+        for idxs in batches:
+            yield from read_batch(idxs)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = deque(executor.submit(read_batch, idxs) for idxs in itertools.islice(batches, max_workers))
+        while len(futures) > 0:
+            future = futures.popleft()
+            for idxs in itertools.islice(batches, 1):
+                futures.append(executor.submit(read_batch, idxs))
+            yield from future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def read_from_bounds(data_in: GeoData, bounds: Tuple[float, float, float, float],
                      crs_bounds: Optional[str] = None, pad_add:Tuple[int, int]=(0, 0),
                      return_only_data: bool = False, trigger_load: bool = False,
@@ -297,13 +707,132 @@ def read_from_bounds(data_in: GeoData, bounds: Tuple[float, float, float, float]
     return read_from_window(data_in, window_in, return_only_data=return_only_data, trigger_load=trigger_load,
                             boundless=boundless)
 
+def _connected_components(n:int, left:NDArray, right:NDArray) -> NDArray:
+    """
+    Union-find of `n` nodes with the edges `left[i]`-`right[i]`. Returns the label of each node: the lowest index
+    of its component.
+    """
+    labels = np.arange(n)
+    while True:
+        # Hook the roots of the edges to the lowest one and compress the paths
+        root_left, root_right = labels[left], labels[right]
+        np.minimum.at(labels, root_left, root_right)
+        np.minimum.at(labels, root_right, root_left)
+        while True:
+            labels_next = labels[labels]
+            if np.array_equal(labels_next, labels):
+                break
+            labels = labels_next
+        if np.array_equal(labels[left], labels[right]):
+            return labels
+
+
+def _group_windows(windows:NDArray, gap:int) -> List[List[int]]:
+    """
+    Groups the windows (array of `(row_off, col_off, height, width)`) whose bounding windows are closer than `gap`
+    pixels. Groups are merged until their bounding windows are more than `gap` pixels apart. Close windows are
+    found with a `shapely.STRtree` and grouped with union-find.
+    """
+    windows = np.asarray(windows, dtype=np.int64).reshape(-1, 4)
+    # boxes (row_start, col_start, row_end, col_end) of the current groups and group of each window
+    boxes = np.stack([windows[:, 0], windows[:, 1], windows[:, 0] + windows[:, 2], windows[:, 1] + windows[:, 3]],
+                     axis=1)
+    group_window = np.arange(len(windows))
+    while True:
+        tree = shapely.STRtree(shapely.box(boxes[:, 1], boxes[:, 0], boxes[:, 3], boxes[:, 2]))
+        boxes_gap = shapely.box(boxes[:, 1] - gap, boxes[:, 0] - gap, boxes[:, 3] + gap, boxes[:, 2] + gap)
+        left, right = tree.query(boxes_gap, predicate="intersects")
+        labels = _connected_components(len(boxes), left, right)
+        roots, labels = np.unique(labels, return_inverse=True)
+        group_window = labels[group_window]
+        if len(roots) == len(boxes):
+            break
+
+        # Bounding boxes of the merged groups: they could now be close to other groups
+        boxes_merged = np.stack([np.full(len(roots), np.iinfo(np.int64).max)] * 2 +
+                                [np.full(len(roots), np.iinfo(np.int64).min)] * 2, axis=1)
+        for i, reduction in enumerate([np.minimum, np.minimum, np.maximum, np.maximum]):
+            reduction.at(boxes_merged[:, i], labels, boxes[:, i])
+        boxes = boxes_merged
+
+    order = np.argsort(group_window, kind="stable")
+    splits = np.flatnonzero(np.diff(group_window[order])) + 1
+    return [g.tolist() for g in np.split(order, splits)]
+
+
+def group_polygon_parts(data_in: Union[GeoData, rasterio.DatasetReader], polygon:Union[Polygon, MultiPolygon],
+                        crs_polygon:Optional[Any]=None, gap:int=SIZE_DEFAULT,
+                        window_surrounding:bool=False) -> List[Union[Polygon, MultiPolygon]]:
+    """
+    Groups the parts of a MultiPolygon that are close to each other in the pixel grid of `data_in`. Parts whose
+    windows are closer than `gap` pixels are read together (reading the pixels between them is cheaper than
+    reading the blocks twice).
+
+    Args:
+        data_in: Reader with crs and transform attributes
+        polygon: Polygon or MultiPolygon
+        crs_polygon: Optional coordinate reference system of the polygon. If not provided assumes same crs as `data_in`
+        gap: distance in pixels between the windows of the parts to group them together.
+        window_surrounding: The windows surround the parts. (see `window_from_polygon`)
+
+    Returns:
+        List of Polygons or MultiPolygons (in `crs_polygon`) with the groups of parts. Sorted by the first part of
+        each group.
+    """
+    parts = shapely.get_parts(np.array([polygon], dtype=object))
+    if len(parts) <= 1:
+        return [polygon]
+
+    windows = window_utils.round_outer_windows(windows_from_polygons(data_in, parts, crs_polygon,
+                                                                     window_surrounding=window_surrounding))
+    groups = _group_windows(windows, gap)
+    return [parts[g[0]] if len(g) == 1 else MultiPolygon(list(parts[g])) for g in groups]
+
+
+def _assemble_parts(parts:List[GeoTensor], transform:rasterio.Affine, shape:Tuple[int, ...], crs:Any,
+                    fill_value_default:Any, dtype:Any) -> GeoTensor:
+    """
+    Copies the GeoTensors `parts` (in the same pixel grid as `transform`) in a GeoTensor of shape `shape` filled with
+    `fill_value_default`. If `fill_value_default` is 0 the pages of the output that are not covered by any part are
+    not allocated by the OS.
+    """
+    if (fill_value_default is None) or (fill_value_default == 0):
+        values = np.zeros(shape, dtype=dtype)
+    else:
+        values = np.full(shape, fill_value_default, dtype=dtype)
+
+    height, width = shape[-2:]
+    transform_inv = ~transform
+    for part in parts:
+        col, row = _round_all(transform_inv * (part.transform.c, part.transform.f))
+        row_end, col_end = row + part.shape[-2], col + part.shape[-1]
+        r0, c0, r1, c1 = max(row, 0), max(col, 0), min(row_end, height), min(col_end, width)
+        if (r1 <= r0) or (c1 <= c0):
+            continue
+        values[..., r0:r1, c0:c1] = np.asanyarray(part.values)[..., (r0 - row):(r1 - row), (c0 - col):(c1 - col)]
+
+    return GeoTensor(values, transform=transform, crs=crs, fill_value_default=fill_value_default)
+
+
 def read_from_polygon(data_in: GeoData, polygon: Union[Polygon, MultiPolygon],
                       crs_polygon: Optional[str] = None, pad_add:Tuple[int, int]=(0, 0),
                       return_only_data: bool = False, trigger_load: bool = False,
-                      boundless: bool = True, window_surrounding:bool=False) -> Union[GeoData, np.ndarray]:
+                      boundless: bool = True, window_surrounding:bool=False,
+                      split_parts:Optional[str]=None,
+                      parts_gap:int=SIZE_DEFAULT) -> Union[GeoData, np.ndarray, List[GeoData], None]:
     """
     Reads a slice of data_in covering the `polygon`.
 
+    By default the bounding window of the whole `polygon` is read. If `split_parts` is given the parts of a
+    MultiPolygon are grouped with `group_polygon_parts` and each group is read separately (the space between
+    distant parts is not read):
+        * `"list"`: returns the list of GeoData (or np.ndarrays) of the groups.
+        * `"assemble"`: returns a GeoTensor with the window of the whole `polygon` where only the windows of the
+            groups are filled with data (the rest is `fill_value_default`). The output array of the whole window
+            is allocated: if `fill_value_default` is 0 the OS only commits the pages written by the groups,
+            otherwise the whole array is filled in memory. Use `"list"` if the window of `polygon` does not
+            fit in memory.
+
     Args:
         data_in: GeoData with geographic info (crs and geotransform).
         polygon: Polygon or MultiPolygon that specifies the region to read.
@@ -316,9 +845,11 @@ def read_from_polygon(data_in: GeoData, polygon: Union[Polygon, MultiPolygon],
         boundless: if `True` data read will always have the shape of the provided window
             (padding with `fill_value_default`)
         window_surrounding: The window surrounds the polygon. (i.e. `window.row_off` + `window.height` will not be a vertex)
+        split_parts: if not None (`"list"` or `"assemble"`) the parts of a MultiPolygon are read separately.
+        parts_gap: distance in pixels to group the parts of a MultiPolygon (see `group_polygon_parts`).
 
     Returns:
-        sliced GeoData
+        sliced GeoData (list of GeoData if `split_parts="list"`)
     """
     window_in = window_from_polygon(data_in, polygon, crs_polygon, 
                                     window_surrounding=window_surrounding)
@@ -326,6 +857,36 @@ def read_from_polygon(data_in: GeoData, polygon: Union[Polygon, MultiPolygon],
         window_in = pad_window(window_in, pad_add)  # Add padding for bicubic int or for co-registration
     window_in = round_outer_window(window_in)
 
+    if split_parts is not None:
+        assert split_parts in POLYGON_PARTS_MODES, f"split_parts must be one of {POLYGON_PARTS_MODES} found {split_parts}"
+        groups = group_polygon_parts(data_in, polygon, crs_polygon, gap=parts_gap,
+                                     window_surrounding=window_surrounding)
+        if split_parts == "list":
+            data_parts = [read_from_polygon(data_in, group, crs_polygon, pad_add=pad_add,
+                                            return_only_data=return_only_data, trigger_load=trigger_load,
+                                            boundless=boundless, window_surrounding=window_surrounding)
+                          for group in groups]
+            return [d for d in data_parts if d is not None]
+
+        if not boundless:
+            window_data = rasterio.windows.Window(col_off=0, row_off=0, width=data_in.shape[-1],
+                                                  height=data_in.shape[-2])
+            if not rasterio.windows.intersect([window_data, window_in]):
+                return None
+            window_in = rasterio.windows.intersection(window_data, window_in)
+
+        data_parts = [read_from_polygon(data_in, group, crs_polygon, pad_add=pad_add, trigger_load=True,
+                                        boundless=boundless, window_surrounding=window_surrounding)
+                      for group in groups]
+        data_assembled = _assemble_parts([d for d in data_parts if d is not None],
+                                         transform=rasterio.windows.transform(window_in, data_in.transform),
+                                         shape=tuple(data_in.shape[:-2]) + (int(window_in.height), int(window_in.width)),
+                                         crs=data_in.crs, fill_value_default=data_in.fill_value_default,
+                                         dtype=data_in.dtype)
+        if return_only_data:
+            return data_assembled.values
+        return data_assembled
+
     return read_from_window(data_in, window_in, return_only_data=return_only_data, 
                             trigger_load=trigger_load,
                             boundless=boundless)
@@ -335,7 +896,7 @@ def read_reproject_like(data_in: GeoData, data_like: GeoData,
                         resolution_dst:Optional[Union[float, Tuple[float, float]]]=None,
                         resampling: rasterio.warp.Resampling = rasterio.warp.Resampling.cubic_spline,
                         dtype_dst:Any=None, return_only_data: bool = False,
-                        dst_nodata: Optional[int] = None) -> Union[GeoTensor, np.ndarray]:
+                        dst_nodata: Optional[int] = None, use_warp_plan:bool=False) -> Union[GeoTensor, np.ndarray]:
     """
     Reads from `data_in` and reprojects to have the same extent and resolution than `data_like`.
 
@@ -348,6 +909,7 @@ def read_reproject_like(data_in: GeoData, data_like: GeoData,
         return_only_data: defaults to `False`. If `True` it returns a np.ndarray otherwise
             returns an GeoTensor object (georreferenced array).
         dst_nodata: dst_nodata value
+        use_warp_plan: if True resample with a cached `WarpPlan` (see `read_reproject`). Defaults to False.
 
     Returns:
         GeoTensor read from `data_in` with same transform, crs, shape and bounds than `data_like`.
@@ -367,14 +929,219 @@ def read_reproject_like(data_in: GeoData, data_like: GeoData,
                           resolution_dst_crs=resolution_dst,
                           window_out=rasterio.windows.Window(0,0, width=shape_out[-1], height=shape_out[-2]),
                           resampling=resampling,dtype_dst=dtype_dst, return_only_data=return_only_data,
-                          dst_nodata=dst_nodata)
+                          dst_nodata=dst_nodata, use_warp_plan=use_warp_plan)
+
+
+def _as_integer_factor(factor:float) -> Optional[int]:
+    """ Returns `factor` as int if it is an integer >= 1 (up to rounding errors), None otherwise """
+    factor_int = int(round(factor))
+    if (factor_int >= 1) and abs(factor - factor_int) < 1e-6 * factor_int:
+        return factor_int
+    return None
+
+
+def _block_reduce(values:np.ndarray, factors:Tuple[int, int], method:str, fill_value:Any=None) -> np.ndarray:
+    """
+    Downsamples the spatial dims (last two axes) of `values` by the integer `factors` `(factor_y, factor_x)`. Each
+    block of `factor_y x factor_x` pixels is reduced to one pixel with `method`: "nearest" (pixel at the center of
+    the block), "mean", "mode", "min" or "max". All the leading dims are reduced at once.
+
+    The results are the ones of the GDAL warper with the equivalent resampling method (the mean of integer types
+    is rounded half up, GDAL can round differently the means that are exactly halfway between two integers). As
+    in GDAL, the mode of a block with ties is the value that first reaches the maximum count scanning the block in
+    row major order.
+
+    Args:
+        values: array (..., H, W) with H and W divisible by `factors`.
+        factors: downsampling factors `(factor_y, factor_x)`.
+        method: reduction method.
+        fill_value: pixels equal to `fill_value` (or nan if `fill_value` is nan) are ignored by the "mean", "mode",
+            "min" and "max" reductions. Blocks without valid pixels are set to `fill_value`.
+
+    Returns:
+        array (..., H // factor_y, W // factor_x) with the same dtype as `values`.
+    """
+    factor_y, factor_x = factors
+    assert (values.shape[-2] % factor_y == 0) and (values.shape[-1] % factor_x == 0), \
+        f"Spatial shape {values.shape[-2:]} not divisible by {factors}"
+    height, width = values.shape[-2] // factor_y, values.shape[-1] // factor_x
+
+    if method == "nearest":
+        return values[..., (factor_y // 2)::factor_y, (factor_x // 2)::factor_x].copy()
+
+    assert method in ("mean", "mode", "min", "max"), f"Unknown method {method}"
+    shape_out = values.shape[:-2] + (height, width)
+
+    def is_valid(pixels:np.ndarray) -> np.ndarray:
+        if isinstance(fill_value, float) and np.isnan(fill_value):
+            return ~np.isnan(pixels)
+        return pixels != fill_value
+
+    # Pixels at each offset (i, j) of the blocks (row major order). These are strided views of `values`
+    offsets = [values[..., i::factor_y, j::factor_x] for i in range(factor_y) for j in range(factor_x)]
+    count_valid = None if fill_value is None else np.zeros(shape_out, dtype=np.int32)
+
+    if method == "mean":
+        output = np.zeros(shape_out, dtype=np.float64)
+        for pixels in offsets:
+            if count_valid is None:
+                output += pixels
+            else:
+                valid = is_valid(pixels)
+                output += np.where(valid, pixels, 0)
+                count_valid += valid
+        output /= len(offsets) if count_valid is None else np.maximum(count_valid, 1)
+        if values.dtype.kind in "iub":
+            output = np.floor(output + .5)
+        output = output.astype(values.dtype)
+    elif method in ("min", "max"):
+        if values.dtype.kind == "f":
+            neutral = np.inf if method == "min" else -np.inf
+        elif values.dtype.kind == "b":
+            neutral = method == "min"
+        else:
+            info = np.iinfo(values.dtype)
+            neutral = info.max if method == "min" else info.min
+        reduce = np.minimum if method == "min" else np.maximum
+        output = np.full(shape_out, fill_value=neutral, dtype=values.dtype)
+        for pixels in offsets:
+            if count_valid is not None:
+                valid = is_valid(pixels)
+                count_valid += valid
+                pixels = np.where(valid, pixels, neutral)
+            reduce(output, pixels, out=output)
+    else:
+        # Occurrences of the value of the pixel at each offset in the block up to that offset
+        counts = [np.zeros(shape_out, dtype=np.int32) for _ in offsets]
+        valid_offsets = [None if fill_value is None else is_valid(pixels) for pixels in offsets]
+        for q, (pixels_q, valid_q) in enumerate(zip(offsets, valid_offsets)):
+            for p in range(q, len(offsets)):
+                equal = offsets[p] == pixels_q
+                counts[p] += equal if valid_q is None else (equal & valid_q)
+            if valid_q is not None:
+                count_valid += valid_q
+        # Value of the first offset that reaches the maximum count
+        output = offsets[0].copy()
+        count_max = counts[0]
+        for pixels, count in zip(offsets[1:], counts[1:]):
+            better = count > count_max
+            output[better] = pixels[better]
+            count_max = np.maximum(count_max, count)
+
+    if count_valid is not None:
+        output[count_valid == 0] = fill_value
+
+    return output
+
+
+def _anti_aliasing_filter(values:np.ndarray, sigma:Union[float, Tuple[float, float], np.ndarray],
+                          mode:str="reflect", cval:float=0, max_workers:int=1) -> np.ndarray:
+    """
+    Applies a Gaussian filter over the spatial dims (last two axes) of all the slices of `values` with one call to
+    `scipy.ndimage.gaussian_filter` (sigma is 0 in the leading dims). Slices with different sigma are filtered in
+    separate calls. The output has the dtype of `values` (e.g. float32 data is filtered in float32).
+
+    Args:
+        values: array (..., H, W).
+        sigma: standard deviation of the filter: a number, `(sigma_y, sigma_x)` if `values` is 2D or an array with
+            one sigma (shape `values.shape[:-2]`) or one `(sigma_y, sigma_x)` pair (shape `values.shape[:-2] + (2,)`)
+            for each slice of the leading dims of `values`.
+        mode: mode of `scipy.ndimage.gaussian_filter`.
+        cval: value outside the array if `mode` is "constant".
+        max_workers: if > 1 the slices are split in chunks filtered concurrently in a thread pool.
+
+    Returns:
+        filtered array with the same shape and dtype as `values`.
+    """
+    from scipy import ndimage as ndi
+
+    output = np.empty(values.shape, dtype=values.dtype)
+    if values.ndim == 2:
+        ndi.gaussian_filter(values, sigma, mode=mode, cval=cval, output=output)
+        return output
+
+    values_slices = values.reshape((-1,) + values.shape[-2:])
+    output_slices = output.reshape(values_slices.shape)
+    n_slices = values_slices.shape[0]
+    sigma = np.asarray(sigma, dtype=np.float64)
+    if sigma.ndim == 0:
+        sigma_slices = np.broadcast_to(sigma, (n_slices, 2))
+    else:
+        sigma_slices = np.broadcast_to(sigma.reshape((n_slices, -1)), (n_slices, 2))
+
+    # Runs of consecutive slices with the same sigma split in chunks for the thread pool
+    tasks = []
+    start = 0
+    while start < n_slices:
+        end = start + 1
+        while (end < n_slices) and np.array_equal(sigma_slices[end], sigma_slices[start]):
+            end += 1
+        n_chunks = min(max(1, max_workers), end - start)
+        bounds_chunks = np.linspace(start, end, n_chunks + 1).round().astype(int)
+        tasks.extend((a, b, tuple(sigma_slices[start])) for a, b in zip(bounds_chunks[:-1], bounds_chunks[1:]))
+        start = end
+
+    def filter_chunk(task:Tuple[int, int, Tuple[float, float]]) -> None:
+        a, b, sigma_chunk = task
+        ndi.gaussian_filter(values_slices[a:b], (0,) + sigma_chunk, mode=mode, cval=cval,
+                            output=output_slices[a:b])
+
+    if max_workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(filter_chunk, tasks))
+    else:
+        for task in tasks:
+            filter_chunk(task)
+
+    return output
+
+
+def _resize_integer_factor(data_in:GeoData, dst_transform:rasterio.Affine, window_out:rasterio.windows.Window,
+                           method:str) -> Optional[GeoTensor]:
+    """
+    Resizes `data_in` to `dst_transform` (same crs) with block reductions or pixel replication if `dst_transform`
+    is a rectilinear transform aligned with the transform of `data_in` whose resolution differs by an integer factor
+    (upsampling or downsampling in both axes). Returns None if that's not the case or if `window_out`
+    is not within the extent of `data_in`.
+    """
+    transform_in = data_in.transform
+    if (window_out.col_off != 0) or (window_out.row_off != 0) or \
+            any(t.b != 0 or t.d != 0 for t in (transform_in, dst_transform)) or \
+            (transform_in.c, transform_in.f) != (dst_transform.c, dst_transform.f):
+        return None
+
+    scale_x, scale_y = dst_transform.a / transform_in.a, dst_transform.e / transform_in.e
+    factors_down = _as_integer_factor(scale_y), _as_integer_factor(scale_x)
+    factors_up = _as_integer_factor(1 / scale_y), _as_integer_factor(1 / scale_x)
+    height_out, width_out = int(window_out.height), int(window_out.width)
+
+    if all(f is not None for f in factors_down):
+        window_in = rasterio.windows.Window(col_off=0, row_off=0, width=width_out * factors_down[1],
+                                            height=height_out * factors_down[0])
+    elif all(f is not None for f in factors_up):
+        window_in = rasterio.windows.Window(col_off=0, row_off=0, width=ceil(width_out / factors_up[1]),
+                                            height=ceil(height_out / factors_up[0]))
+    else:
+        return None
+
+    if (window_in.height > data_in.shape[-2]) or (window_in.width > data_in.shape[-1]):
+        return None
+
+    data_window = read_from_window(data_in, window_in, trigger_load=True)
+    values = np.asanyarray(data_window.values)
+    if all(f is not None for f in factors_down):
+        values = _block_reduce(values, factors_down, method, fill_value=data_window.fill_value_default)
+    else:
+        values = values.repeat(factors_up[0], axis=-2).repeat(factors_up[1], axis=-1)[..., :height_out, :width_out]
+
+    return GeoTensor(values, transform=dst_transform, crs=data_in.crs, fill_value_default=data_in.fill_value_default)
 
 
 def resize(data_in:GeoData, resolution_dst:Union[float, Tuple[float, float]],
            window_out:Optional[rasterio.windows.Window]=None,
            anti_aliasing:bool=True, anti_aliasing_sigma:Optional[Union[float,np.ndarray]]=None,
            resampling: rasterio.warp.Resampling = rasterio.warp.Resampling.cubic_spline,
-           return_only_data: bool = False)-> Union[
+           return_only_data: bool = False, overview_strategy:str="off", max_workers:int=1)-> Union[
     GeoTensor, np.ndarray]:
     """
     Change the spatial resolution of data_in to `resolution_dst`. This function is a wrapper of the `read_reproject` function
@@ -388,10 +1155,20 @@ def resize(data_in:GeoData, resolution_dst:Union[float, Tuple[float, float]],
         anti_aliasing_sigma:  anti_aliasing_sigma : {float}, optional
                 Standard deviation for Gaussian filtering used when anti-aliasing.
                 By default, this value is chosen as (s - 1) / 2 where s is the
-                downsampling factor, where s > 1
-        resampling: specifies how data is reprojected from `rasterio.warp.Resampling`.
+                downsampling factor, where s > 1. It can be an array with one value for each band
+                (and time step if `data_in` is 4D).
+        resampling: specifies how data is reprojected from `rasterio.warp.Resampling`. If it is one of
+            `RESIZE_BLOCK_METHODS` (nearest, average, mode, min or max) and the resolution changes by an integer
+            factor (e.g. 10m -> 20m or 60m -> 10m) the output is computed with block reductions (downsampling) or
+            replicating the pixels (upsampling) instead of the GDAL warper.
         return_only_data: defaults to `False`. If `True` it returns a np.ndarray otherwise
             returns an GeoTensor object (georreferenced array).
+        overview_strategy: if `data_in` is a reader with overviews (e.g. `RasterioReader`) and `resolution_dst` is
+            coarser than its resolution, read from the overview selected with this strategy (see
+            `select_overview_level`). The anti-aliasing is then computed w.r.t. the resolution of the overview.
+            Defaults to "off". The selected level is stored in the `overview_level` attribute of the output.
+        max_workers: number of threads to apply the anti-aliasing filter (the bands are split in chunks).
+            Defaults to 1.
 
     Returns:
         GeoTensor with spatial resolution `resolution_dst`
@@ -413,49 +1190,45 @@ def resize(data_in:GeoData, resolution_dst:Union[float, Tuple[float, float]],
         output_shape = ceil(output_shape_rounded[0]), ceil(output_shape_rounded[1])
         window_out = rasterio.windows.Window(col_off=0, row_off=0, width=output_shape[1], height=output_shape[0])
 
+    transform_dst = data_in.transform
+    overview_level = None
+    if (overview_strategy != "off") and not isinstance(data_in, GeoTensor):
+        overview_level = select_overview_level(data_in, float(np.sqrt(scale[0] * scale[1])), overview_strategy)
+        if overview_level is not None:
+            data_in = data_in.reader_overview(overview_level)
+            resolution_or = data_in.res
+            scale = np.array([resolution_dst[0] / resolution_or[0], resolution_dst[1] / resolution_or[1]])
+
     if anti_aliasing and any(s1<s2 for s1,s2 in zip(resolution_or, resolution_dst)):
         # If we are downscaling the image and requested anti_aliasing
 
-        from scipy import ndimage as ndi
-
-        # Copy or load the tensor in memory
-        if isinstance(data_in, GeoTensor):
-            data_in = data_in.copy()
-        else:
+        if not isinstance(data_in, GeoTensor):
             data_in = data_in.load()
 
         if anti_aliasing_sigma is None:
             anti_aliasing_sigma = np.mean(np.maximum(0, (scale - 1) / 2))
 
-
         # TODO if data_in.values is a torch.Tensor use kornia gaussian filter instead of ndi
+        values = _anti_aliasing_filter(np.asanyarray(data_in.values), anti_aliasing_sigma, mode="reflect",
+                                       max_workers=max_workers)
+        data_in = GeoTensor(values, transform=data_in.transform, crs=data_in.crs,
+                            fill_value_default=data_in.fill_value_default)
 
-        input_shape = data_in.shape
-        if len(input_shape) == 4:
-            for i, j in product(range(0, input_shape[0]), range(0, input_shape[1])):
-                if isinstance(anti_aliasing_sigma, numbers.Number):
-                    anti_aliasing_sigma_iter = anti_aliasing_sigma
-                else:
-                    anti_aliasing_sigma_iter = anti_aliasing_sigma[i, j]
-                data_in.values[i, j] = ndi.gaussian_filter(data_in.values[i, j],
-                                                           anti_aliasing_sigma_iter, cval=0, mode="reflect")
-        elif len(input_shape) == 3:
-            for i in range(0, input_shape[0]):
-                if isinstance(anti_aliasing_sigma, numbers.Number):
-                    anti_aliasing_sigma_iter = anti_aliasing_sigma
-                else:
-                    anti_aliasing_sigma_iter = anti_aliasing_sigma[i]
-
-                data_in.values[i] = ndi.gaussian_filter(data_in.values[i],
-                                                        anti_aliasing_sigma_iter, cval=0, mode="reflect")
-        else:
-            data_in.values[...] = ndi.gaussian_filter(data_in.values,
-                                                      anti_aliasing_sigma, cval=0, mode="reflect")
 
+    output = None
+    if resampling in RESIZE_BLOCK_METHODS:
+        dst_transform = window_utils.figure_out_transform(transform=transform_dst, resolution_dst=resolution_dst)
+        output = _resize_integer_factor(data_in, dst_transform, window_out, RESIZE_BLOCK_METHODS[resampling])
+        if (output is not None) and return_only_data:
+            output = output.values
 
-    return read_reproject(data_in, dst_crs=data_in.crs, resolution_dst_crs=resolution_dst,
-                          dst_transform=data_in.transform, window_out=window_out,
-                          resampling=resampling, return_only_data=return_only_data)
+    if output is None:
+        output = read_reproject(data_in, dst_crs=data_in.crs, resolution_dst_crs=resolution_dst,
+                                dst_transform=transform_dst, window_out=window_out,
+                                resampling=resampling, return_only_data=return_only_data)
+    if (overview_strategy != "off") and not return_only_data:
+        output.overview_level = overview_level
+    return output
 
 
 def read_to_crs(data_in:GeoData, dst_crs:Any, 
@@ -508,14 +1281,92 @@ def calculate_transform_window(data_in:GeoData, dst_crs:Any,
     return window_data, dst_transform
 
 
+def _warp_cost_bytes(shape_src:Tuple[int, int], shape_dst:Tuple[int, int], dtype:Any,
+                     nodata_values:List[Any]) -> int:
+    """
+    Upper bound of the memory that the GDAL warper needs to warp one band of shape `shape_src` into `shape_dst`
+    without splitting it in chunks (working data, validity and density masks of the source and destination).
+    """
+    dtype = np.dtype(dtype)
+    bits = dtype.itemsize * 8
+    for v in nodata_values:
+        # GDAL widens the working data type if the nodata values are not representable in `dtype`
+        if v is None:
+            continue
+        if np.isnan(v):
+            representable = dtype.kind in "fc"
+        else:
+            with np.errstate(invalid="ignore", over="ignore"):
+                representable = bool(np.array(v).astype(dtype) == v)
+        if not representable:
+            bits = 64
+    bits += 34
+    return ((shape_src[0] * shape_src[1] + shape_dst[0] * shape_dst[1]) * bits) // 8 + 1
+
+
+def _warp_stack(source:np.ndarray, destination:np.ndarray, src_transform:rasterio.Affine, src_crs:Any,
+                dst_transform:rasterio.Affine, dst_crs:Any, src_nodata:Any, dst_nodata:Any,
+                resampling:rasterio.warp.Resampling, num_threads:int=1) -> None:
+    """
+    Reprojects the stack of 2D arrays `source` (N, H, W) into `destination` (N, H', W').
+
+    Consecutive slices are warped with a single multi-band call to the GDAL warper (the coordinate transformation
+    is computed once for all of them) if the result is the same as warping the slices one by one: each slice fits
+    in the default GDAL warp memory (otherwise the chunks that GDAL processes depend on the number of bands) and,
+    if `src_nodata` is given, all the slices have the same nodata mask (otherwise nodata is handled differently
+    by the multi-band warper).
+
+    Args:
+        source: 3D array (N, H, W).
+        destination: 3D C-contiguous array (N, H', W') to write the results.
+        src_transform: transform of the source.
+        src_crs: crs of the source.
+        dst_transform: transform of the destination.
+        dst_crs: crs of the destination.
+        src_nodata: nodata value of the source.
+        dst_nodata: nodata value of the destination.
+        resampling: resampling method.
+        num_threads: number of threads of the GDAL warper.
+    """
+    kwargs_reproject = dict(src_transform=src_transform, src_crs=src_crs, dst_transform=dst_transform,
+                            dst_crs=dst_crs, src_nodata=src_nodata, dst_nodata=dst_nodata,
+                            resampling=resampling, num_threads=num_threads)
+
+    cost_slice = _warp_cost_bytes(source.shape[-2:], destination.shape[-2:], source.dtype, [src_nodata, dst_nodata])
+    if cost_slice > GDAL_WARP_MEMORY_LIMIT * 1024 ** 2:
+        slices_per_call = 1
+    else:
+        slices_per_call = max(1, (WARP_MULTIBAND_MEMORY_LIMIT * 1024 ** 2) // cost_slice)
+
+    for start in range(0, source.shape[0], slices_per_call):
+        end = min(start + slices_per_call, source.shape[0])
+        source_iter = source[start:end]
+        multiband = (end - start) > 1
+        if multiband and (src_nodata is not None):
+            if isinstance(src_nodata, float) and np.isnan(src_nodata):
+                invalid = np.isnan(source_iter)
+            else:
+                invalid = source_iter == src_nodata
+            multiband = bool(np.all(invalid[1:] == invalid[:1]))
+
+        if multiband:
+            warp_mem_limit = ceil(cost_slice * (end - start) / 1024 ** 2) + 1
+            rasterio.warp.reproject(source_iter, destination[start:end], warp_mem_limit=warp_mem_limit,
+                                    **kwargs_reproject)
+        else:
+            for i in range(start, end):
+                rasterio.warp.reproject(source[i], destination[i], **kwargs_reproject)
+
+
 def read_reproject(data_in: GeoData, dst_crs: Optional[str]=None,
                    bounds: Optional[Tuple[float, float, float, float]]=None,
                    resolution_dst_crs: Optional[Union[float, Tuple[float, float]]]=None,
                    dst_transform:Optional[rasterio.Affine]=None,
                    window_out:Optional[rasterio.windows.Window]=None,
                    resampling: rasterio.warp.Resampling = rasterio.warp.Resampling.cubic_spline,
-                   dtype_dst:Any=None, return_only_data: bool = False, dst_nodata: Optional[int] = None) -> Union[
-    GeoTensor, np.ndarray]:
+                   dtype_dst:Any=None, return_only_data: bool = False, dst_nodata: Optional[int] = None,
+                   overview_strategy:str="off", num_threads:int=1, use_warp_plan:bool=False,
+                   use_warped_vrt:bool=False) -> Union[GeoTensor, np.ndarray]:
     """
     This function slices the data by the bounds and reprojects it to the dst_crs and resolution_dst_crs
 
@@ -534,12 +1385,52 @@ def read_reproject(data_in: GeoData, dst_crs: Optional[str]=None,
         return_only_data: defaults to `False`. If `True` it returns a np.ndarray otherwise
             returns an GeoTensor object (georreferenced array).
         dst_nodata: dst_nodata value
+        overview_strategy: if `data_in` is a reader with overviews (e.g. `RasterioReader`) and the output is coarser
+            than the data, read from the overview selected with this strategy (see `select_overview_level`).
+            Defaults to "off" (always read the full resolution data). The selected level is stored in the
+            `overview_level` attribute of the output.
+        num_threads: number of threads of the GDAL warper. Defaults to 1.
+        use_warp_plan: if True and `resampling` is one of `warp_plan.WARP_PLAN_RESAMPLING` the data is resampled
+            with the `WarpPlan` between the grids from the process-wide cache (see `warp_plan.get_warp_plan`)
+            instead of the GDAL warper. The plan resamples all the bands at once: it is faster than the GDAL warper
+            when the data has nodata values (similar speed otherwise) and saves the coordinate transformation
+            when the same grids are reprojected repeatedly. Results are close but not bit-identical to the ones of
+            the GDAL warper. Outputs whose plan would be larger than the budget of the cache are warped with
+            GDAL. Defaults to False.
+        use_warped_vrt: if True and `data_in` is a reader with a `read_warped` method (e.g. `RasterioReader`)
+            the data is reprojected with `rasterio.vrt.WarpedVRT` reading only the blocks needed for each
+            block of the output (instead of reading a padded window of `data_in` and warping it in memory).
+            Results are equivalent to the default path: they can differ slightly (rounding and tolerance of the
+            approximate coordinate transformation of GDAL) and around nodata pixels that are not nodata in all
+            the bands.
+            It is not used if the data needs to be cast or if the area to read is not within the window of
+            `data_in`. Defaults to False.
 
     Returns:
         GeoTensor reprojected to dst_crs with resolution_dst_crs
 
     """
-
+    with instrumentation.record("read_reproject") as call_record:
+        output = _read_reproject(data_in, dst_crs=dst_crs, bounds=bounds, resolution_dst_crs=resolution_dst_crs,
+                                 dst_transform=dst_transform, window_out=window_out, resampling=resampling,
+                                 dtype_dst=dtype_dst, return_only_data=return_only_data, dst_nodata=dst_nodata,
+                                 overview_strategy=overview_strategy, num_threads=num_threads,
+                                 use_warp_plan=use_warp_plan, use_warped_vrt=use_warped_vrt,
+                                 call_record=call_record)
+        call_record.add(output_nbytes=instrumentation.nbytes(output))
+    return output
+
+
+def _read_reproject(data_in: GeoData, dst_crs: Optional[str],
+                    bounds: Optional[Tuple[float, float, float, float]],
+                    resolution_dst_crs: Optional[Union[float, Tuple[float, float]]],
+                    dst_transform:Optional[rasterio.Affine],
+                    window_out:Optional[rasterio.windows.Window],
+                    resampling: rasterio.warp.Resampling,
+                    dtype_dst:Any, return_only_data: bool, dst_nodata: Optional[int],
+                    overview_strategy:str, num_threads:int, use_warp_plan:bool, use_warped_vrt:bool,
+                    call_record:Any) -> Union[GeoTensor, np.ndarray]:
+    """ Implementation of `read_reproject`. The phases of the call are added to `call_record` """
     named_shape = OrderedDict(zip(data_in.dims, data_in.shape))
 
     # Compute output transform
@@ -570,7 +1461,9 @@ def read_reproject(data_in: GeoData, dst_crs: Optional[str]=None,
 
             if _is_exact_round(window_in_data.row_off) and _is_exact_round(window_in_data.col_off):
                 window_in_data = window_in_data.round_offsets(op="floor", pixel_precision=PIXEL_PRECISION)
-                return read_from_window(data_in, window_in_data, return_only_data=return_only_data, trigger_load=True)
+                with call_record.phase("read"):
+                    return read_from_window(data_in, window_in_data, return_only_data=return_only_data,
+                                            trigger_load=True)
 
     isbool_dtypein = data_in.dtype == 'bool'
     isbool_dtypedst = False
@@ -600,69 +1493,273 @@ def read_reproject(data_in: GeoData, dst_crs: Optional[str]=None,
         return GeoTensor(destination, transform=dst_transform, crs=dst_crs,
                          fill_value_default=dst_nodata)
 
+    overview_level = None
     if not isinstance(data_in, GeoTensor):
+        if overview_strategy != "off":
+            downsampling_factor = _downsampling_factor(data_in, polygon_dst_crs, dst_crs, window_out)
+            overview_level = select_overview_level(data_in, downsampling_factor, overview_strategy)
+            if overview_level is not None:
+                data_in = data_in.reader_overview(overview_level)
+
+        if use_warped_vrt and hasattr(data_in, "read_warped") and (not cast) and (not isbool_dtypein) and \
+                _window_within(data_in, polygon_dst_crs, dst_crs, pad_add=(3, 3)):
+            with call_record.phase("warp"):
+                data_in.read_warped(dst_crs, dst_transform, destination.shape[-2:], resampling=resampling,
+                                    dst_nodata=dst_nodata, num_threads=num_threads, out=destination)
+            return _reproject_output(destination, dst_transform, dst_crs, dst_nodata, return_only_data,
+                                     overview_strategy, overview_level)
+
         # Compute real polygon that is going to be read
         # Read a padded window of the input data. This data will be then used for reprojection
-        geotensor_in = read_from_polygon(data_in, polygon_dst_crs, crs_polygon=dst_crs,
-                                         pad_add=(3, 3), return_only_data=False,
-                                         trigger_load=True)
+        with call_record.phase("read"):
+            geotensor_in = read_from_polygon(data_in, polygon_dst_crs, crs_polygon=dst_crs,
+                                             pad_add=(3, 3), return_only_data=False,
+                                             trigger_load=True)
     else:
         geotensor_in = data_in
 
     # Triggering load makes that fill_value_default goes to nodata
     np_array_in = np.asanyarray(geotensor_in.values)
 
-    if cast:
-        if isbool_dtypedst:
+    with call_record.phase("cast"):
+        if cast:
+            if isbool_dtypedst:
+                np_array_in = np_array_in.astype(np.float32)
+            else:
+                np_array_in = np_array_in.astype(dtype_dst)
+        elif isbool_dtypein:
             np_array_in = np_array_in.astype(np.float32)
-        else:
-            np_array_in = np_array_in.astype(dtype_dst)
-    elif isbool_dtypein:
-        np_array_in = np_array_in.astype(np.float32)
 
 
-    index_iter = [[(ns, i) for i in range(s)] for ns, s in named_shape.items() if ns not in ["x", "y"]]
-    # e.g. if named_shape = {'time': 4, 'band': 2, 'x':10, 'y': 10} index_iter ->
-    # [[('time', 0), ('time', 1), ('time', 2), ('time', 3)],
-    #  [('band', 0), ('band', 1)]]
+    # Warp all the (time, band) slices as a stack of 2D arrays (N, H, W)
+    np_array_in = np_array_in.reshape((-1,) + np_array_in.shape[-2:])
+    if isbool_dtypedst:
+        dst_write = destination.astype(np.float32).reshape((-1,) + destination.shape[-2:])
+        dst_nodata_write = float(dst_nodata)
+    else:
+        dst_write = destination.reshape((-1,) + destination.shape[-2:])
+        dst_nodata_write = dst_nodata
+
+    plan = None
+    if use_warp_plan and (resampling in warp_plan.WARP_PLAN_RESAMPLING):
+        with call_record.phase("plan"):
+            plan = warp_plan.get_warp_plan(crs_data_in, geotensor_in.transform, np_array_in.shape[-2:],
+                                           dst_crs, dst_transform, dst_write.shape[-2:])
+
+    if plan is not None:
+        with call_record.phase("warp"):
+            plan.apply(np_array_in, resampling=resampling, src_nodata=geotensor_in.fill_value_default,
+                       dst_nodata=dst_nodata_write, out=dst_write)
+    else:
+        with call_record.phase("warp"):
+            _warp_stack(np_array_in, dst_write, src_transform=geotensor_in.transform, src_crs=crs_data_in,
+                        dst_transform=dst_transform, dst_crs=dst_crs, src_nodata=geotensor_in.fill_value_default,
+                        dst_nodata=dst_nodata_write, resampling=resampling, num_threads=num_threads)
 
-    for current_select_tuple in itertools.product(*index_iter):
-        # current_select_tuple = (('time', 0), ('band', 0))
-        i_sel_tuple = tuple(t[1] for t in current_select_tuple)
+    if isbool_dtypedst:
+        destination[...] = (dst_write > .5).reshape(destination.shape)
 
-        np_array_iter = np_array_in[i_sel_tuple]
-        if isbool_dtypedst:
-            dst_iter_write = destination[i_sel_tuple].astype(np.float32)
-            dst_nodata_iter = float(dst_nodata)
-        else:
-            dst_iter_write = destination[i_sel_tuple]
-            dst_nodata_iter = dst_nodata
+    return _reproject_output(destination, dst_transform, dst_crs, dst_nodata, return_only_data,
+                             overview_strategy, overview_level)
 
-        rasterio.warp.reproject(
-            np_array_iter,
-            dst_iter_write,
-            src_transform=geotensor_in.transform,
-            src_crs=crs_data_in,
-            dst_transform=dst_transform,
-            dst_crs=dst_crs,
-            src_nodata=geotensor_in.fill_value_default,
-            dst_nodata=dst_nodata_iter,
-            resampling=resampling)
-        
-        if isbool_dtypedst:
-            destination[i_sel_tuple] = (dst_iter_write > .5)
 
+def _reproject_output(destination:np.ndarray, dst_transform:rasterio.Affine, dst_crs:Any, dst_nodata:Any,
+                      return_only_data:bool, overview_strategy:str,
+                      overview_level:Optional[int]) -> Union[GeoTensor, np.ndarray]:
     if return_only_data:
         return destination
 
-    return GeoTensor(destination, transform=dst_transform, crs=dst_crs,
-                     fill_value_default=dst_nodata)
+    output = GeoTensor(destination, transform=dst_transform, crs=dst_crs,
+                       fill_value_default=dst_nodata)
+    if overview_strategy != "off":
+        output.overview_level = overview_level
+    return output
+
+
+def _window_within(data_in:GeoData, polygon:Polygon, crs_polygon:Any, pad_add:Tuple[int, int]=(0, 0)) -> bool:
+    """ Returns True if the (padded) window of `data_in` that covers `polygon` is within the bounds of `data_in` """
+    window_in = window_from_polygon(data_in, polygon, crs_polygon)
+    window_in = round_outer_window(pad_window(window_in, pad_add))
+    return (window_in.row_off >= 0) and (window_in.col_off >= 0) and \
+           (window_in.row_off + window_in.height <= data_in.height) and \
+           (window_in.col_off + window_in.width <= data_in.width)
+
+
+def _reproject_tile_bytes(tile_size:int, n_slices:int, downsampling_factor:float, dtype_src:Any,
+                          dtype_dst:Any) -> int:
+    """
+    Estimation of the peak memory of `read_reproject` for a square tile of the output of side `tile_size`: output
+    tile, padded source window (and its cast copy) and the buffers of the GDAL warper.
+    """
+    itemsize_src, itemsize_dst = np.dtype(dtype_src).itemsize, np.dtype(dtype_dst).itemsize
+    side_src = int(ceil(tile_size * downsampling_factor)) + 8
+    shape_src, shape_dst = (side_src, side_src), (tile_size, tile_size)
+    nbytes = n_slices * (tile_size ** 2 * itemsize_dst + side_src ** 2 * (itemsize_src + itemsize_dst))
+    cost_slice = _warp_cost_bytes(shape_src, shape_dst, dtype_dst, [])
+    if cost_slice > GDAL_WARP_MEMORY_LIMIT * 1024 ** 2:
+        nbytes += GDAL_WARP_MEMORY_LIMIT * 1024 ** 2
+    else:
+        nbytes += min(cost_slice * n_slices, max(cost_slice, WARP_MULTIBAND_MEMORY_LIMIT * 1024 ** 2))
+    return nbytes
+
+
+def read_reproject_chunked(data_in: GeoData, dst_crs: Optional[str]=None,
+                           bounds: Optional[Tuple[float, float, float, float]]=None,
+                           resolution_dst_crs: Optional[Union[float, Tuple[float, float]]]=None,
+                           dst_transform:Optional[rasterio.Affine]=None,
+                           window_out:Optional[rasterio.windows.Window]=None,
+                           resampling: rasterio.warp.Resampling = rasterio.warp.Resampling.cubic_spline,
+                           dtype_dst:Any=None, dst_nodata: Optional[int] = None,
+                           out:Optional[np.ndarray]=None, path_out:Optional[str]=None,
+                           blocksize:int=SIZE_DEFAULT, max_memory:int=CHUNKED_MEMORY_BUDGET_DEFAULT,
+                           max_workers:int=1, overview_strategy:str="off", num_threads:int=1,
+                           use_warp_plan:bool=False, use_warped_vrt:bool=False) -> Optional[GeoTensor]:
+    """
+    Same as `read_reproject` but the output is split in square tiles that are reprojected one by one (each one
+    reading only the region of `data_in` that it needs). The results are written into `out` (e.g. a `np.memmap`)
+    or into a tiled GeoTIFF in `path_out`. The size of the tiles is chosen such that the memory needed to
+    reproject the tiles that are processed at the same time (`max_workers`) stays within `max_memory`.
+
+    Tiles are reprojected independently: results are close but not always bit-identical to the ones of
+    `read_reproject` (the approximate coordinate transformation of GDAL depends on the extent of the warp).
+
+    Args:
+        data_in: GeoData to read and reproject. Expected coords "x" and "y".
+        dst_crs: CRS to reproject.
+        bounds: Optional. bounds in CRS specified by `dst_crs`. If not provided `window_out` must be given.
+        resolution_dst_crs: resolution in the CRS specified by `dst_crs`.
+        dst_transform: Optional dest transform (see `read_reproject`).
+        window_out: Window out to read w.r.t `dst_transform`. If not provided it is computed from the bounds.
+        resampling: specifies how data is reprojected from `rasterio.warp.Resampling`.
+        dtype_dst: if None it will be `out.dtype` if `out` is given, otherwise `data_in.dtype`.
+        dst_nodata: dst_nodata value
+        out: array to write the output. Its shape must be the shape of the output (the shape of `data_in` with
+            the spatial dims of `window_out`). If `out` and `path_out` are None the output is allocated in memory
+            (only the working memory of the reprojection is bounded then).
+        path_out: path of a tiled GeoTIFF to write the output. The output must be 2D or 3D and not boolean.
+            The tiles are aligned with the blocks of the GeoTIFF and written as they are reprojected.
+        blocksize: blocksize of the GeoTIFF. If `path_out` is given the side of the tiles is a multiple of it.
+        max_memory: memory budget in MB of the tiles processed concurrently. It doesn't include `out`.
+        max_workers: number of tiles reprojected concurrently in a thread pool. Defaults to 1 (no thread pool).
+        overview_strategy: see `read_reproject`.
+        num_threads: number of threads of the GDAL warper of each tile.
+        use_warp_plan: see `read_reproject`.
+        use_warped_vrt: see `read_reproject`.
+
+    Returns:
+        GeoTensor with the output (backed by `out` if given) or None if `path_out` is given.
+
+    Examples:
+        >>> out = np.lib.format.open_memmap("/scratch/out.npy", mode="w+", dtype=np.uint16,
+        ...                                 shape=(13, 40_000, 60_000))
+        >>> read_reproject_chunked(s2reader, dst_crs="EPSG:3035", bounds=bounds, resolution_dst_crs=10,
+        ...                        out=out, max_memory=2048, max_workers=4)
+    """
+    assert (out is None) or (path_out is None), "Only one of out or path_out can be given"
+
+    dst_transform = window_utils.figure_out_transform(transform=dst_transform, bounds=bounds,
+                                                      resolution_dst=resolution_dst_crs)
+    if window_out is None:
+        assert bounds is not None, "Both window_out and bounds are None. This is needed to figure out the size of the output array"
+        window_out = rasterio.windows.from_bounds(*bounds,
+                                                  transform=dst_transform).round_lengths(op="ceil",
+                                                                                         pixel_precision=PIXEL_PRECISION)
+    height, width = int(window_out.height), int(window_out.width)
+    transform_out = rasterio.windows.transform(window_out, dst_transform)
+    if dst_crs is None:
+        dst_crs = data_in.crs
+
+    if dtype_dst is None:
+        dtype_dst = data_in.dtype if out is None else out.dtype
+    # Do not cast the tiles if the type does not change
+    dtype_dst_tile = None if np.dtype(dtype_dst) == np.dtype(data_in.dtype) else dtype_dst
+
+    dst_nodata = dst_nodata or data_in.fill_value_default
+    if np.dtype(dtype_dst) == "bool":
+        dst_nodata = bool(dst_nodata)
+
+    named_shape = OrderedDict(zip(data_in.dims, data_in.shape))
+    dict_shape_window_out = {"x": width, "y": height}
+    shape_out = tuple([named_shape[s] if s not in ["x", "y"] else dict_shape_window_out[s] for s in named_shape])
+    n_slices = int(np.prod(shape_out[:-2]))
+
+    # Side of the tiles
+    polygon_dst_crs = window_utils.window_polygon(rasterio.windows.Window(0, 0, width, height), transform_out)
+    downsampling_factor = _downsampling_factor(data_in, polygon_dst_crs, dst_crs,
+                                               rasterio.windows.Window(0, 0, width, height))
+    max_workers = max(1, max_workers)
+    budget_tile = max_memory * 1024 ** 2 // max_workers
+    step = blocksize if path_out is not None else 16
+    tile_size = max(1, max(height, width) // step) * step
+    while (tile_size > step) and (_reproject_tile_bytes(tile_size, n_slices, downsampling_factor,
+                                                        data_in.dtype, dtype_dst) > budget_tile):
+        tile_size = max(step, (tile_size // 2) // step * step)
+
+    windows = create_windows((height, width), window_size=(tile_size, tile_size))
+
+    def reproject_tile(window:rasterio.windows.Window) -> np.ndarray:
+        output = read_reproject(data_in, dst_crs=dst_crs, dst_transform=rasterio.windows.transform(window, transform_out),
+                                window_out=rasterio.windows.Window(0, 0, window.width, window.height),
+                                resampling=resampling, dtype_dst=dtype_dst_tile, return_only_data=False,
+                                dst_nodata=dst_nodata, overview_strategy=overview_strategy, num_threads=num_threads,
+                                use_warp_plan=use_warp_plan, use_warped_vrt=use_warped_vrt)
+        return np.asanyarray(output.values)
+
+    if path_out is not None:
+        assert len(shape_out) in (2, 3), f"Expected data with 2 or 3 dimensions to save as GeoTIFF found: {shape_out}"
+        assert np.dtype(dtype_dst) != "bool", "Boolean data can't be saved as GeoTIFF"
+        from georeader.save import PROFILE_TILED_GEOTIFF_DEFAULT
+        profile = PROFILE_TILED_GEOTIFF_DEFAULT.copy()
+        profile.update({"driver": "GTiff", "dtype": str(np.dtype(dtype_dst)), "nodata": dst_nodata,
+                        "count": shape_out[0] if len(shape_out) == 3 else 1, "height": height, "width": width,
+                        "crs": dst_crs, "transform": transform_out, "tiled": True,
+                        "blockxsize": blocksize, "blockysize": blocksize})
+        rst_out = rasterio.open(path_out, "w", **profile)
+
+        def write_tile(window:rasterio.windows.Window, data:np.ndarray) -> None:
+            rst_out.write(data if data.ndim == 3 else data[np.newaxis], window=window)
+    else:
+        rst_out = None
+        if out is None:
+            out = np.empty(shape_out, dtype=dtype_dst)
+        assert out.shape == shape_out, f"Unexpected shape of out {out.shape} expected {shape_out}"
+
+        def write_tile(window:rasterio.windows.Window, data:np.ndarray) -> None:
+            out[(..., ) + window.toslices()] = data
+
+    try:
+        if max_workers == 1:
+            for window in windows:
+                write_tile(window, reproject_tile(window))
+        else:
+            # At most max_workers tiles are in memory at the same time
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = deque()
+                windows_iter = iter(windows)
+                for window in itertools.islice(windows_iter, max_workers):
+                    futures.append((window, executor.submit(reproject_tile, window)))
+                while len(futures) > 0:
+                    window, future = futures.popleft()
+                    data = future.result()
+                    for window_next in itertools.islice(windows_iter, 1):
+                        futures.append((window_next, executor.submit(reproject_tile, window_next)))
+                    write_tile(window, data)
+                    del data
+    finally:
+        if rst_out is not None:
+            rst_out.close()
+
+    if path_out is not None:
+        return None
+
+    return GeoTensor(out, transform=transform_out, crs=dst_crs, fill_value_default=dst_nodata)
 
 
 def read_from_tile(data:GeoData, x:int, y:int, z:int, dst_crs:Optional[Any]=WEB_MERCATOR_CRS, 
                    out_shape:Optional[Tuple[int,int]]=(SIZE_DEFAULT, SIZE_DEFAULT), 
                    resolution_dst_crs:Optional[Union[float, Tuple[float, float]]]=None,
-                   assert_if_not_intersects:bool=False) -> Optional[GeoTensor]:
+                   assert_if_not_intersects:bool=False,
+                   overview_strategy:str="off") -> Optional[GeoTensor]:
     """
     Read a web mercator tile from a GeoData object. Tiles are TMS tiles defined as: (https://wiki.openstreetmap.org/wiki/Slippy_map_tilenames)
 
@@ -677,6 +1774,8 @@ def read_from_tile(data:GeoData, x:int, y:int, z:int, dst_crs:Optional[Any]=WEB_
         resolution_dst_crs (Optional[Union[float, Tuple[float, float]]], optional): output resolution. Defaults to None. 
             If out_shape is not None it will be ignored. If None and out_shape is None the output will be at the resolution of the input data.
         assert_if_not_intersects (bool, optional): If True it will raise an error if the tile does not intersect the data. Defaults to False.
+        overview_strategy (str, optional): if data is a reader with overviews, strategy to select the overview to
+            read from (see `select_overview_level`). Defaults to "off".
 
     Returns:
         GeoTensor: GeoTensor covering the tile or None if the tile does not intersect the data.
@@ -688,11 +1787,11 @@ def read_from_tile(data:GeoData, x:int, y:int, z:int, dst_crs:Optional[Any]=WEB_
     
     if not intersects:
         assert not assert_if_not_intersects, "Tile does not intersect data"
-    else:
         return
 
     if out_shape is not None and hasattr(data, "read_from_tile"):
-        return data.read_from_tile(x, y, z, dst_crs=dst_crs, out_shape=out_shape)
+        return data.read_from_tile(x, y, z, dst_crs=dst_crs, out_shape=out_shape,
+                                   overview_strategy=overview_strategy)
     
     if dst_crs is None:
         dst_crs = data.crs
@@ -722,7 +1821,7 @@ def read_from_tile(data:GeoData, x:int, y:int, z:int, dst_crs:Optional[Any]=WEB_
         dst_transform, window_data = calculate_transform_window(data, dst_crs, resolution_dst_crs)
 
     return read_reproject(data, dst_crs=dst_crs, dst_transform=dst_transform, 
-                          window_out=window_data)
+                          window_out=window_data, overview_strategy=overview_strategy)
 
 
 def read_rpcs(input_npy:NDArray, rpcs:rasterio.rpc.RPC, 
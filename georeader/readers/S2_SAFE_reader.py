@@ -223,6 +223,9 @@ class S2Image:
         else:
             self._pol_crs = None
 
+        # Footprints memoised by window_focus and crs (see footprint)
+        self._footprints: Dict[Any, Polygon] = {}
+
     def cache_product_to_local_dir(self, path_dest:Optional[str]=None, print_progress:bool=True,
                                    format_bands:Optional[str]=None) -> '__class__':
         """
@@ -331,14 +334,21 @@ class S2Image:
                 [(float(lngstr), float(latstr)) for latstr, lngstr in zip(coords_split[::2], coords_split[1::2])])
             self._pol_crs = window_utils.polygon_to_crs(self._pol, "EPSG:4326", self.crs)
 
-        pol_window = window_utils.window_polygon(self._get_reader().window_focus, self.transform)
+        window_focus = self._get_reader().window_focus
+        key = (tuple(window_focus.flatten()), tuple(self.transform),
+               None if crs is None else window_utils._crs_key(crs))
+        if key in self._footprints:
+            return self._footprints[key]
+
+        pol_window = window_utils.window_polygon(window_focus, self.transform)
 
         pol = self._pol_crs.intersection(pol_window)
 
-        if (crs is None) or window_utils.compare_crs(self.crs, crs):
-            return pol
+        if (crs is not None) and not window_utils.compare_crs(self.crs, crs):
+            pol = window_utils.polygon_to_crs(pol, self.crs, crs)
 
-        return window_utils.polygon_to_crs(pol, self.crs, crs)
+        self._footprints[key] = pol
+        return pol
 
     def radio_add_offsets(self) ->Dict[str,float]:
         if self._radio_add_offsets is None:
@@ -532,7 +542,25 @@ class S2Image:
 
         return s2obj
 
-    def load(self, boundless:bool=True)-> GeoTensor:
+    def lazy(self) -> Any:
+        """ Returns a `lazy.LazyExpression` to compute band math reading this object window by window (see `georeader.lazy`) """
+        from georeader import lazy
+        return lazy.lazy(self)
+
+    def load(self, boundless:bool=True, use_warp_plan:bool=False)-> GeoTensor:
+        """
+        Loads the bands in `self.bands`. Bands with a resolution different than `self.out_res` are resampled with
+        cubic spline.
+
+        Args:
+            boundless: read boundless. Defaults to True.
+            use_warp_plan: if True the bands with different resolution are resampled with the cached `WarpPlan`
+                between the grids (see `read.read_reproject`). The bands of the same resolution (and the images
+                of the same tile) share the plan. Defaults to False.
+
+        Returns:
+            GeoTensor with the bands in `self.bands`.
+        """
         reader_ref = self._get_reader()
         geotensor_ref = reader_ref.load(boundless=boundless)
 
@@ -557,7 +585,8 @@ class S2Image:
                 if np.mean(np.abs(np.array(reader_iter.res)-np.array(geotensor_ref.res))) < 1e-6:
                     geotensor_iter = reader_iter.load(boundless=boundless)
                 else:
-                    geotensor_iter = read.read_reproject_like(reader_iter, geotensor_ref)
+                    geotensor_iter = read.read_reproject_like(reader_iter, geotensor_ref,
+                                                              use_warp_plan=use_warp_plan)
 
 
             # Important: Adds radio correction! otherwise images after 2022-01-25 shifted (PROCESSING_BASELINE '04.00' or above)
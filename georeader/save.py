@@ -8,6 +8,8 @@ from georeader.abstract_reader import AbstractGeoData
 from georeader.geotensor import GeoTensor
 from typing import Optional, List, Union, Dict, Any
 import time
+from georeader import instrumentation
+from georeader.lazy import LazyExpression
 
 
 GeoData = Union[AbstractGeoData, GeoTensor]
@@ -123,7 +125,9 @@ def save_cog(data_save:GeoData, path_tiff_save:str,
     Save data GeoData object as cloud optimized GeoTIFF
 
     Args:
-        data_save: GeoData (C, H, W) format with geoinformation (crs and transform).
+        data_save: GeoData (C, H, W) format with geoinformation (crs and transform). If it is a
+            `lazy.LazyExpression` it is evaluated window by window and streamed to disk (see `LazyExpression.save_cog`).
+            GeoTensors backed by a `np.memmap` (see `GeoTensor.empty_on_disk`) are also saved window by window.
         descriptions: name of the bands
         path_tiff_save: path to save the COG GeoTIFF
         profile: profile dict to save the data. crs and transform will be updated from data_save.
@@ -139,6 +143,15 @@ def save_cog(data_save:GeoData, path_tiff_save:str,
         >> save_cog(data, "example.tif", descriptions=["band1", "band2", "band3", "band4"])
 
     """
+    if isinstance(data_save, GeoTensor) and isinstance(data_save.values, np.memmap):
+        # Disk-backed GeoTensor (e.g. `GeoTensor.empty_on_disk`): stream it window by window
+        data_save = data_save.lazy()
+
+    if isinstance(data_save, LazyExpression):
+        data_save.save_cog(path_tiff_save, profile=profile, descriptions=descriptions, tags=tags,
+                           dir_tmpfiles=dir_tmpfiles, fs=fs)
+        return
+
     if profile is None:
         profile = {
             "compress": "lzw",
@@ -161,6 +174,58 @@ def save_cog(data_save:GeoData, path_tiff_save:str,
               path_tiff_save, profile, descriptions=descriptions,
               tags=tags, dir_tmpfiles=dir_tmpfiles, fs=fs)
 
+def copy_to_cog(path_src:str, path_tiff_save:str, profile:Optional[Dict[str, Any]]=None,
+                dir_tmpfiles:str=".", fs:Optional[Any]=None) -> str:
+    """
+    Copies the local raster `path_src` as a cloud optimized GeoTIFF with the COG driver of GDAL. GDAL reads the
+    source by blocks, so the raster does not need to fit in memory.
+
+    Args:
+        path_src: path of the local raster to copy (e.g. a tiled GeoTIFF).
+        path_tiff_save: path to save the COG GeoTIFF
+        profile: creation options of the COG. Keys of the rasterio profile (crs, transform, dtype, ...) are
+            taken from `path_src` and ignored.
+        dir_tmpfiles: dir to create tempfiles if needed
+        fs: fsspec filesystem to save the file
+
+    Returns:
+        path_tiff_save
+    """
+    with rasterio.Env() as env:
+        assert "COG" in env.drivers(), "COG driver not available (GDAL >= 3.1 required)"
+
+    if profile is None:
+        profile = {
+            "compress": "lzw",
+            "RESAMPLING": "CUBICSPLINE",  # for pyramids
+        }
+    options = {k: v for k, v in profile.items()
+               if k not in ("crs", "transform", "dtype", "count", "height", "width", "driver", "nodata")}
+    options["BIGTIFF"] = "IF_SAFER"
+
+    with instrumentation.record("save_cog") as call_record:
+        is_remote_file = any((path_tiff_save.startswith(ext) for ext in REMOTE_FILE_EXTENSIONS))
+        if is_remote_file:
+            with tempfile.NamedTemporaryFile(dir=dir_tmpfiles, suffix=".tif", delete=True) as fileobj:
+                name_save = fileobj.name
+        else:
+            name_save = path_tiff_save
+
+        with call_record.phase("write"):
+            rasterio_shutil.copy(path_src, name_save, driver="COG", **options)
+
+        if is_remote_file:
+            if fs is None:
+                import fsspec
+                fs = fsspec.filesystem(path_tiff_save.split(":")[0])
+            with call_record.phase("upload"):
+                fs.put_file(name_save, path_tiff_save, overwrite=True)
+            if os.path.exists(name_save):
+                os.remove(name_save)
+
+    return path_tiff_save
+
+
 def _add_overviews(rst_out, tile_size, verbose=False):
     """ Add overviews to be a cog and be displayed nicely in GIS software """
 
@@ -208,7 +273,18 @@ def _save_cog(out_np: np.ndarray, path_tiff_save: str, profile: dict,
         >> transform = rasterio.Affine(10, 0, 799980.0, 0, -10, 1900020.0)
         >> _save_cog(img, "example.tif", {"crs": {"init": "epsg:32644"}, "transform":transform})
     """
-
+    with instrumentation.record("save_cog") as call_record:
+        call_record.add(output_nbytes=out_np.nbytes)
+        path_saved = _save_cog_impl(out_np, path_tiff_save, profile, descriptions=descriptions, tags=tags,
+                                    dir_tmpfiles=dir_tmpfiles, requester_pays=requester_pays, fs=fs,
+                                    call_record=call_record)
+    return path_saved
+
+
+def _save_cog_impl(out_np: np.ndarray, path_tiff_save: str, profile: dict,
+                   descriptions:Optional[List[str]], tags: Optional[dict], dir_tmpfiles:str,
+                   requester_pays:bool, fs:Optional[Any], call_record:Any) -> str:
+    """ Implementation of `_save_cog`. The phases of the call are added to `call_record` """
     assert len(out_np.shape) == 3, f"Expected 3d tensor found tensor with shape {out_np.shape}"
     if descriptions is not None:
         assert len(descriptions) == out_np.shape[0], f"Unexpected band descriptions {len(descriptions)} expected {out_np.shape[0]}"
@@ -243,13 +319,15 @@ def _save_cog(out_np: np.ndarray, path_tiff_save: str, profile: dict,
         else:
             name_save = path_tiff_save
         profile["driver"] = "COG"
-        with rasterio.open(name_save, "w", **profile) as rst_out:
-            if tags is not None:
-                rst_out.update_tags(**tags)
-            rst_out.write(out_np)
-            if descriptions is not None:
-                for i in range(1, out_np.shape[0] + 1):
-                    rst_out.set_band_description(i, descriptions[i-1])
+        # The COG driver writes the file (overviews and compression) when the dataset is closed
+        with call_record.phase("write"):
+            with rasterio.open(name_save, "w", **profile) as rst_out:
+                if tags is not None:
+                    rst_out.update_tags(**tags)
+                rst_out.write(out_np)
+                if descriptions is not None:
+                    for i in range(1, out_np.shape[0] + 1):
+                        rst_out.set_band_description(i, descriptions[i-1])
 
         if is_remote_file:
             if fs is None:
@@ -258,7 +336,8 @@ def _save_cog(out_np: np.ndarray, path_tiff_save: str, profile: dict,
                                        requester_pays=requester_pays)
             if not os.path.exists(name_save):
                 raise FileNotFoundError(f"File {name_save} have not been created")
-            fs.put_file(name_save, path_tiff_save, overwrite=True)
+            with call_record.phase("upload"):
+                fs.put_file(name_save, path_tiff_save, overwrite=True)
             # subprocess.run(["gsutil", "-m", "mv", name_save, path_tiff_save])
             if os.path.exists(name_save):
                 os.remove(name_save)
@@ -282,19 +361,22 @@ def _save_cog(out_np: np.ndarray, path_tiff_save: str, profile: dict,
         named_tempfile = fileobj.name
 
     with rasterio.open(named_tempfile, "w", **profile) as rst_out:
-        if tags is not None:
-            rst_out.update_tags(**tags)
-        rst_out.write(out_np)
-        if descriptions is not None:
-            for i in range(1, out_np.shape[0] + 1):
-                rst_out.set_band_description(i, descriptions[i - 1])
-        
-        _add_overviews(rst_out, tile_size=profile["blockysize"])
+        with call_record.phase("write"):
+            if tags is not None:
+                rst_out.update_tags(**tags)
+            rst_out.write(out_np)
+            if descriptions is not None:
+                for i in range(1, out_np.shape[0] + 1):
+                    rst_out.set_band_description(i, descriptions[i - 1])
+
+        with call_record.phase("overviews"):
+            _add_overviews(rst_out, tile_size=profile["blockysize"])
         print("Copying temp file")
-        rasterio_shutil.copy(rst_out, path_tiff_save, copy_src_overviews=True, tiled=True,
-                             blockxsize=profile["blockxsize"],
-                             blockysize=profile["blockysize"],
-                             driver="GTiff")
+        with call_record.phase("copy"):
+            rasterio_shutil.copy(rst_out, path_tiff_save, copy_src_overviews=True, tiled=True,
+                                 blockxsize=profile["blockxsize"],
+                                 blockysize=profile["blockysize"],
+                                 driver="GTiff")
 
     rasterio_shutil.delete(named_tempfile)
     return path_tiff_save
@@ -0,0 +1,222 @@
+"""
+Memory-mapped reads of uncompressed local GeoTIFFs.
+
+If a GeoTIFF is uncompressed and its strips (or tiles) are stored contiguously in the file, the pixels can be read
+with `numpy.memmap` without going through GDAL. For striped rasters the windows are returned as views of the
+memory map (no copy at all); for tiled rasters only the tiles that intersect the window are copied. Several processes
+reading the same file share the pages of the OS page cache.
+
+The memory maps are opened in copy-on-write mode (`mode="c"`): the arrays are writable but the changes are never
+written to the file.
+
+Examples:
+    >>> from georeader.rasterio_reader import RasterioReader
+    >>> r = RasterioReader("/scratch/raster_uncompressed.tif", use_memmap=True)
+    >>> data = r.load() # GeoTensor backed by np.memmap
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+import rasterio
+import rasterio.windows
+import rasterio.errors
+from rasterio.enums import Interleaving
+
+TIFF_MEMMAP_CACHE_SIZE = 128
+
+
+class TiffMemmap:
+    """
+    Layout of the pixels of an uncompressed GeoTIFF in the file.
+
+    Args:
+        path: path of the raster.
+        dtype: data type of the pixels.
+        offset: offset in bytes of the first pixel.
+        shape: shape of the strided view of the file: `(count, height, width)` for striped rasters or
+            `(count, n_tiles_y, n_tiles_x, tile_height, tile_width)` for tiled rasters.
+        strides: strides in bytes of the view.
+        height: height of the raster.
+        width: width of the raster.
+    """
+    def __init__(self, path:str, dtype:np.dtype, offset:int, shape:Tuple[int, ...], strides:Tuple[int, ...],
+                 height:int, width:int):
+        self.path = path
+        self.dtype = dtype
+        self.offset = offset
+        self.shape = shape
+        self.strides = strides
+        self.height = height
+        self.width = width
+
+    @property
+    def tiled(self) -> bool:
+        return len(self.shape) == 5
+
+    def array(self) -> np.ndarray:
+        """
+        Returns a strided view of a new memory map of the file. Each call maps the file again so that the
+        (copy-on-write) changes made to an array are not seen by the others.
+        """
+        size_bytes = sum((s - 1) * st for s, st in zip(self.shape, self.strides)) + self.dtype.itemsize
+        raw = np.memmap(self.path, dtype=self.dtype, mode="c", offset=self.offset,
+                        shape=(size_bytes // self.dtype.itemsize,))
+        return np.lib.stride_tricks.as_strided(raw, shape=self.shape, strides=self.strides)
+
+    def read(self, window:rasterio.windows.Window, indexes:List[int]) -> np.ndarray:
+        """
+        Reads the window. For striped rasters (and consecutive `indexes`) it returns a view of the memory map.
+
+        Args:
+            window: window with integer offsets and shape within the raster.
+            indexes: 1-based bands to read.
+
+        Returns:
+            array with shape `(len(indexes), window.height, window.width)`
+        """
+        row_off, col_off = int(window.row_off), int(window.col_off)
+        row_end, col_end = row_off + int(window.height), col_off + int(window.width)
+        assert (row_off >= 0) and (col_off >= 0) and (row_end <= self.height) and (col_end <= self.width), \
+            f"Window {window} outside the raster ({self.height}, {self.width})"
+
+        bands = np.array(indexes) - 1
+        if (len(bands) > 0) and np.all(np.diff(bands) == 1):
+            slice_bands = slice(int(bands[0]), int(bands[-1]) + 1)
+        else:
+            slice_bands = bands
+
+        array = self.array()
+        if not self.tiled:
+            return array[slice_bands, row_off:row_end, col_off:col_end]
+
+        # Copy the tiles that intersect the window
+        tile_height, tile_width = self.shape[-2:]
+        tile_row_off, tile_col_off = row_off // tile_height, col_off // tile_width
+        tile_row_end, tile_col_end = (row_end - 1) // tile_height + 1, (col_end - 1) // tile_width + 1
+        tiles = array[slice_bands, tile_row_off:tile_row_end, tile_col_off:tile_col_end]
+        tiles = tiles.transpose(0, 1, 3, 2, 4).reshape(tiles.shape[0], tiles.shape[1] * tile_height,
+                                                        tiles.shape[2] * tile_width)
+        row_off_tiles, col_off_tiles = row_off - tile_row_off * tile_height, col_off - tile_col_off * tile_width
+        return tiles[:, row_off_tiles:(row_off_tiles + row_end - row_off),
+                     col_off_tiles:(col_off_tiles + col_end - col_off)]
+
+
+def _block_offsets(src:rasterio.DatasetReader, bidx:int, n_blocks_x:int, n_blocks_y:int) -> Optional[np.ndarray]:
+    offsets = np.zeros((n_blocks_y, n_blocks_x), dtype=np.int64)
+    for y in range(n_blocks_y):
+        for x in range(n_blocks_x):
+            offset = src.get_tag_item(f"BLOCK_OFFSET_{x}_{y}", "TIFF", bidx=bidx)
+            if offset is None:
+                return None
+            offsets[y, x] = int(offset)
+    return offsets
+
+
+def _tiff_memmap(path:str) -> Optional[TiffMemmap]:
+    with open(path, "rb") as fh:
+        byteorder = fh.read(2)
+    if byteorder != (b"II" if sys.byteorder == "little" else b"MM"):
+        return None
+
+    with rasterio.open(path) as src:
+        if (src.driver != "GTiff") or (src.compression is not None) or (len(set(src.dtypes)) != 1):
+            return None
+        if "NBITS" in src.tags(ns="IMAGE_STRUCTURE"):
+            return None
+
+        dtype = np.dtype(src.dtypes[0])
+        itemsize = dtype.itemsize
+        count, height, width = src.count, src.height, src.width
+        block_height, block_width = src.block_shapes[0]
+        tiled = src.profile.get("tiled", False)
+        n_blocks_y = (height - 1) // block_height + 1
+        n_blocks_x = (width - 1) // block_width + 1
+        pixel_interleaved = (src.interleaving == Interleaving.pixel) or (count == 1)
+
+        if pixel_interleaved:
+            offsets = [_block_offsets(src, 1, n_blocks_x, n_blocks_y)]
+            n_samples = count
+        else:
+            offsets = [_block_offsets(src, b, n_blocks_x, n_blocks_y) for b in src.indexes]
+            n_samples = 1
+
+    if any(o is None for o in offsets):
+        return None
+
+    # The blocks of each band must be contiguous and stored in row major order
+    block_bytes = block_height * block_width * n_samples * itemsize
+    offsets_expected = np.arange(n_blocks_y * n_blocks_x, dtype=np.int64).reshape(n_blocks_y, n_blocks_x) * block_bytes
+    for o in offsets:
+        if not np.array_equal(o - o[0, 0], offsets_expected):
+            return None
+
+    band_offsets = np.array([o[0, 0] for o in offsets], dtype=np.int64)
+    band_spacing = int(band_offsets[1] - band_offsets[0]) if len(band_offsets) > 1 else 0
+    if (len(band_offsets) > 1) and not np.array_equal(np.diff(band_offsets), np.full(len(band_offsets) - 1, band_spacing)):
+        return None
+
+    offset_start = int(band_offsets[0])
+    if (offset_start % itemsize != 0) or (band_spacing % itemsize != 0) or (band_spacing < 0):
+        return None
+
+    if tiled:
+        bytes_band = n_blocks_y * n_blocks_x * block_bytes
+    else:
+        bytes_band = height * width * n_samples * itemsize
+
+    size_bytes = bytes_band + band_spacing * (len(band_offsets) - 1)
+    if offset_start + size_bytes > os.path.getsize(path):
+        return None
+
+    strides_band = itemsize if pixel_interleaved else band_spacing
+    sample = n_samples * itemsize
+    if tiled:
+        shape = (count, n_blocks_y, n_blocks_x, block_height, block_width)
+        strides = (strides_band, n_blocks_x * block_bytes, block_bytes, block_width * sample, sample)
+    else:
+        shape = (count, height, width)
+        strides = (strides_band, width * sample, sample)
+
+    return TiffMemmap(path, dtype=dtype, offset=offset_start, shape=shape, strides=strides,
+                      height=height, width=width)
+
+
+_TIFF_MEMMAPS: OrderedDict = OrderedDict()
+_TIFF_MEMMAPS_LOCK = threading.Lock()
+
+
+def open_tiff_memmap(path:str) -> Optional[TiffMemmap]:
+    """
+    Returns the memory map of the GeoTIFF in `path` or None if it can't be memory mapped (remote file, compressed,
+    non contiguous blocks, different byte order, etc.). Results are cached by path, modification time and size.
+
+    Args:
+        path: path of the raster.
+    """
+    if path.startswith("file://"):
+        path = path[len("file://"):]
+
+    if ("://" in path) or not os.path.isfile(path):
+        return None
+
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _TIFF_MEMMAPS_LOCK:
+        if key in _TIFF_MEMMAPS:
+            _TIFF_MEMMAPS.move_to_end(key)
+            return _TIFF_MEMMAPS[key]
+
+    try:
+        tiff = _tiff_memmap(path)
+    except rasterio.errors.RasterioIOError:
+        tiff = None
+
+    with _TIFF_MEMMAPS_LOCK:
+        _TIFF_MEMMAPS[key] = tiff
+        while len(_TIFF_MEMMAPS) > TIFF_MEMMAP_CACHE_SIZE:
+            _TIFF_MEMMAPS.popitem(last=False)
+
+    return tiff
@@ -0,0 +1,483 @@
+"""
+Reusable warp plans for repeated reprojections between the same grids.
+
+`rasterio.warp.reproject` recomputes the coordinate transformation between the source and the destination grid in
+every call. When many arrays share the same source grid (e.g. the images of a time series of the same MGRS tile)
+and are reprojected to the same destination grid, a `WarpPlan` computes once the coordinates in the source grid of
+the centers of the destination pixels and applies them to any number of arrays with the nearest, bilinear, cubic or
+cubic spline kernels.
+
+The plans are cached in a process-wide LRU cache keyed by the source and destination grids (see `get_warp_plan`).
+
+The plans follow the conventions of the GDAL warper: the coordinates are computed with the approximate
+transformer of GDAL (linear interpolation along the destination rows with a maximum error of
+`APPROX_TRANSFORM_TOLERANCE` pixels), the kernels are centered on the pixel centers and widened by the downsampling
+factor when the destination grid is coarser than the source grid, invalid source pixels are excluded from the
+kernels (weights renormalized), destination pixels whose center falls on an invalid source pixel are nodata and
+integer outputs are rounded. `WarpPlan.apply` resamples all the bands at once in blocks of `APPLY_BLOCK_SIZE`
+destination pixels. The results are close to `rasterio.warp.reproject` but not bit-identical.
+
+Examples:
+    >>> from georeader import warp_plan
+    >>> plan = warp_plan.get_warp_plan("EPSG:32630", src_transform, (10980, 10980),
+    ...                                "EPSG:4326", dst_transform, (2048, 2048))
+    >>> out = plan.apply(array, resampling=rasterio.warp.Resampling.bilinear, src_nodata=0, dst_nodata=0)
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+import rasterio
+import rasterio.crs
+import rasterio.warp
+from rasterio.warp import Resampling
+from georeader import window_utils
+
+WARP_PLAN_CACHE_SIZE_DEFAULT = 256 * 1024 ** 2
+
+# Resampling methods supported by `WarpPlan.apply`
+WARP_PLAN_RESAMPLING = (Resampling.nearest, Resampling.bilinear, Resampling.cubic, Resampling.cubic_spline)
+
+# Maximum error in source pixels of the approximated coordinates (default of the GDAL warper)
+APPROX_TRANSFORM_TOLERANCE = 0.125
+
+# Number of destination pixels resampled at once by `WarpPlan.apply`
+APPLY_BLOCK_SIZE = 16 * 1024
+
+# Radius in pixels of the kernels (before widening them by the downsampling factor)
+KERNEL_RADIUS = {Resampling.bilinear: 1, Resampling.cubic: 2, Resampling.cubic_spline: 2}
+# As GDAL, the kernels are only widened if the scale (destination pixels per source pixel) is below this value
+KERNEL_SCALE_THRESHOLD = 0.95
+
+
+def _approx_transform(transform_fn:Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]],
+                      height:int, width:int, tolerance:float=APPROX_TRANSFORM_TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordinates (x, y) in the source grid of the centers of the pixels of the destination grid computed as the
+    approximate transformer of GDAL: the coordinates of each segment of a destination row are linearly
+    interpolated between its ends if the error of the interpolation at its middle point is below `tolerance`,
+    otherwise the segment is split in two halves. Segments of 5 pixels or less are transformed exactly. All the
+    segments of the same level are transformed in one call to `transform_fn`.
+
+    Args:
+        transform_fn: function that maps destination pixel coordinates (x, y) to source pixel coordinates
+            (non-finite values for points that can't be transformed).
+        height: height of the destination grid.
+        width: width of the destination grid.
+        tolerance: maximum error in source pixels of the interpolation.
+
+    Returns:
+        arrays (height, width) with the x and y source pixel coordinates.
+    """
+    xs = np.full((height, width), np.nan)
+    ys = np.full((height, width), np.nan)
+    seg_row = np.arange(height)
+    seg_start = np.zeros(height, dtype=np.int64)
+    seg_end = np.full(height, width - 1, dtype=np.int64)
+
+    def segment_points(rows:np.ndarray, starts:np.ndarray, ends:np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        lengths = ends - starts + 1
+        seg_id = np.repeat(np.arange(len(rows)), lengths)
+        offset = np.arange(len(seg_id)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return seg_id, rows[seg_id], starts[seg_id] + offset
+
+    while len(seg_row) > 0:
+        short = (seg_end - seg_start) < 5
+        seg_mid = (seg_start + seg_end) // 2
+        _, rows_short, cols_short = segment_points(seg_row[short], seg_start[short], seg_end[short])
+        rows_exact = np.concatenate([rows_short] + [seg_row[~short]] * 3)
+        cols_exact = np.concatenate([cols_short, seg_start[~short], seg_mid[~short], seg_end[~short]])
+        xs_exact, ys_exact = transform_fn(cols_exact + 0.5, rows_exact + 0.5)
+        xs[rows_exact, cols_exact] = xs_exact
+        ys[rows_exact, cols_exact] = ys_exact
+
+        seg_row, seg_start, seg_end, seg_mid = seg_row[~short], seg_start[~short], seg_end[~short], seg_mid[~short]
+        frac_mid = (seg_mid - seg_start) / (seg_end - seg_start)
+        error = np.zeros(len(seg_row))
+        for values in [xs, ys]:
+            start, end = values[seg_row, seg_start], values[seg_row, seg_end]
+            error += np.abs(start + (end - start) * frac_mid - values[seg_row, seg_mid])
+        linear = error <= tolerance
+
+        seg_id, rows_linear, cols_linear = segment_points(seg_row[linear], seg_start[linear], seg_end[linear])
+        frac = (cols_linear - seg_start[linear][seg_id]) / (seg_end[linear] - seg_start[linear])[seg_id]
+        for values in [xs, ys]:
+            start = values[seg_row[linear], seg_start[linear]][seg_id]
+            end = values[seg_row[linear], seg_end[linear]][seg_id]
+            values[rows_linear, cols_linear] = start + (end - start) * frac
+
+        split = ~linear
+        seg_row = np.concatenate([seg_row[split]] * 2)
+        seg_start, seg_end = np.concatenate([seg_start[split], seg_mid[split]]), \
+                             np.concatenate([seg_mid[split], seg_end[split]])
+
+    return xs, ys
+
+
+def _kernel_weights(x:np.ndarray, resampling:Resampling) -> np.ndarray:
+    """ Weights of the kernel at the distances `x` (in units of the kernel) from its center """
+    if resampling == Resampling.bilinear:
+        return np.maximum(1 - x, 0)
+    if resampling == Resampling.cubic:
+        # Keys cubic convolution with a=-0.5 (as GDAL)
+        return np.where(x <= 1, (1.5 * x - 2.5) * x * x + 1,
+                        np.where(x < 2, ((-0.5 * x + 2.5) * x - 4) * x + 2, 0))
+    # Cubic B-spline (GDAL's cubic_spline)
+    return np.where(x < 1, (0.5 * x - 1) * x * x + 2 / 3, np.where(x < 2, (2 - x) * (2 - x) * (2 - x) / 6, 0))
+
+
+def _kernel_taps(coords:np.ndarray, resampling:Resampling, factor:float=1.,
+                 dtype:Any=np.float64) -> Tuple[np.ndarray, List[Tuple[int, np.ndarray]]]:
+    """
+    Returns the index of the pixel before `coords` (continuous coordinates with the pixel centers at integer
+    values) and the taps (offset from that index, weight) of the 1D kernel. As in the GDAL warper, if `factor`
+    (source pixels per destination pixel) is greater than 1 the support of the kernel is widened by `factor`.
+    """
+    index0 = np.floor(coords)
+    t = (coords - index0).astype(dtype)
+    index0 = index0.astype(np.int64)
+    if factor * KERNEL_SCALE_THRESHOLD <= 1:
+        factor = 1.
+    radius = int(np.ceil(KERNEL_RADIUS[resampling] * factor))
+    offsets = list(range(1 - radius, radius + 1))
+    if factor > 1:
+        factor = np.asarray(factor, dtype=dtype)
+        return index0, [(k, _kernel_weights(np.abs(t - k) / factor, resampling)) for k in offsets]
+
+    # Polynomials of the kernels in t (faster than evaluating the kernels at each distance)
+    if resampling == Resampling.bilinear:
+        weights = [1 - t, t]
+    elif resampling == Resampling.cubic:
+        weights = [((-0.5 * t + 1) * t - 0.5) * t, (1.5 * t - 2.5) * t * t + 1,
+                   ((-1.5 * t + 2) * t + 0.5) * t, (0.5 * t - 0.5) * t * t]
+    else:
+        s = 1 - t
+        weights = [s * s * s / 6, (0.5 * t - 1) * t * t + 2 / 3, ((-0.5 * t + 0.5) * t + 0.5) * t + 1 / 6,
+                   t * t * t / 6]
+    return index0, list(zip(offsets, weights))
+
+
+def _weight_sum_inside(index0:np.ndarray, taps:List[Tuple[int, np.ndarray]], size:int) -> np.ndarray:
+    """ Sum of the weights of the taps of the 1D kernels (see `_kernel_taps`) within the grid """
+    weight_sum = np.zeros(len(index0), dtype=taps[0][1].dtype)
+    for offset, weight in taps:
+        index = index0 + offset
+        weight_sum += np.where((index >= 0) & (index < size), weight, 0)
+    return weight_sum
+
+
+def _cast(values:np.ndarray, dtype:np.dtype) -> np.ndarray:
+    """ Casts the resampled values to `dtype` rounding and clipping integer types (as GDAL does) """
+    dtype = np.dtype(dtype)
+    if dtype.kind == "b":
+        return values > .5
+    if dtype.kind in "iu":
+        info = np.iinfo(dtype)
+        return np.clip(np.floor(values + .5), info.min, info.max).astype(dtype)
+    return values.astype(dtype)
+
+
+class WarpPlan:
+    """
+    Coordinates in the source grid of the centers of the pixels of the destination grid.
+
+    Args:
+        src_crs: crs of the source grid.
+        src_transform: transform of the source grid.
+        src_shape: spatial shape (height, width) of the source grid.
+        dst_crs: crs of the destination grid.
+        dst_transform: transform of the destination grid.
+        dst_shape: spatial shape (height, width) of the destination grid.
+    """
+    def __init__(self, src_crs:Any, src_transform:rasterio.Affine, src_shape:Tuple[int, int],
+                 dst_crs:Any, dst_transform:rasterio.Affine, dst_shape:Tuple[int, int]):
+        self.src_crs = src_crs
+        self.src_transform = src_transform
+        self.src_shape = tuple(src_shape)
+        self.dst_crs = dst_crs
+        self.dst_transform = dst_transform
+        self.dst_shape = tuple(dst_shape)
+
+        dst_to_src = ~src_transform * dst_transform
+        if window_utils.compare_crs(src_crs, dst_crs):
+            cols_dst, rows_dst = np.meshgrid(np.arange(self.dst_shape[1]) + 0.5, np.arange(self.dst_shape[0]) + 0.5)
+            cols, rows = dst_to_src * (cols_dst, rows_dst)
+        else:
+            def transform_fn(cols_dst:np.ndarray, rows_dst:np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+                xs, ys = dst_transform * (cols_dst, rows_dst)
+                xs, ys = rasterio.warp.transform(dst_crs, src_crs, xs, ys)
+                return ~src_transform * (np.asarray(xs), np.asarray(ys))
+
+            cols, rows = _approx_transform(transform_fn, height=self.dst_shape[0], width=self.dst_shape[1])
+        cols, rows = np.asarray(cols).ravel(), np.asarray(rows).ravel()
+
+        # Destination pixels whose center falls within the source grid
+        inside = np.isfinite(cols) & np.isfinite(rows) & (cols >= 0) & (cols < self.src_shape[1]) & \
+                 (rows >= 0) & (rows < self.src_shape[0])
+        self.dst_index = np.flatnonzero(inside)
+        # Continuous coordinates with the pixel centers at integer values
+        self.cols = (cols[inside] - 0.5).astype(np.float32)
+        self.rows = (rows[inside] - 0.5).astype(np.float32)
+
+        # Source pixels per destination pixel along each axis of the source grid (as GDAL's warper computes
+        # the scale of the kernels: extent in the source grid over size of the destination grid)
+        finite = np.isfinite(cols) & np.isfinite(rows)
+        self.factor_cols = self.factor_rows = 1.
+        if np.any(finite):
+            # Extent between the centers of the first and last destination pixels
+            self.factor_cols = float(np.ptp(cols[finite])) / max(self.dst_shape[1] - 1, 1)
+            self.factor_rows = float(np.ptp(rows[finite])) / max(self.dst_shape[0] - 1, 1)
+
+    @property
+    def nbytes(self) -> int:
+        """ Size in bytes of the plan """
+        return self.dst_index.nbytes + self.cols.nbytes + self.rows.nbytes
+
+    @staticmethod
+    def max_nbytes(dst_shape:Tuple[int, int]) -> int:
+        """ Size in bytes of a plan whose destination pixels are all within the source grid """
+        return int(np.prod(dst_shape)) * (np.dtype(np.int64).itemsize + 2 * np.dtype(np.float32).itemsize)
+
+    def apply(self, data:np.ndarray, resampling:Resampling=Resampling.bilinear,
+              src_nodata:Optional[Any]=None, dst_nodata:Any=0,
+              out:Optional[np.ndarray]=None) -> np.ndarray:
+        """
+        Resamples `data` from the source grid to the destination grid.
+
+        Source pixels equal to `src_nodata` are excluded from the kernels (the weights of the valid pixels are
+        renormalized). Destination pixels outside the source grid, whose center falls on an invalid source pixel
+        or without valid source pixels are set to `dst_nodata`.
+
+        All the bands are resampled at once: the data is copied to a padded (H, W, bands) array of the working type
+        (float32 for 8 and 16 bits and float32 data, float64 otherwise) and the kernels are applied to blocks of
+        `APPLY_BLOCK_SIZE` destination pixels.
+
+        Args:
+            data: array (..., H, W) with the spatial shape of the source grid.
+            resampling: one of `WARP_PLAN_RESAMPLING`.
+            src_nodata: nodata value of `data`.
+            dst_nodata: value of the destination pixels without data.
+            out: C-contiguous array (..., H', W') to write the output. Defaults to an array of `data.dtype`.
+
+        Returns:
+            array (..., H', W') with the spatial shape of the destination grid.
+        """
+        assert resampling in WARP_PLAN_RESAMPLING, f"Resampling {resampling} not supported. Expected one of {WARP_PLAN_RESAMPLING}"
+        data = np.asanyarray(data)
+        assert tuple(data.shape[-2:]) == self.src_shape, f"Expected data with spatial shape {self.src_shape} found {data.shape}"
+
+        shape_out = data.shape[:-2] + self.dst_shape
+        if out is None:
+            out = np.empty(shape_out, dtype=data.dtype)
+        assert tuple(out.shape) == shape_out, f"Expected out with shape {shape_out} found {out.shape}"
+        out[...] = dst_nodata
+
+        height, width = self.src_shape
+        data = data.reshape((-1, height, width))
+        out_flat = out.reshape((data.shape[0], self.dst_shape[0] * self.dst_shape[1]))
+        assert np.shares_memory(out_flat, out), "out must be C-contiguous"
+        if len(self.dst_index) == 0:
+            return out
+
+        # Invalid source pixels (shared by all the bands if they are the same)
+        invalid = None
+        if src_nodata is not None:
+            nodata_isnan = isinstance(src_nodata, float) and np.isnan(src_nodata)
+            invalid = np.isnan(data) if nodata_isnan else (data == src_nodata)
+            if not np.any(invalid):
+                invalid = None
+            elif np.all(invalid == invalid[:1]):
+                invalid = invalid[:1]
+
+        if resampling == Resampling.nearest:
+            self._apply_nearest(data, invalid, out_flat)
+        else:
+            self._apply_kernel(data, invalid, resampling, out_flat)
+        return out
+
+    def _apply_nearest(self, data:np.ndarray, invalid:Optional[np.ndarray], out_flat:np.ndarray) -> None:
+        """ Nearest resampling of `data` (bands, H, W) in `out_flat` (bands, H' x W') """
+        height, width = self.src_shape
+        data = data.reshape((data.shape[0], height * width))
+        if invalid is not None:
+            invalid = invalid.reshape((invalid.shape[0], height * width))
+        for start in range(0, len(self.dst_index), APPLY_BLOCK_SIZE):
+            block = slice(start, start + APPLY_BLOCK_SIZE)
+            index = np.floor(self.rows[block] + .5).astype(np.int64) * width + \
+                    np.floor(self.cols[block] + .5).astype(np.int64)
+            result = np.take(data, index, axis=1)
+            if invalid is not None:
+                resampled = ~np.take(invalid, index, axis=1)
+                result = np.where(resampled, result, out_flat[:, self.dst_index[block]])
+            out_flat[:, self.dst_index[block]] = result
+
+    def _apply_kernel(self, data:np.ndarray, invalid:Optional[np.ndarray], resampling:Resampling,
+                      out_flat:np.ndarray) -> None:
+        """ Resampling of `data` (bands, H, W) with the kernel of `resampling` in `out_flat` (bands, H' x W') """
+        height, width = self.src_shape
+
+        # Pixel-major copies of the data and of the valid mask padded with the pixels outside the grid covered
+        # by the kernels (invalid pixels). Padding avoids clipping the indexes of the taps.
+        work_dtype = np.result_type(data.dtype, np.float32)
+        radius = KERNEL_RADIUS[resampling]
+        pad = max([int(np.ceil(radius * factor)) if factor * KERNEL_SCALE_THRESHOLD > 1 else radius
+                   for factor in (self.factor_rows, self.factor_cols)])
+        width_pad = width + 2 * pad
+        inner = (slice(pad, pad + height), slice(pad, pad + width))
+        values = np.zeros((height + 2 * pad, width_pad, data.shape[0]), dtype=work_dtype)
+        values[inner] = np.moveaxis(data, 0, -1)
+        valid = np.zeros((height + 2 * pad, width_pad, 1 if invalid is None else invalid.shape[0]), dtype=work_dtype)
+        valid[inner] = 1 if invalid is None else np.moveaxis(~invalid, 0, -1)
+        if invalid is not None:
+            values[inner][np.broadcast_to(np.moveaxis(invalid, 0, -1), values[inner].shape)] = 0
+        values = values.reshape((-1, data.shape[0]))
+        valid = valid.reshape((-1, valid.shape[-1]))
+
+        for start in range(0, len(self.dst_index), APPLY_BLOCK_SIZE):
+            block = slice(start, start + APPLY_BLOCK_SIZE)
+            index_rows, taps_rows = _kernel_taps(self.rows[block], resampling, self.factor_rows, dtype=work_dtype)
+            index_cols, taps_cols = _kernel_taps(self.cols[block], resampling, self.factor_cols, dtype=work_dtype)
+            index_block = (index_rows + pad) * width_pad + (index_cols + pad)
+
+            # Preallocated buffers of the taps: avoids allocating temporary arrays in the inner loop
+            result, values_tap = np.zeros((2, len(index_block), values.shape[1]), dtype=work_dtype)
+            weight_sum, valid_tap = np.zeros((2, len(index_block), valid.shape[1]), dtype=work_dtype)
+            weight = np.empty((len(index_block), 1), dtype=work_dtype)
+            for offset_row, weight_row in taps_rows:
+                for offset_col, weight_col in taps_cols:
+                    index = index_block + (offset_row * width_pad + offset_col)
+                    np.multiply(weight_row, weight_col, out=weight[:, 0])
+                    np.take(values, index, axis=0, out=values_tap)
+                    values_tap *= weight
+                    result += values_tap
+                    if invalid is not None:
+                        np.take(valid, index, axis=0, out=valid_tap)
+                        valid_tap *= weight
+                        weight_sum += valid_tap
+
+            if invalid is None:
+                # Without invalid pixels the sum of the weights of the taps within the grid is separable
+                weight_sum = (_weight_sum_inside(index_rows, taps_rows, height) *
+                              _weight_sum_inside(index_cols, taps_cols, width))[:, np.newaxis]
+
+            # As GDAL, destination pixels whose center falls on an invalid source pixel are not resampled
+            index_center = index_block + (self.rows[block] - index_rows >= .5) * width_pad + \
+                           (self.cols[block] - index_cols >= .5)
+            resampled = (np.take(valid, index_center, axis=0) > 0) & (np.abs(weight_sum) > 1e-6)
+            result /= np.where(resampled, weight_sum, 1)
+
+            result = np.where(resampled.T, _cast(result, out_flat.dtype).T, out_flat[:, self.dst_index[block]])
+            out_flat[:, self.dst_index[block]] = result
+
+
+def _crs_key(crs:Any) -> Optional[str]:
+    if crs is None:
+        return None
+    return rasterio.crs.CRS.from_user_input(crs).to_wkt()
+
+
+class WarpPlanCache:
+    """
+    Thread-safe LRU cache of warp plans with a memory budget in bytes. Plans that could be larger than the budget
+    (see `WarpPlan.max_nbytes`) are not computed: `get` returns None and the callers use the GDAL warper.
+
+    Args:
+        max_bytes: maximum number of bytes of the cached plans.
+    """
+    def __init__(self, max_bytes:int=WARP_PLAN_CACHE_SIZE_DEFAULT):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._plans: OrderedDict = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.refused = 0
+
+    def get(self, src_crs:Any, src_transform:rasterio.Affine, src_shape:Tuple[int, int],
+            dst_crs:Any, dst_transform:rasterio.Affine, dst_shape:Tuple[int, int]) -> Optional[WarpPlan]:
+        """
+        Returns the plan between the grids. It is computed and added to the cache if it is not cached. Returns
+        None if the plan could be larger than the budget of the cache.
+        """
+        if WarpPlan.max_nbytes(dst_shape) > self.max_bytes:
+            with self._lock:
+                self.refused += 1
+            return None
+
+        key: Hashable = (_crs_key(src_crs), tuple(src_transform)[:6], tuple(src_shape),
+                         _crs_key(dst_crs), tuple(dst_transform)[:6], tuple(dst_shape))
+        with self._lock:
+            plan = self._plans.get(key, None)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = WarpPlan(src_crs, src_transform, src_shape, dst_crs, dst_transform, dst_shape)
+
+        with self._lock:
+            if key in self._plans:
+                self.nbytes -= self._plans.pop(key).nbytes
+            self._plans[key] = plan
+            self.nbytes += plan.nbytes
+            self._evict()
+        return plan
+
+    def _evict(self) -> None:
+        """ Removes the least recently used plans until the cache fits in the budget """
+        while (self.nbytes > self.max_bytes) and (len(self._plans) > 0):
+            _, plan = self._plans.popitem(last=False)
+            self.nbytes -= plan.nbytes
+
+    def resize(self, max_bytes:int) -> None:
+        """ Changes the memory budget evicting plans if needed """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """ Removes all the plans and resets the counters """
+        with self._lock:
+            self._plans = OrderedDict()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.refused = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit and miss counters, the number of plans refused for being larger than the budget, the number
+        of cached plans and their size in bytes
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "refused": self.refused, "plans": len(self._plans),
+                    "nbytes": self.nbytes, "max_bytes": self.max_bytes}
+
+
+_WARP_PLAN_CACHE = WarpPlanCache()
+
+
+def get_warp_plan_cache() -> WarpPlanCache:
+    """ Returns the process-wide cache of warp plans """
+    return _WARP_PLAN_CACHE
+
+
+def get_warp_plan(src_crs:Any, src_transform:rasterio.Affine, src_shape:Tuple[int, int],
+                  dst_crs:Any, dst_transform:rasterio.Affine, dst_shape:Tuple[int, int]) -> Optional[WarpPlan]:
+    """
+    Returns the warp plan between the source and the destination grids from the process-wide cache. Returns None
+    if the plan could be larger than the budget of the cache (see `WarpPlanCache`).
+
+    Args:
+        src_crs: crs of the source grid.
+        src_transform: transform of the source grid.
+        src_shape: spatial shape (height, width) of the source grid.
+        dst_crs: crs of the destination grid.
+        dst_transform: transform of the destination grid.
+        dst_shape: spatial shape (height, width) of the destination grid.
+
+    Returns:
+        WarpPlan or None
+    """
+    return _WARP_PLAN_CACHE.get(src_crs, src_transform, src_shape, dst_crs, dst_transform, dst_shape)
@@ -3,12 +3,18 @@ import rasterio.transform
 from typing import Tuple, Dict, Optional, Union, Any, List
 import numbers
 import numpy as np
+import shapely
 from shapely.geometry import Polygon, MultiPolygon, shape, mapping
 import rasterio.warp
+import rasterio.crs
 from georeader import compare_crs
 import math
+import threading
+from collections import OrderedDict
 
 PIXEL_PRECISION = 3
+TRANSFORMER_CACHE_SIZE = 128
+FOOTPRINT_CACHE_SIZE = 1024
 
 def pad_window(window: rasterio.windows.Window, pad_size: Tuple[int, int]) -> rasterio.windows.Window:
     """
@@ -129,6 +135,45 @@ def _is_exact_round(x, precision=PIXEL_PRECISION):
     return abs(round(x,ndigits=precision)-x) < 1e-6
 
 
+def _round_precision(x:np.ndarray, precision:int=PIXEL_PRECISION) -> np.ndarray:
+    """ Vectorised `round(x, ndigits=precision)`. Ties at the last digit are rounded with the builtin `round` """
+    scale = 10 ** precision
+    scaled = x * scale
+    out = np.round(scaled) / scale
+    ties = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if np.any(ties):
+        out[ties] = [round(float(v), ndigits=precision) for v in x[ties]]
+    return out
+
+
+def round_outer_windows(windows:np.ndarray, precision:int=PIXEL_PRECISION) -> np.ndarray:
+    """
+    Vectorised `round_outer_window`: rounds an array of windows to the outer (larger) windows.
+
+    Args:
+        windows: array of shape `(N, 4)` with the `(row_off, col_off, height, width)` of the windows.
+        precision: number of decimals to round the offsets and ends of the windows before the floor/ceil.
+
+    Returns:
+        int64 array of shape `(N, 4)` with the `(row_off, col_off, height, width)` of the rounded windows.
+    """
+    windows = np.asarray(windows, dtype=np.float64).reshape(-1, 4)
+    row_off = np.floor(_round_precision(windows[:, 0], precision))
+    col_off = np.floor(_round_precision(windows[:, 1], precision))
+    row_dst = np.ceil(_round_precision(windows[:, 0] + windows[:, 2], precision))
+    col_dst = np.ceil(_round_precision(windows[:, 1] + windows[:, 3], precision))
+    return np.stack([row_off, col_off, row_dst - row_off, col_dst - col_off], axis=1).astype(np.int64)
+
+
+def windows_to_list(windows:np.ndarray) -> List[rasterio.windows.Window]:
+    """
+    Converts an array of shape `(N, 4)` with the `(row_off, col_off, height, width)` of the windows
+    (e.g. the output of `read.windows_from_bounds`) to a list of `rasterio.windows.Window` objects.
+    """
+    windows = np.asarray(windows).reshape(-1, 4).tolist()
+    return [rasterio.windows.Window(row_off=w[0], col_off=w[1], height=w[2], width=w[3]) for w in windows]
+
+
 def res(transform:rasterio.Affine) -> Tuple[float, float]:
     """
     Computes the resolution from a given transform
@@ -281,12 +326,152 @@ def normalize_bounds(bounds:Tuple[float, float, float, float], margin_add_if_equ
     return xmin, ymin, xmax, ymax
 
 
+def _crs_key(crs:Any) -> Any:
+    """ Hashable key of a crs given as string, `rasterio.crs.CRS`, int, dict, etc. """
+    if isinstance(crs, dict):
+        return tuple(sorted((k, str(v)) for k, v in crs.items()))
+    if isinstance(crs, rasterio.crs.CRS):
+        # The wkt of rasterio.crs.CRS objects is cached, str(crs) can be slow
+        return ("CRS", crs.wkt)
+    return (type(crs).__name__, str(crs))
+
+
+_TRANSFORMERS: OrderedDict = OrderedDict()
+_TRANSFORMERS_LOCK = threading.Lock()
+
+
+def get_transformer(src_crs:Any, dst_crs:Any) -> Any:
+    """
+    Returns the `pyproj.Transformer` from `src_crs` to `dst_crs` (with x, y axis order) from a process-wide LRU cache
+    of `TRANSFORMER_CACHE_SIZE` entries. Creating the transformation is slower than transforming a few points,
+    hence this cache speeds up repeated calls to `polygon_to_crs` (e.g. when serving tiles).
+
+    Args:
+        src_crs: source crs (string, `rasterio.crs.CRS`, epsg code, etc.).
+        dst_crs: destination crs.
+
+    Returns:
+        `pyproj.Transformer` object (thread-safe).
+    """
+    import pyproj
+
+    key = (_crs_key(src_crs), _crs_key(dst_crs))
+    with _TRANSFORMERS_LOCK:
+        if key in _TRANSFORMERS:
+            _TRANSFORMERS.move_to_end(key)
+            return _TRANSFORMERS[key]
+
+    def to_pyproj(crs:Any) -> pyproj.CRS:
+        if hasattr(crs, "to_wkt"):
+            crs = crs.to_wkt()
+        return pyproj.CRS.from_user_input(crs)
+
+    transformer = pyproj.Transformer.from_crs(to_pyproj(src_crs), to_pyproj(dst_crs), always_xy=True)
+
+    with _TRANSFORMERS_LOCK:
+        _TRANSFORMERS[key] = transformer
+        while len(_TRANSFORMERS) > TRANSFORMER_CACHE_SIZE:
+            _TRANSFORMERS.popitem(last=False)
+
+    return transformer
+
+
+def transform_coords(src_crs:Any, dst_crs:Any, xs:np.ndarray, ys:np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transforms the coordinates `xs`, `ys` from `src_crs` to `dst_crs` with the cached transformer (see
+    `get_transformer`).
+
+    Returns:
+        Arrays with the transformed x and y coordinates (same shape as the inputs).
+    """
+    xs_out, ys_out = get_transformer(src_crs, dst_crs).transform(np.asarray(xs, dtype=np.float64),
+                                                                 np.asarray(ys, dtype=np.float64))
+    return np.asarray(xs_out), np.asarray(ys_out)
+
+
+def transform_bounds(src_crs:Any, dst_crs:Any, bounds:np.ndarray, densify_pts:int=21) -> np.ndarray:
+    """
+    Vectorised `rasterio.warp.transform_bounds`: transforms an array of bounds densifying the edges with
+    `densify_pts` points.
+
+    Args:
+        src_crs: source CRS
+        dst_crs: destination CRS
+        bounds: array of shape `(N, 4)` with `(minx, miny, maxx, maxy)` bounds in `src_crs`.
+        densify_pts: number of points added to each edge.
+
+    Returns:
+        array of shape `(N, 4)` with the bounds in `dst_crs`.
+    """
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+    t = np.linspace(0, 1, densify_pts + 2)
+    minx, miny, maxx, maxy = (bounds[:, i:(i + 1)] for i in range(4))
+    xs_edge = minx + (maxx - minx) * t
+    ys_edge = miny + (maxy - miny) * t
+    xs = np.concatenate([xs_edge, xs_edge, np.broadcast_to(minx, xs_edge.shape), np.broadcast_to(maxx, xs_edge.shape)], axis=1)
+    ys = np.concatenate([np.broadcast_to(miny, ys_edge.shape), np.broadcast_to(maxy, ys_edge.shape), ys_edge, ys_edge], axis=1)
+    xs, ys = transform_coords(src_crs, dst_crs, xs, ys)
+    return np.stack([np.min(xs, axis=1), np.min(ys, axis=1), np.max(xs, axis=1), np.max(ys, axis=1)], axis=1)
+
+
 def polygon_to_crs(polygon:Union[Polygon, MultiPolygon], 
                    crs_polygon:Any, dst_crs:Any) -> Union[Polygon, MultiPolygon]:
+    """
+    Transforms `polygon` from `crs_polygon` to `dst_crs`. Geographic targets go through
+    `rasterio.warp.transform_geom`, which cuts the polygons that cross the antimeridian; projected targets are
+    transformed with the cached transformer (see `get_transformer`).
+    """
     if compare_crs(crs_polygon, dst_crs):
         return polygon
-    
-    return shape(rasterio.warp.transform_geom(crs_polygon, dst_crs, mapping(polygon)))
+
+    transformer = get_transformer(crs_polygon, dst_crs)
+    if (transformer.target_crs is None) or transformer.target_crs.is_geographic:
+        return shape(rasterio.warp.transform_geom(crs_polygon, dst_crs, mapping(polygon)))
+
+    def transform(coords:np.ndarray) -> np.ndarray:
+        xs, ys = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.stack([np.asarray(xs), np.asarray(ys)], axis=1)
+
+    return shapely.transform(polygon, transform)
+
+
+_FOOTPRINTS: OrderedDict = OrderedDict()
+_FOOTPRINTS_LOCK = threading.Lock()
+
+
+def footprint(transform:rasterio.Affine, spatial_shape:Tuple[int, int], crs:Any,
+              dst_crs:Optional[Any]=None) -> Polygon:
+    """
+    Polygon with the extent of a raster of shape `spatial_shape` `(height, width)` and geotransform `transform` in
+    `dst_crs`. Results are memoised in a process-wide LRU cache keyed by the extent and the crs
+    (`FOOTPRINT_CACHE_SIZE` entries).
+
+    Args:
+        transform: geotransform of the raster.
+        spatial_shape: shape of the raster `(height, width)`.
+        crs: crs of the raster.
+        dst_crs: crs of the polygon. If None it uses `crs`.
+
+    Returns:
+        Polygon with the footprint of the raster.
+    """
+    key = (tuple(transform), tuple(spatial_shape), _crs_key(crs), None if dst_crs is None else _crs_key(dst_crs))
+    with _FOOTPRINTS_LOCK:
+        if key in _FOOTPRINTS:
+            _FOOTPRINTS.move_to_end(key)
+            return _FOOTPRINTS[key]
+
+    pol = window_polygon(rasterio.windows.Window(row_off=0, col_off=0, height=spatial_shape[0],
+                                                 width=spatial_shape[1]), transform)
+    if (dst_crs is not None) and not compare_crs(crs, dst_crs):
+        pol = polygon_to_crs(pol, crs, dst_crs)
+
+    with _FOOTPRINTS_LOCK:
+        _FOOTPRINTS[key] = pol
+        while len(_FOOTPRINTS) > FOOTPRINT_CACHE_SIZE:
+            _FOOTPRINTS.popitem(last=False)
+
+    return pol
 
 
 def pad_list_numpy(pad_width:Dict[str, Tuple[int, int]]) -> List[Tuple[int, int]]:
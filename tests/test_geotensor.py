@@ -61,3 +61,220 @@ def test_read_window():
 
         # assert np.allclose(xarray_obj_isel.values,
         #                   xarray_obj_isel_from_rst_obj_isel.values), f"Content of the array is different {subwindow} {boundless}"
+
+
+def _geotensor(count=3, height=200, width=300, dtype="uint16", fill_value_default=0):
+    transform = rasterio.transform.from_origin(400_000, 4_000_000, 10, 10)
+    values = (np.arange(count * height * width) % 65_000).astype(dtype).reshape(count, height, width)
+    return geotensor.GeoTensor(values, transform, "EPSG:32630", fill_value_default=fill_value_default)
+
+
+def test_resize_integer_factor():
+    import rasterio.warp
+    data = _geotensor(height=120, width=180)
+    data.values[:, :6, :6] = 0
+    for resolution in [20, 60, 5]:
+        for resampling in read.RESIZE_BLOCK_METHODS:
+            output = read.resize(data, resolution, anti_aliasing=False, resampling=resampling)
+            expected = read.read_reproject(data, dst_crs=data.crs, resolution_dst_crs=resolution,
+                                           dst_transform=data.transform,
+                                           window_out=rasterio.windows.Window(0, 0, output.width, output.height),
+                                           resampling=resampling)
+            assert output.transform == expected.transform
+            differences = np.abs(output.values.astype(np.float64) - expected.values)
+            # GDAL can round differently the means that are halfway between two integers
+            assert np.all(differences <= (1 if resampling == rasterio.warp.Resampling.average else 0)), \
+                f"Different result {resolution} {resampling}"
+
+            if resolution > 10:
+                interpolation = read.RESIZE_BLOCK_METHODS[resampling]
+                output_geotensor = data.resize(output.shape[-2:], interpolation=interpolation, anti_aliasing=False)
+                assert output_geotensor.transform == output.transform
+                assert np.array_equal(output_geotensor.values, output.values)
+
+
+def test_resize_anti_aliasing():
+    from scipy import ndimage as ndi
+    data = _geotensor(height=120, width=180, dtype="float32")
+    sigma = np.array([0.5, 1., 1.5])
+    for anti_aliasing_sigma in [None, sigma]:
+        output = read.resize(data, 25, anti_aliasing_sigma=anti_aliasing_sigma, max_workers=2)
+        assert output.dtype == np.float32
+
+        # Filter the bands one by one
+        filtered = data.copy()
+        for i in range(data.shape[0]):
+            sigma_band = (2.5 - 1) / 2 if anti_aliasing_sigma is None else anti_aliasing_sigma[i]
+            filtered.values[i] = ndi.gaussian_filter(data.values[i], sigma_band, mode="reflect")
+        expected = read.resize(filtered, 25, anti_aliasing=False)
+        assert np.array_equal(output.values, expected.values)
+
+
+def test_array_ufunc():
+    transform = rasterio.Affine(10, 0, 400000, 0, -10, 4000000)
+    b8 = geotensor.GeoTensor(np.random.rand(2, 30, 40).astype(np.float32), transform, "EPSG:32630")
+    b4 = geotensor.GeoTensor(np.random.rand(2, 30, 40).astype(np.float32), transform, "EPSG:32630")
+
+    ndvi = (b8 - b4) / (b8 + b4)
+    assert isinstance(ndvi, geotensor.GeoTensor) and ndvi.transform == transform
+    np.testing.assert_allclose(ndvi.values, (b8.values - b4.values) / (b8.values + b4.values))
+
+    # ufuncs, numpy functions and reflected operators keep the georreference
+    for result in [np.sqrt(b8), np.where(b8 > 0.5, b8, 0), np.mean(b8, axis=0), 1 - b8, 2 / b4, -b4]:
+        assert isinstance(result, geotensor.GeoTensor) and result.same_extent(b8)
+    assert not isinstance(np.flip(b8, axis=-1), geotensor.GeoTensor)
+    assert np.isscalar(np.max(b8))
+
+    # In place operations
+    values = b8.values
+    b8 += 1
+    np.multiply(b8, b4, out=b8)
+    assert b8.values is values
+
+    other = geotensor.GeoTensor(np.random.rand(2, 30, 40), rasterio.Affine(10, 0, 0, 0, -10, 0), "EPSG:32630")
+    try:
+        b8 + other
+        assert False, "Expected ValueError adding GeoTensors with different georreference"
+    except ValueError:
+        pass
+
+    # Comparisons are elementwise: the truth value is ambiguous as in numpy
+    assert isinstance(b8 == b4, geotensor.GeoTensor) and not np.any(b8 != b8)
+    for expression in [lambda: bool(b8 == b8), lambda: b4 in [b8], lambda: [b8].index(b4)]:
+        try:
+            expression()
+            assert False, "Expected ValueError with the truth value of a GeoTensor"
+        except ValueError:
+            pass
+    assert b8 in [b8] and [b8, b4].index(b8) == 0 and len({b8, b4}) == 2
+
+    # In place operators follow the numpy casting rules
+    integer = geotensor.GeoTensor(np.zeros((2, 30, 40), dtype=np.int16), transform, "EPSG:32630")
+    assert (integer + 0.5).dtype == np.float64
+    try:
+        integer += 0.5
+        assert False, "Expected UFuncTypeError casting float to int in place"
+    except TypeError: # numpy UFuncTypeError
+        pass
+
+
+def test_serialisation():
+    import io
+    import pickle
+    transform = rasterio.Affine(10, 0, 400000, 0, -10, 4000000)
+    gt = geotensor.GeoTensor(np.random.rand(4, 64, 48).astype(np.float32), transform, "EPSG:32630",
+                             fill_value_default=-1)
+
+    for compression in [None, "zlib"]:
+        gt_read = geotensor.GeoTensor.from_bytes(gt.to_bytes(compression=compression))
+        assert gt_read.same_extent(gt) and (gt_read.fill_value_default == -1) and (gt_read.dtype == gt.dtype)
+        np.testing.assert_array_equal(gt_read.values, gt.values)
+
+    # Several GeoTensors streamed to the same file object
+    fileobj = io.BytesIO()
+    gt.to_file(fileobj, compression="zlib")
+    gt.isel({"band": [0]}).to_file(fileobj)
+    fileobj.seek(0)
+    np.testing.assert_array_equal(geotensor.GeoTensor.from_file(fileobj).values, gt.values)
+    assert geotensor.GeoTensor.from_file(fileobj).shape == (1, 64, 48)
+
+    # Pickle protocol 5 with out-of-band buffers does not copy the values
+    buffers = []
+    data = pickle.dumps(gt, protocol=5, buffer_callback=buffers.append)
+    gt_unpickled = pickle.loads(data, buffers=buffers)
+    assert np.shares_memory(gt_unpickled.values, gt.values) and gt_unpickled.same_extent(gt)
+    np.testing.assert_array_equal(pickle.loads(pickle.dumps(gt)).values, gt.values)
+
+
+def test_write_from_window():
+    transform = rasterio.Affine(10, 0, 400000, 0, -10, 4000000)
+    gt = geotensor.GeoTensor(np.zeros((2, 40, 30), dtype=np.float32), transform, "EPSG:32630")
+
+    # Non-square window: data is (height, width)
+    window = rasterio.windows.Window(col_off=5, row_off=20, width=25, height=10)
+    gt.write_from_window(np.full((2, 10, 25), 3, dtype=gt.dtype), window)
+    assert np.all(gt.values[:, 20:30, 5:30] == 3) and np.sum(gt.values == 3) == 2 * 10 * 25
+
+    # Window partially outside: data is cropped
+    window = rasterio.windows.Window(col_off=20, row_off=-5, width=20, height=10)
+    gt.write_from_window(np.full((2, 10, 20), 4, dtype=gt.dtype), window)
+    assert np.all(gt.values[:, :5, 20:] == 4) and np.sum(gt.values == 4) == 2 * 5 * 10
+
+    try:
+        gt.write_from_window(np.full((2, 25, 10), 5, dtype=gt.dtype),
+                             rasterio.windows.Window(col_off=0, row_off=0, width=25, height=10))
+        assert False, "Expected AssertionError writing (width, height) data"
+    except AssertionError as e:
+        assert "different shape" in str(e)
+
+
+def _fill_window_shared(handle, i):
+    with geotensor.GeoTensor.from_shared(handle) as shared:
+        window = rasterio.windows.Window(col_off=0, row_off=i * 10, width=30, height=10)
+        shared.write_from_window(np.full((2, 10, 30), i + 1, dtype=shared.dtype), window)
+
+
+def test_shared_memory():
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+    transform = rasterio.Affine(10, 0, 400000, 0, -10, 4000000)
+    gt = geotensor.GeoTensor(np.zeros((2, 40, 30), dtype=np.float32), transform, "EPSG:32630")
+
+    with gt.to_shared() as shared:
+        assert shared.same_extent(gt)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            list(executor.map(_fill_window_shared, [shared.handle] * 4, range(4)))
+        np.testing.assert_array_equal(shared.values[:, ::10, 0], np.array([[1, 2, 3, 4]] * 2))
+
+        # Pickling only transfers the handle
+        attached = pickle.loads(pickle.dumps(shared))
+        assert attached.handle.name == shared.handle.name
+        attached.values[0, 0, 0] = -1
+        assert shared.values[0, 0, 0] == -1
+        attached.close()
+        name = shared.handle.name
+
+    try:
+        shared_memory.SharedMemory(name=name)
+        assert False, "Shared memory block not destroyed"
+    except FileNotFoundError:
+        pass
+
+
+def test_geotensor_on_disk(tmp_path):
+    import rasterio.warp
+    from georeader import mosaic, save
+    data_1 = _geotensor()
+    data_2 = geotensor.GeoTensor(data_1.values.copy(), rasterio.transform.from_origin(401_500, 3_999_500, 10, 10),
+                                 data_1.crs, fill_value_default=0)
+    expected = mosaic.spatial_mosaic([data_1, data_2], resampling=rasterio.warp.Resampling.nearest)
+
+    out = geotensor.GeoTensor.empty_on_disk(str(tmp_path / "mosaic.tif"), expected.shape, expected.dtype,
+                                            expected.transform, expected.crs, fill_value_default=0)
+    assert isinstance(out.values, np.memmap)
+    mosaic_out = mosaic.spatial_mosaic([data_1, data_2], out=out, window_size=(32, 32),
+                                       resampling=rasterio.warp.Resampling.nearest)
+    assert mosaic_out is out
+    np.testing.assert_array_equal(out.values, expected.values)
+
+    # Windows are views of the file
+    window = rasterio.windows.Window(col_off=10, row_off=20, width=30, height=40)
+    out.write_from_window(np.full((3, 40, 30), 7, dtype=out.dtype), window)
+    assert np.all(out.read_from_window(window).values == 7)
+    assert isinstance(out.isel({"x": slice(10, 40), "y": slice(20, 60)}).values, np.memmap)
+    with rasterio.open(str(tmp_path / "mosaic.tif")) as src:
+        np.testing.assert_array_equal(src.read(window=window), 7)
+
+    reopened = geotensor.GeoTensor.open_on_disk(str(tmp_path / "mosaic.tif"), mode="r")
+    assert reopened.transform == out.transform and reopened.fill_value_default == 0
+    np.testing.assert_array_equal(reopened.values, out.values)
+
+    save.save_cog(out, str(tmp_path / "mosaic_cog.tif"), descriptions=["B1", "B2", "B3"])
+    with rasterio.open(str(tmp_path / "mosaic_cog.tif")) as src:
+        assert src.descriptions == ("B1", "B2", "B3") and src.transform == out.transform
+        np.testing.assert_array_equal(src.read(), out.values)
+
+    out_2d = geotensor.GeoTensor.empty_on_disk(str(tmp_path / "empty.tif"), (50, 60), "float32",
+                                               expected.transform, expected.crs, fill_value_default=-1)
+    assert out_2d.shape == (50, 60) and np.all(out_2d.values == -1)
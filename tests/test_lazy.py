@@ -0,0 +1,50 @@
+from georeader import lazy, save
+from georeader.geotensor import GeoTensor
+import rasterio
+import numpy as np
+
+
+def _geotensor(count=4, height=200, width=300, dtype="uint16"):
+    transform = rasterio.transform.from_origin(400_000, 4_000_000, 10, 10)
+    values = (np.arange(count * height * width) % 65_000).astype(dtype).reshape(count, height, width)
+    return GeoTensor(values, transform, "EPSG:32630", fill_value_default=0)
+
+
+def test_lazy_expression(tmp_path):
+    data = _geotensor()
+    b4, b8 = data.values[2].astype(np.float32), data.values[3].astype(np.float32)
+    expected = np.clip((b8 - b4) / (b8 + b4 + 1), -0.5, 0.5)
+    expected = np.where(expected > 0, expected, 0).astype(np.float32)
+
+    r4, r8 = data.isel({"band": [2]}).lazy(), data.isel({"band": [3]}).lazy()
+    r4f, r8f = r4.astype(np.float32), r8.astype(np.float32)
+    expr = ((r8f - r4f) / (r8f + r4f + 1)).clip(-0.5, 0.5)
+    expr = lazy.where(expr > 0, expr, 0).astype(np.float32)
+    for max_workers in [1, 3]:
+        result = expr.compute(window_size=(64, 50), max_workers=max_workers)
+        assert result.transform == data.transform and result.dtype == np.float32
+        np.testing.assert_allclose(result.values[0], expected, rtol=1e-6)
+
+    # Evaluated into a given array
+    out = np.zeros((1,) + data.shape[-2:], dtype=np.float32)
+    assert expr.compute(window_size=(64, 50), out=out).values is out
+    np.testing.assert_allclose(out[0], expected, rtol=1e-6)
+
+    path_cog = str(tmp_path / "expr.tif")
+    save.save_cog(expr, path_cog, dir_tmpfiles=str(tmp_path))
+    with rasterio.open(path_cog) as src:
+        np.testing.assert_allclose(src.read(1), expected, rtol=1e-6)
+        assert src.transform == data.transform
+
+    try:
+        np.sum(r4).compute()
+        assert False, "Expected ValueError for an expression that drops the spatial dims"
+    except ValueError:
+        pass
+
+    other = GeoTensor(data.values, rasterio.transform.from_origin(0, 0, 10, 10), data.crs)
+    try:
+        (r4 - other.lazy()).compute()
+        assert False, "Expected ValueError for GeoData with different georreference"
+    except ValueError:
+        pass
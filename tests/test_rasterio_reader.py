@@ -88,3 +88,708 @@ def test_isel():
 
 
 
+def _write_raster(path, count=3, height=200, width=300, dtype="uint16", blocksize=64, **profile_update):
+    transform = rasterio.transform.from_origin(400_000, 4_000_000, 10, 10)
+    data = (np.arange(count * height * width) % 65_000).astype(dtype).reshape(count, height, width)
+    profile = dict(driver="GTiff", width=width, height=height, count=count, dtype=dtype, crs="EPSG:32630",
+                   transform=transform, tiled=True, blockxsize=blocksize, blockysize=blocksize,
+                   compress="deflate", nodata=0)
+    profile.update(profile_update)
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(data)
+    return data
+
+
+def test_handle_pool(tmp_path):
+    path = str(tmp_path / "raster.tif")
+    data = _write_raster(path)
+    pool = rasterio_reader.get_handle_pool()
+    pool.clear()
+
+    reader = rasterio_reader.RasterioReader(path, use_handle_pool=True)
+    window = rasterio.windows.Window(col_off=10, row_off=20, width=50, height=40)
+    for _ in range(3):
+        data_read = reader.read(window=window)
+        assert np.array_equal(data_read, data[:, 20:60, 10:60]), "Content of the array is different"
+
+    stats = pool.stats()
+    assert (stats["misses"] == 1) and (stats["hits"] == 2), f"Unexpected pool stats {stats}"
+
+    # Copies share the pool
+    reader.copy().read(window=window)
+    assert pool.stats()["hits"] == 3, f"Unexpected pool stats {pool.stats()}"
+
+    pool.clear()
+    assert pool.stats()["open"] == 0, "Pool not cleared"
+
+    # Datasets of the threads that have exited are closed when the pool opens a dataset
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda _: reader.read(window=window), range(4)))
+    assert pool.stats()["open"] >= 1
+    path_2 = str(tmp_path / "raster_2.tif")
+    _write_raster(path_2)
+    rasterio_reader.RasterioReader(path_2, use_handle_pool=True).read(window=window)
+    assert pool.stats()["open"] == 1, f"Unexpected pool stats {pool.stats()}"
+
+    # clear does not close the datasets of other threads: they are closed by their thread
+    import threading
+    opened, cleared, datasets = threading.Event(), threading.Event(), []
+
+    def read_thread():
+        with rasterio.Env():
+            datasets.append(pool.get(path))
+            opened.set()
+            cleared.wait()
+            datasets.append(pool.get(path))
+
+    thread = threading.Thread(target=read_thread)
+    thread.start()
+    opened.wait()
+    pool.clear()
+    assert not datasets[0].closed
+    cleared.set()
+    thread.join()
+    assert datasets[0].closed and (datasets[1] is not datasets[0])
+    pool.clear()
+
+
+def test_read_max_workers(tmp_path):
+    paths = []
+    datas = []
+    for i in range(4):
+        path = str(tmp_path / f"raster_{i}.tif")
+        datas.append(_write_raster(path) + i)
+        # Rewrite with different content
+        with rasterio.open(path, "r+") as dst:
+            dst.write(datas[-1])
+        paths.append(path)
+
+    window = rasterio.windows.Window(col_off=-5, row_off=20, width=50, height=40)
+    reader = rasterio_reader.RasterioReader(paths, max_workers=4)
+    data_parallel = reader.read(window=window)
+    data_sequential = reader.read(window=window, max_workers=1)
+    assert data_parallel.shape == (4, 3, 40, 50), f"Unexpected shape {data_parallel.shape}"
+    assert np.array_equal(data_parallel, data_sequential), "Parallel read differs from sequential read"
+    assert np.array_equal(data_parallel[2, :, :, 5:], datas[2][:, 20:60, :45]), "Content of the array is different"
+
+
+def test_read_out_buffer(tmp_path):
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"raster_{i}.tif")
+        _write_raster(path)
+        paths.append(path)
+
+    window = rasterio.windows.Window(col_off=-5, row_off=20, width=50, height=40)
+    reader = rasterio_reader.RasterioReader(paths, stack=False)
+    expected = np.concatenate([rasterio_reader.RasterioReader(p).read(window=window) for p in paths], axis=0)
+
+    out = np.zeros((9, 40, 50), dtype=reader.dtype)
+    data = reader.read(window=window, out=out)
+    assert data is out, "Expected the output to be written in place"
+    assert np.array_equal(out, expected), "Content of the array is different"
+
+    out_memmap = np.memmap(str(tmp_path / "out.dat"), dtype=np.float32, mode="w+", shape=reader.shape)
+    gt = reader.load(out=out_memmap)
+    assert gt.values is out_memmap, "Expected the GeoTensor to wrap the out buffer"
+    assert np.array_equal(gt.values, reader.read().astype(np.float32)), "Content of the array is different"
+
+
+def test_read_windows(tmp_path):
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    reader = rasterio_reader.RasterioReader(path)
+
+    windows = [rasterio.windows.Window(col_off=c, row_off=r, width=64, height=64)
+               for c in range(-16, 300, 32) for r in range(-16, 200, 32)]
+    chips, report = reader.read_windows(windows, return_report=True)
+
+    assert report["blocks_decoded"] == 20, f"Unexpected report {report}"
+    assert report["blocks_requested"] > report["blocks_decoded"], f"Unexpected report {report}"
+
+    chips_generic = read.read_from_windows(reader.load(), windows)
+    for window, chip, chip_generic in zip(windows, chips, chips_generic):
+        assert np.array_equal(chip.values, reader.read(window=window)), f"Content of the array is different {window}"
+        assert chip.transform == chip_generic.transform, f"Different transforms {window}"
+        assert np.array_equal(chip.values, chip_generic.values), f"Content of the array is different {window}"
+
+
+def test_block_cache(tmp_path, monkeypatch):
+    from collections import OrderedDict
+    from georeader import block_cache, metadata_cache
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    reader = rasterio_reader.RasterioReader(path)
+    reader_cache = rasterio_reader.RasterioReader(path, use_block_cache=True)
+
+    cache = block_cache.get_block_cache()
+    cache.clear()
+
+    window = rasterio.windows.Window(col_off=-10, row_off=30, width=100, height=80)
+    data_cache = reader_cache.read(window=window)
+    stats = cache.stats()
+    assert stats["hits"] == 0 and stats["blocks"] == 3 * 4, f"Unexpected stats {stats}"
+    assert np.array_equal(data_cache, reader.read(window=window)), "Content of the array is different"
+
+    window = rasterio.windows.Window(col_off=5, row_off=30, width=80, height=80)
+    data_cache = reader_cache.read(window=window, indexes=[2], out_shape=(17, 23))
+    assert cache.stats()["hits"] > 0, f"Unexpected stats {cache.stats()}"
+    assert np.array_equal(data_cache, reader.read(window=window, indexes=[2], out_shape=(17, 23))), \
+        "Content of the array is different"
+
+    # Files rewritten in place are not served from the cache
+    window = rasterio.windows.Window(col_off=0, row_off=0, width=64, height=64)
+    reader_cache.read(window=window)
+    with rasterio.open(path, "r+") as dst:
+        dst.write(np.full((3, 200, 300), 3, dtype="uint16"))
+    assert np.all(reader_cache.read(window=window) == 3)
+
+    # GDAL virtual file system paths are cached without signature
+    import zipfile
+    path_zip = str(tmp_path / "raster.zip")
+    with zipfile.ZipFile(path_zip, "w") as zf:
+        zf.write(path, arcname="raster.tif")
+    reader_vsi = rasterio_reader.RasterioReader(f"/vsizip/{path_zip}/raster.tif", use_block_cache=True)
+    for _ in range(2):
+        assert np.all(reader_vsi.read(window=window) == 3)
+    cache.clear()
+
+    # Signatures of remote files are requested once per FILE_SIGNATURE_TTL
+    calls = []
+    monkeypatch.setattr(metadata_cache, "_FILE_SIGNATURES", OrderedDict())
+    monkeypatch.setattr(metadata_cache, "file_signature", lambda p: calls.append(p) or "etag")
+    for _ in range(3):
+        assert metadata_cache.cached_file_signature("gs://bucket/raster.tif") == "etag"
+    assert len(calls) == 1
+    metadata_cache.cached_file_signature("gs://bucket/raster.tif", ttl=0)
+    metadata_cache.cached_file_signature(path)
+    assert len(calls) == 3
+
+
+def test_overview_strategy(tmp_path):
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    with rasterio.open(path, "r+") as dst:
+        dst.build_overviews([2, 4, 8], rasterio.enums.Resampling.average)
+
+    reader = rasterio_reader.RasterioReader(path, window_focus=rasterio.windows.Window(col_off=32, row_off=20,
+                                                                                       width=160, height=120))
+
+    assert read.select_overview_level(reader, 3, "off") is None
+    assert read.select_overview_level(reader, 3, "strictly-finer") == 0
+    assert read.select_overview_level(reader, 3, "nearest-coarser") == 1
+    assert read.select_overview_level(reader, 1, "nearest-coarser") is None
+
+    reader_overview = reader.reader_overview(1)
+    assert reader_overview.bounds == reader.bounds, f"Different bounds {reader_overview.bounds} {reader.bounds}"
+
+    data = rasterio_reader.read_out_shape(reader, out_shape=(30, 40), overview_strategy="strictly-finer")
+    assert data.attrs["overview_level"] == 1
+    assert np.array_equal(data.values, reader_overview.read(out_shape=(30, 40))), "Content of the array is different"
+
+    data_resized = read.resize(reader, resolution_dst=80., overview_strategy="nearest-coarser")
+    data_resized_full = read.resize(reader, resolution_dst=80.)
+    assert data_resized.attrs["overview_level"] == 2
+    assert data_resized.shape == data_resized_full.shape
+    assert data_resized.transform == data_resized_full.transform
+
+
+def test_metadata_cache(tmp_path):
+    from georeader import metadata_cache
+    paths = [str(tmp_path / f"raster_{i}.tif") for i in range(3)]
+    for p in paths:
+        _write_raster(p)
+
+    cache = metadata_cache.MetadataCache(directory=str(tmp_path / "metadata"))
+    for p in paths:
+        assert cache.get(p) == metadata_cache.read_metadata(p)
+    assert cache.stats()["misses"] == 3
+
+    # A new cache (e.g. in other process) reads the entries from disk
+    cache_other = metadata_cache.MetadataCache(directory=str(tmp_path / "metadata"))
+    cache_other.get(paths[0])
+    assert cache_other.stats() == {"hits": 1, "misses": 0, "entries": 1}
+
+    # Entries are invalidated if the file changes
+    _write_raster(paths[0], count=2)
+    assert cache_other.get(paths[0])["count"] == 2
+
+    reader = rasterio_reader.RasterioReader(paths[1:], use_metadata_cache=True)
+    reader_copy = reader.isel({"time": [1], "band": [0]})
+    assert reader_copy.metadata is reader.metadata
+    assert reader_copy.overviews() == []
+    assert np.array_equal(reader_copy.load().values, reader.load().values[1:, :1])
+
+    # GDAL virtual file system paths have no signature: they are read without crashing
+    import zipfile
+    path_zip = str(tmp_path / "raster.zip")
+    with zipfile.ZipFile(path_zip, "w") as zf:
+        zf.write(paths[1], arcname="raster.tif")
+    path_vsi = f"/vsizip/{path_zip}/raster.tif"
+    assert metadata_cache.file_signature(path_vsi) is None
+    assert metadata_cache.file_signature(str(tmp_path / "missing.tif")) is None
+    reader_vsi = rasterio_reader.RasterioReader(path_vsi, use_metadata_cache=True)
+    assert np.array_equal(reader_vsi.load().values, reader.load().values[0])
+
+
+def test_iter_blocks(tmp_path):
+    from georeader import slices
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    reader = rasterio_reader.RasterioReader(path, window_focus=rasterio.windows.Window(col_off=10, row_off=5,
+                                                                                       width=250, height=180))
+    reader.set_indexes([1, 3])
+
+    windows_expected = slices.create_windows(reader.shape[-2:], window_size=(64, 64), overlap=(8, 8))
+    blocks = list(reader.iter_blocks(window_size=(64, 64), overlap=8, prefetch=3))
+    assert [w for w, _ in blocks] == windows_expected
+
+    data = reader.load()
+    for window, block in blocks:
+        block_expected = read.read_from_window(data, window)
+        assert block.shape == (2, window.height, window.width)
+        assert block.transform == block_expected.transform
+        assert np.array_equal(block.values, block_expected.values), f"Content of the array is different {window}"
+
+    blocks_geotensor = list(data.iter_blocks(window_size=(64, 64), overlap=8))
+    assert [w for w, _ in blocks_geotensor] == windows_expected
+
+    # Closing the generator early cancels the pending reads
+    iterator = reader.iter_blocks(prefetch=4)
+    window, block = next(iterator)
+    assert block.shape[-2:] == (64, 64)
+    iterator.close()
+
+
+def test_read_memmap(tmp_path):
+    from georeader import tiff_memmap
+    for tiled in [False, True]:
+        path = str(tmp_path / f"raster_{tiled}.tif")
+        _write_raster(path, tiled=tiled, compress=None, interleave="band")
+        assert tiff_memmap.open_tiff_memmap(path) is not None
+
+        reader = rasterio_reader.RasterioReader(path)
+        reader_memmap = rasterio_reader.RasterioReader(path, use_memmap=True)
+        for window in [rasterio.windows.Window(col_off=10, row_off=70, width=100, height=120),
+                       rasterio.windows.Window(col_off=-10, row_off=30, width=100, height=80)]:
+            for indexes in [None, [3, 1], 2]:
+                data = reader.read(window=window, indexes=indexes)
+                data_memmap = reader_memmap.read(window=window, indexes=indexes)
+                assert data.shape == data_memmap.shape
+                assert np.array_equal(data, data_memmap), f"Content of the array is different {window} {indexes}"
+
+        data_memmap = reader_memmap.load()
+        base = data_memmap.values
+        while (base is not None) and not isinstance(base, np.memmap):
+            base = base.base
+        assert tiled or (base is not None), "Expected a view of the file"
+
+        # Changes in the arrays are not written to the file
+        data_memmap.values[...] = 0
+        assert np.array_equal(reader_memmap.load().values, reader.load().values)
+
+    path = str(tmp_path / "raster_compressed.tif")
+    _write_raster(path)
+    assert tiff_memmap.open_tiff_memmap(path) is None
+
+
+def test_instrumentation(tmp_path):
+    from georeader import instrumentation
+    from georeader import mosaic
+    from georeader.save import save_cog
+    paths = [str(tmp_path / f"raster_{i}.tif") for i in range(2)]
+    for p in paths:
+        _write_raster(p)
+
+    records = []
+    with instrumentation.instrument(callback=records.append) as stats:
+        reader = rasterio_reader.RasterioReader(paths, max_workers=2)
+        data = reader.read(window=rasterio.windows.Window(col_off=0, row_off=0, width=100, height=50))
+        reader_single = rasterio_reader.RasterioReader(paths[0])
+        data_reproject = read.read_reproject(reader_single, dst_crs="EPSG:4326", bounds=(-4.1, 36.127, -4.09, 36.134),
+                                             resolution_dst_crs=1e-4)
+        data_mosaic = mosaic.spatial_mosaic([reader_single, rasterio_reader.RasterioReader(paths[1])])
+        save_cog(data_mosaic, str(tmp_path / "mosaic.tif"))
+
+    stats_dict = stats.to_dict()["operations"]
+    assert set(stats_dict.keys()) == {"RasterioReader.read", "read_reproject", "spatial_mosaic", "save_cog"}
+    assert len(records) == sum(s["calls"] for s in stats_dict.values())
+
+    read_record = records[0]
+    assert read_record["operation"] == "RasterioReader.read"
+    assert read_record["datasets_opened"] == 2
+    assert read_record["bytes_read"] == data.nbytes
+    assert read_record["output_nbytes"] == data.nbytes
+    assert set(read_record["phases"].keys()) == {"open", "read"}
+
+    reproject_record = [r for r in records if r["operation"] == "read_reproject"][0]
+    assert reproject_record["output_nbytes"] == data_reproject.values.nbytes
+    assert set(reproject_record["phases"].keys()) >= {"read", "warp"}
+    assert stats_dict["spatial_mosaic"]["output_nbytes"] == data_mosaic.values.nbytes
+    assert stats_dict["save_cog"]["phases"]["write"] > 0
+
+    # Not recorded outside the context
+    reader.read()
+    assert stats.to_dict()["operations"]["RasterioReader.read"]["calls"] == stats_dict["RasterioReader.read"]["calls"]
+
+    # The network statistics option of GDAL is restored after the last context
+    from rasterio._env import get_gdal_config
+    assert get_gdal_config(instrumentation.NETWORK_STATS_OPTION) is None
+    if instrumentation._network_stats() is None:
+        assert "http_requests" not in stats_dict["RasterioReader.read"]
+
+
+def test_read_reproject_multiband(tmp_path):
+    import rasterio.warp
+    from georeader.geotensor import GeoTensor
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path, count=4, dtype="float32")
+    reader = rasterio_reader.RasterioReader(path)
+    dst_transform = rasterio.Affine(7.3, 1.1, 400100, 0.9, -7.7, 3999900)
+    window_out = rasterio.windows.Window(col_off=0, row_off=0, width=120, height=100)
+
+    data = reader.load()
+    for shared_mask in [True, False]:
+        values = data.values.copy()
+        if shared_mask:
+            values[:, 20:60, 30:90] = 0
+        else:
+            values[1, 20:60, 30:90] = 0
+        data_in = GeoTensor(values, transform=data.transform, crs=data.crs, fill_value_default=data.fill_value_default)
+
+        for resampling in [rasterio.warp.Resampling.nearest, rasterio.warp.Resampling.cubic_spline]:
+            expected = np.full((4, 100, 120), data.fill_value_default, dtype=values.dtype)
+            for b in range(4):
+                rasterio.warp.reproject(values[b], expected[b], src_transform=data.transform, src_crs=data.crs,
+                                        dst_transform=dst_transform, dst_crs=data.crs,
+                                        src_nodata=data.fill_value_default, dst_nodata=data.fill_value_default,
+                                        resampling=resampling)
+            for num_threads in [1, 2]:
+                output = read.read_reproject(data_in, dst_crs=data.crs, dst_transform=dst_transform,
+                                             window_out=window_out, resampling=resampling,
+                                             num_threads=num_threads)
+                assert np.array_equal(output.values, expected), \
+                    f"Different result shared_mask={shared_mask} {resampling} num_threads={num_threads}"
+
+
+def test_warp_plan(tmp_path):
+    import rasterio.warp
+    from georeader import warp_plan
+    from georeader import mosaic
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path, count=2, dtype="float32")
+    reader = rasterio_reader.RasterioReader(path)
+    data = reader.load()
+    yy, xx = np.mgrid[0:data.shape[-2], 0:data.shape[-1]]
+    data.values[...] = (np.sin(xx / 20) * np.cos(yy / 30) * 1000 + 2000).astype(np.float32)
+
+    dst_transform = rasterio.Affine(7.3, 1.1, 400100, 0.9, -7.7, 3999900)
+    window_out = rasterio.windows.Window(col_off=0, row_off=0, width=120, height=100)
+    cache = warp_plan.get_warp_plan_cache()
+    cache.clear()
+    for resampling, atol in [(rasterio.warp.Resampling.nearest, 0), (rasterio.warp.Resampling.bilinear, 1e-2),
+                             (rasterio.warp.Resampling.cubic_spline, 1e-2)]:
+        expected = read.read_reproject(data, dst_crs=data.crs, dst_transform=dst_transform,
+                                       window_out=window_out, resampling=resampling)
+        output = read.read_reproject(data, dst_crs=data.crs, dst_transform=dst_transform,
+                                     window_out=window_out, resampling=resampling, use_warp_plan=True)
+        assert output.shape == expected.shape
+        assert np.allclose(output.values, expected.values, atol=atol), f"Different result {resampling}"
+
+    # The plan is computed once for the three calls
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 2
+
+    data_mosaic = mosaic.spatial_mosaic([reader, rasterio_reader.RasterioReader(path)], use_warp_plan=True)
+    assert np.array_equal(data_mosaic.values, reader.load().values)
+
+    # Downsampling: the kernels are widened by the downsampling factor as in GDAL
+    rng = np.random.default_rng(0)
+    data.values[...] = rng.normal(100, 20, size=data.shape).astype(np.float32)
+    dst_transform_coarse = rasterio.Affine(60, 0, 400030, 0, -60, 3999970)
+    window_coarse = rasterio.windows.Window(col_off=0, row_off=0, width=45, height=30)
+    for resampling in [rasterio.warp.Resampling.bilinear, rasterio.warp.Resampling.cubic,
+                       rasterio.warp.Resampling.cubic_spline]:
+        expected = read.read_reproject(data, dst_crs=data.crs, dst_transform=dst_transform_coarse,
+                                       window_out=window_coarse, resampling=resampling)
+        output = read.read_reproject(data, dst_crs=data.crs, dst_transform=dst_transform_coarse,
+                                     window_out=window_coarse, resampling=resampling, use_warp_plan=True)
+        diff = np.abs(output.values - expected.values)[..., 2:-2, 2:-2]
+        assert np.mean(diff) < 0.01 and np.max(diff) < 0.5, f"Different result downsampling {resampling}"
+
+    # The size of the plans does not change when they are applied
+    assert cache.stats()["nbytes"] == sum(p.nbytes for p in cache._plans.values())
+
+    # Between crs the coordinates are approximated as in GDAL and the pixels whose center falls on a nodata
+    # pixel are nodata
+    data.values[...] = (np.sin(xx / 20) * np.cos(yy / 30) * 1000 + 2000).astype(np.float32)
+    data.values[:, :50, :80] = 0
+    kwargs_4326 = dict(dst_crs="EPSG:4326", resolution_dst_crs=1e-4,
+                       bounds=rasterio.warp.transform_bounds(data.crs, "EPSG:4326", *data.bounds))
+    data_4326 = read.read_reproject(data, **kwargs_4326)
+    plan = warp_plan.WarpPlan(data.crs, data.transform, data.shape[-2:], data_4326.crs, data_4326.transform,
+                              data_4326.shape[-2:])
+    xs, ys = rasterio.warp.transform(data_4326.crs, data.crs,
+                                     *data_4326.transform * (plan.dst_index % data_4326.shape[-1] + 0.5,
+                                                             plan.dst_index // data_4326.shape[-1] + 0.5))
+    cols, rows = ~data.transform * (np.array(xs), np.array(ys))
+    assert np.max(np.abs(cols - 0.5 - plan.cols) + np.abs(rows - 0.5 - plan.rows)) < warp_plan.APPROX_TRANSFORM_TOLERANCE + 1e-3
+    for resampling in [rasterio.warp.Resampling.nearest, rasterio.warp.Resampling.cubic_spline]:
+        output = read.read_reproject(data, resampling=resampling, use_warp_plan=True, **kwargs_4326)
+        expected = read.read_reproject(data, resampling=resampling, **kwargs_4326)
+        valid_output, valid_expected = output.values != 0, expected.values != 0
+        assert np.mean(valid_output != valid_expected) < 1e-3, f"Different nodata {resampling}"
+        diff = np.abs(output.values - expected.values)[valid_output & valid_expected]
+        assert np.median(diff) < 0.5, f"Different result between crs {resampling}"
+
+    # Plans larger than the budget of the cache are not computed: the GDAL warper is used
+    cache.clear()
+    cache.resize(warp_plan.WarpPlan.max_nbytes(data_4326.shape[-2:]) - 1)
+    try:
+        output = read.read_reproject(data, use_warp_plan=True, **kwargs_4326)
+        assert cache.stats()["refused"] == 1 and cache.stats()["misses"] == 0 and cache.stats()["nbytes"] == 0
+        assert np.array_equal(output.values, read.read_reproject(data, **kwargs_4326).values)
+    finally:
+        cache.resize(warp_plan.WARP_PLAN_CACHE_SIZE_DEFAULT)
+
+def test_read_reproject_warped_vrt(tmp_path):
+    import rasterio.warp
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    for reader in [rasterio_reader.RasterioReader(path),
+                   rasterio_reader.RasterioReader([path, path], stack=False),
+                   rasterio_reader.RasterioReader(path).read_from_window(
+                       rasterio.windows.Window(col_off=20, row_off=10, width=200, height=150))]:
+        for resampling in [rasterio.warp.Resampling.nearest, rasterio.warp.Resampling.cubic_spline]:
+            kwargs = dict(dst_crs=reader.crs, dst_transform=rasterio.Affine(7.3, 1.1, 400500, 0.9, -7.7, 3999600),
+                          window_out=rasterio.windows.Window(col_off=0, row_off=0, width=200, height=150),
+                          resampling=resampling)
+            expected = read.read_reproject(reader, **kwargs)
+            output = read.read_reproject(reader, use_warped_vrt=True, **kwargs)
+            assert output.shape == expected.shape
+            assert output.transform == expected.transform
+            if resampling == rasterio.warp.Resampling.nearest:
+                assert np.array_equal(output.values, expected.values)
+            else:
+                differences = np.abs(output.values.astype(np.float64) - expected.values)
+                assert np.mean(differences > 1) < 1e-3, f"Different result {reader}"
+
+    # The area to read is not within the reader: falls back to the default path
+    reader = rasterio_reader.RasterioReader(path)
+    kwargs = dict(dst_crs=reader.crs, dst_transform=rasterio.Affine(12, 0, 399000, 0, -12, 4000500),
+                  window_out=rasterio.windows.Window(col_off=0, row_off=0, width=200, height=150))
+    assert np.array_equal(read.read_reproject(reader, use_warped_vrt=True, **kwargs).values,
+                          read.read_reproject(reader, **kwargs).values)
+
+
+def test_read_reproject_chunked(tmp_path):
+    import rasterio.warp
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    reader = rasterio_reader.RasterioReader(path)
+    for resolution, resampling in [(20, rasterio.warp.Resampling.nearest), (7, rasterio.warp.Resampling.cubic_spline)]:
+        kwargs = dict(dst_crs=reader.crs, bounds=(399500, 3997500, 403500, 4000500), resolution_dst_crs=resolution,
+                      resampling=resampling)
+        expected = read.read_reproject(reader, **kwargs)
+
+        # Small memory budget: many tiles processed in a thread pool and written into a memmap
+        out = np.lib.format.open_memmap(str(tmp_path / "out.npy"), mode="w+", dtype=expected.dtype,
+                                        shape=expected.shape)
+        output = read.read_reproject_chunked(reader, out=out, max_memory=1, max_workers=3, **kwargs)
+        assert output.values is out
+        assert output.transform == expected.transform
+        assert np.array_equal(output.values, expected.values)
+
+        path_out = str(tmp_path / "out.tif")
+        assert read.read_reproject_chunked(reader, path_out=path_out, blocksize=64, max_memory=1, **kwargs) is None
+        with rasterio.open(path_out) as src:
+            assert src.block_shapes[0] == (64, 64)
+            assert src.transform == expected.transform
+            assert np.array_equal(src.read(), expected.values)
+
+
+def test_resize_reader(tmp_path):
+    import rasterio.warp
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path, height=120, width=180)
+    reader = rasterio_reader.RasterioReader(path)
+    # Same result reading from the reader
+    assert np.array_equal(read.resize(reader, 20, resampling=rasterio.warp.Resampling.mode).values,
+                          read.resize(reader.load(), 20, resampling=rasterio.warp.Resampling.mode).values)
+
+
+def test_footprint_cache(tmp_path):
+    from georeader import window_utils
+    from shapely.geometry import shape, mapping
+    import rasterio.warp
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    reader = rasterio_reader.RasterioReader(path)
+    footprint = reader.footprint(crs="EPSG:4326")
+    assert reader.footprint(crs="EPSG:4326") is footprint
+    assert window_utils.get_transformer(reader.crs, "EPSG:4326") is window_utils.get_transformer(reader.crs, "EPSG:4326")
+
+    footprint_utm = reader.footprint()
+    expected = shape(rasterio.warp.transform_geom(reader.crs, "EPSG:4326", mapping(footprint_utm)))
+    assert footprint.equals_exact(expected, tolerance=1e-9)
+
+    # Footprints are keyed by extent: changes of the transform are taken into account
+    data = reader.load()
+    assert data.footprint(crs="EPSG:4326") is footprint
+    data_shifted = data.isel({"x": slice(10, 100)})
+    assert data_shifted.footprint(crs="EPSG:4326").bounds[0] > footprint.bounds[0]
+
+    # Footprints crossing the antimeridian are split at +-180
+    transform_dateline = rasterio.transform.from_origin(600_000, 7_100_000, 1_000, 1_000)
+    footprint_dateline = window_utils.footprint(transform_dateline, (200, 200), "EPSG:32660", dst_crs="EPSG:4326")
+    assert footprint_dateline.geom_type == "MultiPolygon"
+    assert footprint_dateline.bounds[2] - footprint_dateline.bounds[0] > 350
+    assert all((p.bounds[2] - p.bounds[0]) < 10 for p in footprint_dateline.geoms)
+    assert window_utils.footprint(transform_dateline, (200, 200), "EPSG:32660",
+                                  dst_crs="EPSG:32601").geom_type == "Polygon"
+
+
+def test_read_chips(tmp_path):
+    from shapely.geometry import Point, box
+    from georeader import window_utils
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path, blocksize=32)
+    reader = rasterio_reader.RasterioReader(path)
+
+    # Points and polygons in UTM and lon/lat, some of them beyond the edges of the raster
+    geoms_utm = [Point(400000 + 10 * x + 3, 4000000 - 10 * y - 7) for x, y in [(5, 5), (150, 100), (299, 10), (-20, 250)]]
+    geoms_utm.append(box(401000, 3999000, 401500, 3999300))
+    xs, ys = window_utils.transform_coords(reader.crs, "EPSG:4326", [400755], [3998555])
+    geoms_ll = [Point(float(xs[0]), float(ys[0]))]
+
+    for geoms, crs in [(geoms_utm, None), (geoms_ll, "EPSG:4326")]:
+        batch = read.read_chips(reader, geoms, shape=(20, 30), crs=crs, batch_size=2, max_workers=2)
+        assert batch.shape == (len(geoms), 3, 20, 30)
+        for i, geom in enumerate(geoms):
+            expected = read.read_from_center_coords(reader, geom.centroid.coords[0], (20, 30),
+                                                    crs_center_coords=crs, trigger_load=True)
+            assert batch.transforms[i] == expected.transform
+            np.testing.assert_array_equal(batch.values[i], expected.values)
+
+    chips = list(read.read_chips(reader, geoms_utm, shape=(20, 30), boundless=False, as_iterator=True,
+                                 batch_size=2, max_workers=2))
+    assert len(chips) == len(geoms_utm)
+    assert chips[3] is None
+    expected = read.read_from_center_coords(reader, geoms_utm[2].coords[0], (20, 30), boundless=False,
+                                            trigger_load=True)
+    np.testing.assert_array_equal(chips[2].values, expected.values)
+
+
+def test_windows_vectorised(tmp_path):
+    from shapely.geometry import box, MultiPolygon
+    from georeader import window_utils
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path)
+    reader = rasterio_reader.RasterioReader(path)
+
+    rng = np.random.default_rng(0)
+    xy = rng.uniform([400000, 3998000], [403000, 4000000], (50, 2))
+    polygons = [box(x, y, x + s, y + s) for (x, y), s in zip(xy, rng.uniform(1, 200, 50))]
+    polygons[0] = MultiPolygon([polygons[0], box(402000, 3998500, 402100, 3998600)])
+    polygons_ll = [window_utils.polygon_to_crs(p, reader.crs, "EPSG:4326") for p in polygons]
+
+    def as_array(windows):
+        return np.array([[w.row_off, w.col_off, w.height, w.width] for w in windows])
+
+    for polys, crs in [(polygons, None), (polygons_ll, "EPSG:4326")]:
+        expected = as_array([read.window_from_polygon(reader, p, crs) for p in polys])
+        windows = read.windows_from_polygons(reader, polys, crs)
+        np.testing.assert_allclose(windows, expected, atol=1e-6)
+        np.testing.assert_array_equal(window_utils.round_outer_windows(windows),
+                                      as_array([window_utils.round_outer_window(w) for w in window_utils.windows_to_list(windows)]))
+
+        bounds = np.array([p.bounds for p in polys])
+        expected = as_array([read.window_from_bounds(reader, b, crs) for b in bounds])
+        np.testing.assert_allclose(read.windows_from_bounds(reader, bounds, crs), expected, atol=1e-6)
+
+        expected = as_array([read.window_from_center_coords(reader, c, (32, 48), crs) for c in bounds[:, :2]])
+        np.testing.assert_array_equal(read.windows_from_center_coords(reader, bounds[:, :2], (32, 48), crs), expected)
+
+    # Ties at the last digit are rounded as the builtin round
+    windows = np.array([[2.9995, 0.0005, 1.0004, 10.00049], [-0.0005, 1.5, 2.0, 3.0]])
+    np.testing.assert_array_equal(window_utils.round_outer_windows(windows),
+                                  as_array([window_utils.round_outer_window(w) for w in window_utils.windows_to_list(windows)]))
+
+
+def test_read_from_polygon_split_parts(tmp_path):
+    from shapely.geometry import box, MultiPolygon
+    from georeader import mosaic
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path, blocksize=32)
+    reader = rasterio_reader.RasterioReader(path)
+
+    # Two parts in opposite corners and a third one close to the first
+    parts = [box(400050, 3998500, 400200, 3998700), box(402500, 3998100, 402900, 3998300),
+             box(400250, 3998550, 400300, 3998600)]
+    polygon = MultiPolygon(parts)
+    groups = read.group_polygon_parts(reader, polygon, gap=10)
+    assert len(groups) == 2 and groups[0].equals(MultiPolygon([parts[0], parts[2]]))
+
+    data_full = read.read_from_polygon(reader, polygon, trigger_load=True)
+    data_list = read.read_from_polygon(reader, polygon, split_parts="list", parts_gap=10, trigger_load=True)
+    assert len(data_list) == 2
+    for group, data in zip(groups, data_list):
+        expected = read.read_from_polygon(reader, group, trigger_load=True)
+        assert data.transform == expected.transform
+        np.testing.assert_array_equal(data.values, expected.values)
+
+    data_assembled = read.read_from_polygon(reader, polygon, split_parts="assemble", parts_gap=10)
+    assert data_assembled.transform == data_full.transform and data_assembled.shape == data_full.shape
+    for data in data_list:
+        window = rasterio.windows.from_bounds(*data.bounds, transform=data_full.transform).round_offsets().round_lengths()
+        np.testing.assert_array_equal(data_assembled.values[(slice(None),) + window.toslices()],
+                                      data_full.values[(slice(None),) + window.toslices()])
+    assert np.sum(data_assembled.values != 0) < np.sum(data_full.values != 0)
+
+    mosaic_full = mosaic.spatial_mosaic([reader], polygon=polygon)
+    mosaic_assembled = mosaic.spatial_mosaic([reader], polygon=polygon, split_parts="assemble", parts_gap=10)
+    assert mosaic_assembled.transform == mosaic_full.transform
+    mask = mosaic_assembled.values != 0
+    np.testing.assert_array_equal(mosaic_assembled.values[mask], mosaic_full.values[mask])
+    assert len(mosaic.spatial_mosaic([reader], polygon=polygon, split_parts="list", parts_gap=10)) == 2
+
+    # A Polygon is a single group: both functions return a list with one GeoTensor
+    polygon_single = parts[0]
+    read_single = read.read_from_polygon(reader, polygon_single, split_parts="list")
+    mosaic_single = mosaic.spatial_mosaic([reader], polygon=polygon_single, split_parts="list")
+    assert isinstance(read_single, list) and isinstance(mosaic_single, list)
+    assert len(read_single) == 1 and len(mosaic_single) == 1
+    mosaic_plain = mosaic.spatial_mosaic([reader], polygon=polygon_single)
+    assert mosaic_single[0].transform == mosaic_plain.transform
+    np.testing.assert_array_equal(mosaic_single[0].values, mosaic_plain.values)
+    mosaic_single_assembled = mosaic.spatial_mosaic([reader], polygon=polygon_single, split_parts="assemble")
+    assert mosaic_single_assembled.transform == mosaic_plain.transform
+    np.testing.assert_array_equal(mosaic_single_assembled.values, mosaic_plain.values)
+
+    # Grouping many windows: the bounding windows of different groups are more than `gap` pixels apart
+    rng = np.random.default_rng(0)
+    windows = np.concatenate([rng.integers(0, 500, size=(300, 2)), np.full((300, 2), 3)], axis=1)
+    groups_windows = read._group_windows(windows, gap=2)
+    assert sorted(i for g in groups_windows for i in g) == list(range(len(windows)))
+    bounds = np.array([[windows[g, 0].min(), windows[g, 1].min(),
+                        (windows[g, 0] + windows[g, 2]).max(), (windows[g, 1] + windows[g, 3]).max()]
+                       for g in groups_windows])
+    for k in range(len(bounds)):
+        apart = (bounds[k, 0] - bounds[:, 2] > 2) | (bounds[:, 0] - bounds[k, 2] > 2) | \
+                (bounds[k, 1] - bounds[:, 3] > 2) | (bounds[:, 1] - bounds[k, 3] > 2)
+        assert np.sum(~apart) == 1
+
+
+def test_lazy_reader(tmp_path):
+    path = str(tmp_path / "raster.tif")
+    _write_raster(path, count=4)
+    reader = rasterio_reader.RasterioReader(path)
+    data = reader.load()
+
+    # Readers are read window by window and can be mixed with GeoTensors
+    r4 = reader.isel({"band": [2]}).lazy()
+    for max_workers in [1, 3]:
+        result = (data.isel({"band": [3]}) - r4).compute(window_size=(64, 50), max_workers=max_workers)
+        assert result.transform == reader.transform
+        np.testing.assert_array_equal(result.values[0], data.values[3] - data.values[2])